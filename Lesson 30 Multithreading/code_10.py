@@ -1,8 +1,19 @@
 # Now using threading to download the images concurrently and see how much time it takes to download the images using multithreading.
+# Instead of a fixed max_workers=15, an adaptive limiter decides how many downloads run at once:
+# it ramps up while throughput improves and backs off on 429/5xx responses.
 import requests
 import time
+import random
 import concurrent.futures
 import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "Lesson 32 AsyncIO" / "Code"))
+from adaptive_limiter import THROTTLE_STATUSES, HostLimiters
+
+MAX_THREADS = 32  # upper bound only; the limiter picks the actual concurrency
+LIMITS = HostLimiters(threaded=True, initial=4, max_limit=MAX_THREADS)
 os.chdir(r"D:\Desktop\Python_Programs\Lesson 30 Multithreading\img\demo2")
 
 img_urls = [
@@ -24,14 +35,27 @@ img_urls = [
 ]
 
 def download_image(img_url):
-    img_bytes = requests.get(img_url).content
+    for attempt in range(5):
+        with LIMITS.request(img_url) as req:
+            response = requests.get(img_url, stream=True)  # returns once the headers are in
+            req.done(response.status_code)
+            response.content  # read the body inside the slot; it is kept on the response
+        if response.status_code not in THROTTLE_STATUSES:
+            break
+        time.sleep(random.uniform(0, 0.2 * 2 ** attempt))  # jittered backoff before retrying
     img_name = img_url.split('/')[3]
     img_name = f'{img_name}.jpg'
+    if not response.ok:
+        # Still throttled after the last retry (or another error): an error page is not an image
+        print(f'{img_name} was not downloaded: HTTP {response.status_code}')
+        return
+    img_bytes = response.content
     with open(img_name, 'wb') as img_file:
         img_file.write(img_bytes)
         print(f'{img_name} was downloaded...')
 t1 = time.perf_counter()
-with concurrent.futures.ThreadPoolExecutor(max_workers=15) as executor:
+with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
     executor.map(download_image, img_urls)
 t2 = time.perf_counter()
-print(f'Finished in {t2-t1} seconds')
\ No newline at end of file
+print(f'Finished in {t2-t1} seconds')
+LIMITS.print_report()
\ No newline at end of file
@@ -0,0 +1,143 @@
+# Thread-pooled image downloader with one shared connection pool.
+#
+# code_9.py / code_10.py call requests.get(url).content for every image: each
+# download opens a fresh TCP (and TLS) connection, and the whole image is held
+# in memory before it is written. Here all threads share one requests.Session
+# whose urllib3 pool has a connection per worker, so connections are reused,
+# and bodies are streamed with iter_content into a temp file that is renamed
+# into place once complete.
+#
+#   results = download_all(urls, "img/demo3", workers=8)
+#   print_timings(results)
+#
+# Compare with code_9.py's sequential loop against a local stand-in server:
+#   python downloader.py --latency 0.05 --workers 8
+import argparse
+import concurrent.futures
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class DownloadTiming:
+    url: str
+    path: Path
+    bytes: int
+    first_byte: float  # seconds until the response headers arrived
+    seconds: float
+
+
+def make_session(workers: int) -> requests.Session:
+    """A Session whose connection pool can serve `workers` threads at once.
+
+    Sharing one Session between threads is fine for plain GETs: the urllib3
+    pool underneath is thread-safe. pool_block=True makes a thread wait for a
+    free connection instead of opening (and then dropping) an extra one.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def file_name(url: str) -> str:
+    # Same naming as code_9.py: the last path segment, with .jpg added when missing
+    name = urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+    return name if Path(name).suffix else f"{name}.jpg"
+
+
+def download(session: requests.Session, url: str, dest_dir: Path, timeout: float = 30) -> DownloadTiming:
+    start = time.perf_counter()
+    dest = Path(dest_dir) / file_name(url)
+    with session.get(url, stream=True, timeout=timeout) as response:
+        first_byte = time.perf_counter() - start
+        response.raise_for_status()
+        # Same directory as the destination so the final rename is atomic
+        fd, tmp_name = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".part")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp_name, dest)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+    return DownloadTiming(url, dest, size, first_byte, time.perf_counter() - start)
+
+
+def download_all(urls: list[str], dest_dir: str | Path, workers: int = 8) -> list[DownloadTiming]:
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    with make_session(workers) as session:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda url: download(session, url, dest_dir), urls))
+
+
+def print_timings(results: list[DownloadTiming]):
+    print(f"{'file':<40} {'KB':>8} {'first byte ms':>14} {'total ms':>9}")
+    for r in results:
+        print(f"{r.path.name:<40} {r.bytes / 1024:>8.1f} {r.first_byte * 1000:>14.1f} {r.seconds * 1000:>9.1f}")
+
+
+def download_sequential_like_code_9(urls: list[str], dest_dir: Path):
+    # code_9.py's loop: a new connection per image, whole body in memory
+    for img_url in urls:
+        img_bytes = requests.get(img_url).content
+        with open(Path(dest_dir) / file_name(img_url), "wb") as img_file:
+            img_file.write(img_bytes)
+
+
+def main():
+    # The local stand-in server lives with the AsyncIO lesson code
+    sys.path.append(str(Path(__file__).resolve().parents[1] / "Lesson 32 AsyncIO" / "Code"))
+    from image_server import serve_images
+
+    sample_dir = Path(__file__).resolve().parents[1] / "Lesson 32 AsyncIO" / "img" / "raw" / "demo1"
+    parser = argparse.ArgumentParser(description="Shared-session threaded downloads vs code_9's sequential loop")
+    parser.add_argument("--latency", type=float, default=0.05, help="per-request latency of the local server")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--copies", type=int, default=3, help="serve this many copies of each sample image")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        served = Path(tmp) / "served"
+        served.mkdir()
+        for copy in range(args.copies):
+            for sample in sample_dir.glob("*.jpg"):
+                (served / f"{sample.stem}_{copy}.jpg").write_bytes(sample.read_bytes())
+
+        with serve_images(served, latency=args.latency) as server:
+            urls = server.urls()
+            runs = {}
+            for name, workers in (("code_9 sequential", None), ("session, 1 thread", 1), (f"session, {args.workers} threads", args.workers)):
+                out = Path(tmp) / f"out_{len(runs)}"
+                out.mkdir()
+                start = time.perf_counter()
+                if workers is None:
+                    download_sequential_like_code_9(urls, out)
+                else:
+                    results = download_all(urls, out, workers=workers)
+                runs[name] = time.perf_counter() - start
+
+        print_timings(results)
+        baseline = runs["code_9 sequential"]
+        print(f"\n{len(urls)} downloads, {args.latency * 1000:.0f} ms server latency")
+        for name, seconds in runs.items():
+            print(f"{name:<22} {seconds:>7.2f} s  {baseline / seconds:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Unit tests for downloader.py, against a local HTTP server
+import functools
+import http.server
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import requests
+
+import downloader
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class TestDownloader(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.served = Path(cls.tmp.name) / "served"
+        cls.served.mkdir()
+        # Several chunks' worth, so streaming and reassembly are exercised
+        cls.files = {f"photo-{i}": bytes(range(256)) * (300 + i) for i in range(6)}
+        for name, data in cls.files.items():
+            (cls.served / name).write_bytes(data)
+        handler = functools.partial(QuietHandler, directory=str(cls.served))
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.out = Path(tempfile.mkdtemp(dir=self.tmp.name))
+
+    def test_download_all(self):
+        urls = [f"{self.base}/{name}" for name in self.files]
+        results = downloader.download_all(urls, self.out, workers=3)
+        self.assertEqual([r.url for r in results], urls)
+        for r, (name, data) in zip(results, self.files.items()):
+            self.assertEqual(r.path, self.out / f"{name}.jpg")  # code_9's naming
+            self.assertEqual(r.path.read_bytes(), data)
+            self.assertEqual(r.bytes, len(data))
+            self.assertLessEqual(r.first_byte, r.seconds)
+        self.assertEqual(sorted(p.name for p in self.out.iterdir()), sorted(f"{name}.jpg" for name in self.files))
+
+    def test_failed_download_leaves_no_file(self):
+        with downloader.make_session(1) as session:
+            with self.assertRaises(requests.HTTPError):
+                downloader.download(session, f"{self.base}/missing", self.out)
+        self.assertEqual(list(self.out.iterdir()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+# Batch image processing from the command line.
+# code_4.py lists one hard-coded folder, stats every file separately and calls
+# os.makedirs once per image. This CLI:
+#   * takes files, directories (-r to recurse) and glob patterns,
+#   * discovers files with os.scandir, reusing the stat result each entry carries,
+#   * creates every output directory once, before any work starts,
+#   * splits the files into size-balanced shards, one task per shard, so even
+#     100k files are a few dozen messages to the worker processes,
+#   * writes a JSON-lines manifest of inputs, outputs, status and timings.
+#
+#   python batch_process.py img/raw -r -o img/processed
+#   python batch_process.py "photos/**/*.jpg" -o out --resize 800x600 --filter sharpen --quality 90
+import argparse
+import glob
+import heapq
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from PIL import ImageFilter
+
+# The shared image pipeline lives with the AsyncIO lesson code
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Lesson 32 AsyncIO" / "Code"))
+from image_pipeline import EdgeDetect, Pipeline, PillowFilter, Resize
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+MIN_SIZE = 1024  # smaller files are not valid images (same rule as code_4.py)
+SHARDS_PER_WORKER = 4
+FILTERS = {
+    "sharpen": ImageFilter.SHARPEN,
+    "edge_enhance": ImageFilter.EDGE_ENHANCE,
+    "smooth": ImageFilter.SMOOTH,
+    "blur": ImageFilter.BLUR,
+    "detail": ImageFilter.DETAIL,
+}
+
+
+def scan(directory: str, recursive: bool, extensions=IMAGE_EXTENSIONS, min_size=MIN_SIZE):
+    """Yield (path, size) for images under directory, one stat per entry at most."""
+    stack = [directory]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError as exc:
+            print(f"Skipping {exc.filename}: {exc.strerror}", file=sys.stderr)
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif entry.name.lower().endswith(extensions):
+                    size = entry.stat().st_size  # cached by scandir on Windows, one lstat elsewhere
+                    if size > min_size:
+                        yield entry.path, size
+
+
+def glob_root(pattern: str) -> str:
+    """The directory part of a pattern before its first wildcard: 'a/b/**/*.jpg' -> 'a/b'."""
+    parts = Path(pattern).parts
+    fixed = []
+    for part in parts[:-1]:
+        if glob.has_magic(part):
+            break
+        fixed.append(part)
+    return str(Path(*fixed)) if fixed else "."
+
+
+def discover(inputs: list[str], recursive: bool) -> list[tuple[str, str, int]]:
+    """(path, root it was found under, size) for every input image, without duplicates."""
+    found: dict[str, tuple[str, str, int]] = {}
+    for spec in inputs:
+        if os.path.isdir(spec):
+            matches, root = [spec], spec
+        elif glob.has_magic(spec):
+            matches, root = glob.iglob(spec, recursive=True), glob_root(spec)
+        else:
+            matches, root = [spec], os.path.dirname(spec) or "."
+
+        for path in matches:
+            if os.path.isdir(path):
+                for file_path, size in scan(path, recursive):
+                    found.setdefault(os.path.abspath(file_path), (file_path, root, size))
+            elif path.lower().endswith(IMAGE_EXTENSIONS):
+                size = os.stat(path).st_size
+                if size > MIN_SIZE:
+                    found.setdefault(os.path.abspath(path), (path, root, size))
+    return list(found.values())
+
+
+class OutputCollision(ValueError):
+    pass
+
+
+def plan_outputs(files: list[tuple[str, str, int]], out_dir: str) -> list[tuple[str, str, int]]:
+    """Map inputs to outputs (keeping the layout under each root) and create every output directory once.
+
+    Raises OutputCollision, before creating anything, when two inputs from
+    different roots have the same relative path (a/x.jpg and b/x.jpg).
+    """
+    jobs = []
+    directories = set()
+    claimed: dict[str, str] = {}  # destination -> the input that writes it
+    collisions = []
+    for path, root, size in files:
+        dst = os.path.join(out_dir, os.path.relpath(path, root))
+        key = os.path.normcase(os.path.normpath(dst))  # x.jpg and X.JPG are one file on Windows
+        if key in claimed:
+            collisions.append(f"{claimed[key]} and {path} -> {dst}")
+            continue
+        claimed[key] = path
+        directories.add(os.path.dirname(dst))
+        jobs.append((path, dst, size))
+    if collisions:
+        raise OutputCollision(
+            f"{len(collisions)} output(s) would be written twice; process these roots in separate runs "
+            "or to separate -o directories:\n  " + "\n  ".join(collisions)
+        )
+    os.makedirs(out_dir, exist_ok=True)
+    for directory in sorted(directories):
+        os.makedirs(directory, exist_ok=True)
+    return jobs
+
+
+def make_shards(jobs: list[tuple[str, str, int]], count: int) -> list[list[tuple[str, str]]]:
+    """Greedy size balancing: biggest file first, always into the lightest shard."""
+    count = max(1, min(count, len(jobs)))
+    heap = [(0, i) for i in range(count)]
+    shards: list[list[tuple[str, str]]] = [[] for _ in range(count)]
+    for src, dst, size in sorted(jobs, key=lambda job: job[2], reverse=True):
+        total, i = heapq.heappop(heap)
+        shards[i].append((src, dst))
+        heapq.heappush(heap, (total + size, i))
+    return [shard for shard in shards if shard]
+
+
+def process_shard(pipeline: Pipeline, shard: list[tuple[str, str]], save_options: dict) -> list[dict]:
+    rows = []
+    for src, dst in shard:
+        start = time.perf_counter()
+        row = {"input": src, "output": dst}
+        try:
+            _, row["timings"] = pipeline.process_file(src, dst, **save_options)
+            row["status"] = "ok"
+        except Exception as exc:  # one bad file must not sink the shard
+            row["status"], row["error"] = "error", repr(exc)
+        row["seconds"] = time.perf_counter() - start
+        rows.append(row)
+    return rows
+
+
+def build_pipeline(args) -> Pipeline:
+    stages = []
+    if args.resize:
+        stages.append(Resize(args.resize))
+    stages += [PillowFilter(FILTERS[name]) for name in args.filter]
+    if args.edges:
+        stages.append(EdgeDetect())
+    return Pipeline(stages)
+
+
+def parse_size(text: str) -> tuple[int, int] | None:
+    if not text:
+        return None
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process many images in parallel")
+    parser.add_argument("inputs", nargs="+", help="files, directories or glob patterns (quote them; ** recurses)")
+    parser.add_argument("-o", "--output", required=True, help="output directory (input layout is kept)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="descend into sub-directories")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--resize", type=parse_size, default=(400, 300), help="WIDTHxHEIGHT, or '' to keep the size")
+    parser.add_argument(
+        "--filter", action="append", choices=sorted(FILTERS),
+        help="repeat to chain (default: code_4's sharpen, edge_enhance, smooth)",
+    )
+    parser.add_argument("--edges", action="store_true", help="finish with edge detection")
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--manifest", help="JSON-lines manifest path (default: <output>/manifest.jsonl)")
+    parser.add_argument("--dry-run", action="store_true", help="only list what would be processed")
+    args = parser.parse_args(argv)
+    if args.filter is None:
+        args.filter = ["sharpen", "edge_enhance", "smooth"]
+
+    start = time.perf_counter()
+    files = discover(args.inputs, args.recursive)
+    print(f"Found {len(files)} images in {time.perf_counter() - start:.2f} seconds")
+    if args.dry_run or not files:
+        for path, _, _ in files[:20]:
+            print(f"  {path}")
+        return []
+
+    try:
+        jobs = plan_outputs(files, args.output)
+    except OutputCollision as exc:
+        parser.error(str(exc))
+    shards = make_shards(jobs, args.workers * SHARDS_PER_WORKER)
+    pipeline = build_pipeline(args)
+    save_options = {"quality": args.quality}
+    manifest_path = Path(args.manifest or Path(args.output) / "manifest.jsonl")
+    print(f"Processing with {args.workers} workers in {len(shards)} shards: {pipeline}")
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor, manifest_path.open("w") as manifest:
+        futures = [executor.submit(process_shard, pipeline, shard, save_options) for shard in shards]
+        for done, future in enumerate(as_completed(futures), start=1):
+            shard_rows = future.result()
+            manifest.writelines(json.dumps(row) + "\n" for row in shard_rows)
+            rows += shard_rows
+            print(f"  shard {done}/{len(shards)} done ({len(rows)}/{len(jobs)} images)")
+
+    errors = sum(row["status"] == "error" for row in rows)
+    total = time.perf_counter() - start
+    print(f"Processed {len(rows) - errors} images ({errors} errors) in {total:.2f} seconds; manifest: {manifest_path}")
+    return rows
+
+
+if __name__ == "__main__":
+    main()
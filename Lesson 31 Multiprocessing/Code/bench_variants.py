@@ -0,0 +1,84 @@
+# Benchmark: thumbnail/medium/large variants the old way (one full decode per
+# size) vs one draft-mode decode with a resize cascade, encoded serially and
+# in parallel. Uses generated photo-sized JPEGs so draft() has room to work.
+# Run from this folder: python bench_variants.py [--images N] [--size 4000x3000] [--runs N]
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import Executor, Future
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from variants import VARIANTS, make_variants, make_variants_separately
+
+
+class InlineExecutor(Executor):
+    """Runs each submitted call immediately: make_variants with serial encoding."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def generate_photos(directory: Path, count: int, size: tuple[int, int], seed: int = 0) -> list[Path]:
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        img = Image.effect_noise(size, 50).convert("RGB")
+        draw = ImageDraw.Draw(img)
+        for _ in range(40):
+            x, y = rng.randrange(size[0]), rng.randrange(size[1])
+            w, h = rng.randrange(50, size[0] // 3), rng.randrange(50, size[1] // 3)
+            draw.ellipse((x, y, x + w, y + h), fill=tuple(rng.randrange(256) for _ in range(3)))
+        path = directory / f"photo_{i:03d}.jpg"
+        img.filter(ImageFilter.GaussianBlur(2)).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def parse_size(text: str) -> tuple[int, int]:
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repeated full decodes vs one draft decode + resize cascade")
+    parser.add_argument("--images", type=int, default=6)
+    parser.add_argument("--size", type=parse_size, default=(4000, 3000), help="WIDTHxHEIGHT of generated photos")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    approaches = {
+        "decode per size": lambda src, out: make_variants_separately(src, out, quality=85),
+        "one full decode, cascade": lambda src, out: make_variants(src, out, draft=False, encoder=InlineExecutor(), quality=85),
+        "draft decode, cascade": lambda src, out: make_variants(src, out, encoder=InlineExecutor(), quality=85),
+        "draft + parallel encode": lambda src, out: make_variants(src, out, quality=85),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate_photos(Path(tmp), args.images, args.size)
+        sizes = ", ".join(f"{name} {w}x{h}" for name, (w, h) in VARIANTS.items())
+        print(f"{len(paths)} JPEGs of {args.size[0]}x{args.size[1]} -> {sizes}; {args.runs} runs\n")
+        print(f"{'approach':<26} {'mean s':>8} {'stdev':>7} {'decode s':>9} {'speedup':>8}")
+
+        baseline = None
+        for name, run in approaches.items():
+            times, decodes = [], []
+            for i in range(args.runs):
+                out = Path(tmp) / f"out_{i}"
+                start = time.perf_counter()
+                results = [run(path, out) for path in paths]
+                times.append(time.perf_counter() - start)
+                decodes.append(sum(t for _, timings in results for stage, t in timings.items() if stage.startswith("decode")))
+            mean = statistics.mean(times)
+            baseline = baseline or mean
+            stdev = statistics.stdev(times) if len(times) > 1 else 0.0
+            print(f"{name:<26} {mean:>8.3f} {stdev:>7.3f} {statistics.mean(decodes):>9.3f} {baseline / mean:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
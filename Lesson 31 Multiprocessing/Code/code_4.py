@@ -1,14 +1,40 @@
 # Real-world use case: Image Processing (CPU-bound task)
 # Comparing single-process vs multi-process for resizing images
 
+import argparse
 import concurrent.futures
 import os
+import sys
 import time
+from collections import defaultdict
+from pathlib import Path
 from PIL import Image, ImageFilter
 
 # Image paths from raw folder
 RAW_FOLDER = r'D:\Desktop\Python_Programs\Lesson 31 Multiprocessing\Code\img\raw'
 PROCESSED_FOLDER = r'D:\Desktop\Python_Programs\Lesson 31 Multiprocessing\Code\img\processed'
+CACHE_DIR = os.path.join(os.path.dirname(PROCESSED_FOLDER), '.image_cache')
+VARIANTS_FOLDER = os.path.join(os.path.dirname(PROCESSED_FOLDER), 'variants')
+EXECUTOR = "pool"  # long-lived warm WorkerPool; or "process" / "thread" for a fresh pool per run
+
+# Resize to smaller dimensions, then multiple filters (CPU-intensive operations)
+SIZE = (400, 300)
+FILTERS = {"sharpen": ImageFilter.SHARPEN, "edge_enhance": ImageFilter.EDGE_ENHANCE, "smooth": ImageFilter.SMOOTH}
+
+# Optional: the AsyncIO lesson's image pipeline adds a warm worker pool, an output
+# cache (Method 3) and multi-size variants (Method 4). Without that folder this
+# script runs Methods 1 and 2 on its own, with a fresh process pool.
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Lesson 32 AsyncIO" / "Code"))
+try:
+    from image_pipeline import Pipeline, PillowFilter, Resize
+    from image_cache import ImageCache, run_cached_batch
+    from worker_pool import get_pool
+    from variants import VARIANTS, run_variants_batch
+except ImportError:
+    PIPELINE = None
+else:
+    # The same steps as process_image(), as a pipeline the cache can fingerprint
+    PIPELINE = Pipeline([Resize(SIZE), *(PillowFilter(f) for f in FILTERS.values())])
 
 def get_image_paths():
     """Get all valid image paths from raw folder (skip files smaller than 1KB)"""
@@ -22,26 +48,53 @@ def get_image_paths():
     return valid_paths
 
 def process_image(image_path):
-    """CPU-bound task: Resize and apply filters to an image"""
-    img = Image.open(image_path)
-    
-    # Resize to smaller dimensions
-    img = img.resize((400, 300), Image.Resampling.LANCZOS)
-    
-    # Apply multiple filters (CPU-intensive operations)
-    img = img.filter(ImageFilter.SHARPEN)
-    img = img.filter(ImageFilter.EDGE_ENHANCE)
-    img = img.filter(ImageFilter.SMOOTH)
-    
+    """CPU-bound task: Resize and apply filters to an image; returns (output path, seconds per step)"""
+    timings = {}
+    start = time.perf_counter()
+    with Image.open(image_path) as img:
+        img.load()
+        timings["decode"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        img = img.resize(SIZE, Image.Resampling.LANCZOS)
+        timings["resize"] = time.perf_counter() - start
+    for name, image_filter in FILTERS.items():
+        start = time.perf_counter()
+        img = img.filter(image_filter)
+        timings[name] = time.perf_counter() - start
+
     # Save processed image
+    start = time.perf_counter()
     filename = os.path.basename(image_path)
     output_path = os.path.join(PROCESSED_FOLDER, filename)
     os.makedirs(PROCESSED_FOLDER, exist_ok=True)
     img.save(output_path, quality=85)
-    
-    return output_path
+    timings["encode"] = time.perf_counter() - start
+    return output_path, timings
+
+def print_timings(results):
+    """Total and average seconds per step over all images"""
+    totals = defaultdict(float)
+    for _, timings in results:
+        for name, seconds in timings.items():
+            totals[name] += seconds
+    count = len(results) or 1
+    for name, seconds in totals.items():
+        print(f"  {name:<13} {seconds:>8.3f} s total {seconds / count * 1000:>8.1f} ms/image")
+
+def make_executor(kind):
+    if kind == "pool":
+        return get_pool(4)
+    if kind == "thread":
+        return concurrent.futures.ThreadPoolExecutor(max_workers=4)
+    return concurrent.futures.ProcessPoolExecutor(max_workers=4)
 
 def main():
+    parser = argparse.ArgumentParser(description="Sequential vs parallel image processing")
+    parser.add_argument("--force", action="store_true", help="ignore cached outputs in the cached run")
+    parser.add_argument("--variants", action="store_true", help="also write thumbnail/medium/large variants, one decode per image")
+    args = parser.parse_args()
+
     image_paths = get_image_paths()
     print(f"Found {len(image_paths)} images to process")
     
@@ -53,11 +106,11 @@ def main():
     print("\n[Method 1] Sequential Processing (1 process)...")
     start_time = time.perf_counter()
     
-    for img_path in image_paths:
-        process_image(img_path)
+    sequential_results = [process_image(img_path) for img_path in image_paths]
     
     sequential_time = time.perf_counter() - start_time
     print(f"Time taken: {sequential_time:.2f} seconds")
+    print_timings(sequential_results)
     
     # Clean up processed images for fair comparison
     import shutil
@@ -65,23 +118,65 @@ def main():
         shutil.rmtree(PROCESSED_FOLDER)
     
     # Method 2: Multiprocessing (Multiple Processes)
-    print("\n[Method 2] Parallel Processing (4 processes)...")
+    kind = "process" if EXECUTOR == "pool" and PIPELINE is None else EXECUTOR  # the warm pool is a Lesson 32 module
+    executor = make_executor(kind)
+    print(f"\n[Method 2] Parallel Processing (4 workers, {kind})...")
     start_time = time.perf_counter()
     
-    with concurrent.futures.ProcessPoolExecutor(max_workers=4) as executor:
-        executor.map(process_image, image_paths)
+    parallel_results = list(executor.map(process_image, image_paths))
     
     parallel_time = time.perf_counter() - start_time
     print(f"Time taken: {parallel_time:.2f} seconds")
+    print_timings(parallel_results)
     
+    if PIPELINE is None:
+        print("\nMethods 3 and 4 need the image pipeline from 'Lesson 32 AsyncIO/Code'; skipped")
+        print(f"\nSequential: {sequential_time:.2f} s, parallel: {parallel_time:.2f} s, "
+              f"speedup {sequential_time / parallel_time:.2f}x")
+        executor.shutdown()
+        return
+
+    # Method 3: Parallel with the content-addressed cache. The first run
+    # fills it; later runs only process images that changed.
+    print(f"\n[Method 3] Parallel Processing with output cache{' (--force)' if args.force else ''}...")
+    start_time = time.perf_counter()
+
+    cache = ImageCache(CACHE_DIR)
+    cached_results = run_cached_batch(
+        PIPELINE, image_paths, PROCESSED_FOLDER, cache, force=args.force, executor=executor, quality=85,
+    )
+
+    cached_time = time.perf_counter() - start_time
+    print(f"Time taken: {cached_time:.2f} seconds")
+    print_timings(cached_results)
+    cache.print_report()
+
+    # Method 4: every size in VARIANTS from a single (draft-mode) decode,
+    # with the same filters applied to each size
+    if args.variants:
+        print(f"\n[Method 4] Parallel multi-resolution variants ({', '.join(VARIANTS)})...")
+        start_time = time.perf_counter()
+
+        finish = Pipeline(PIPELINE.stages[1:])  # everything after the 400x300 resize
+        variant_results = run_variants_batch(image_paths, VARIANTS_FOLDER, executor=executor, finish=finish, quality=85)
+
+        variants_time = time.perf_counter() - start_time
+        print(f"Time taken: {variants_time:.2f} seconds")
+        print_timings(variant_results)
+
     # Results
     print("\n" + "=" * 60)
     print("RESULTS")
     print("=" * 60)
     print(f"Sequential (1 process):  {sequential_time:.2f} seconds")
-    print(f"Parallel (4 processes):  {parallel_time:.2f} seconds")
+    print(f"Parallel (4 workers):    {parallel_time:.2f} seconds")
     print(f"Speedup: {sequential_time/parallel_time:.2f}x faster")
+    print(f"Parallel + cache:        {cached_time:.2f} seconds")
+    if args.variants:
+        print(f"{len(VARIANTS)} variants, 1 decode:   {variants_time:.2f} seconds")
     print("=" * 60)
+    if kind != "pool":  # the warm pool stays up for the next run in this process
+        executor.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
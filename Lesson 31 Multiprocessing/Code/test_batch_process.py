@@ -0,0 +1,78 @@
+# Unit tests for batch_process.py
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+import batch_process
+
+
+class TestBatchProcess(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        self.src = self.root / "in"
+        for rel in ["a.jpg", "sub/b.jpg", "sub/deeper/c.png"]:
+            path = self.src / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            Image.effect_noise((64, 48), 60).convert("RGB").save(path)
+        (self.src / "tiny.jpg").write_bytes(b"x" * 10)  # under MIN_SIZE
+        (self.src / "notes.txt").write_bytes(b"x" * 5000)
+
+    def names(self, files):
+        return sorted(os.path.relpath(path, self.src) for path, _, _ in files)
+
+    def test_discover_directories_and_globs(self):
+        self.assertEqual(self.names(batch_process.discover([str(self.src)], recursive=False)), ["a.jpg"])
+        recursive = batch_process.discover([str(self.src)], recursive=True)
+        self.assertEqual(self.names(recursive), ["a.jpg", os.path.join("sub", "b.jpg"), os.path.join("sub", "deeper", "c.png")])
+        pattern = str(self.src / "**" / "*.jpg")
+        self.assertEqual(self.names(batch_process.discover([pattern, pattern], recursive=False)), ["a.jpg", os.path.join("sub", "b.jpg")])
+
+    def test_shards_are_balanced_and_complete(self):
+        jobs = [(f"in{i}", f"out{i}", size) for i, size in enumerate([100, 90, 50, 40, 30, 10, 5, 5])]
+        shards = batch_process.make_shards(jobs, 3)
+        self.assertEqual(sorted(src for shard in shards for src, _ in shard), sorted(job[0] for job in jobs))
+        sizes = {src: size for src, _, size in jobs}
+        totals = [sum(sizes[src] for src, _ in shard) for shard in shards]
+        self.assertLessEqual(max(totals) - min(totals), 50)
+
+    def test_cli_keeps_layout_and_writes_manifest(self):
+        out = self.root / "out"
+        (self.src / "broken.jpg").write_bytes(b"not an image" * 200)
+        rows = batch_process.main([str(self.src), "-r", "-o", str(out), "-j", "2", "--resize", "32x24"])
+        self.assertTrue((out / "sub" / "deeper" / "c.png").exists())
+        with Image.open(out / "sub" / "b.jpg") as img:
+            self.assertEqual(img.size, (32, 24))
+        manifest = [json.loads(line) for line in (out / "manifest.jsonl").read_text().splitlines()]
+        self.assertEqual(len(manifest), 4)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(sorted(row["status"] for row in manifest), ["error", "ok", "ok", "ok"])
+
+
+    def test_same_relative_name_under_two_roots_is_rejected(self):
+        other = self.root / "other"
+        other.mkdir()
+        Image.effect_noise((64, 48), 60).convert("RGB").save(other / "a.jpg")
+        out = self.root / "out"
+        files = batch_process.discover([str(self.src), str(other)], recursive=False)
+        with self.assertRaises(batch_process.OutputCollision) as cm:
+            batch_process.plan_outputs(files, str(out))
+        self.assertIn(str(other / "a.jpg"), str(cm.exception))
+        self.assertFalse(out.exists())  # nothing created, nothing overwritten
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            batch_process.main([str(self.src), str(other), "-o", str(out)])
+        # Different names under two roots are fine
+        (other / "a.jpg").rename(other / "z.jpg")
+        files = batch_process.discover([str(self.src), str(other)], recursive=False)
+        self.assertEqual(len(batch_process.plan_outputs(files, str(out))), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
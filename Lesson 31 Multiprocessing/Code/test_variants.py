@@ -0,0 +1,60 @@
+# Unit tests for variants.py
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageChops, ImageFilter, ImageStat
+
+import variants
+from image_pipeline import Pipeline, PillowFilter
+
+SIZES = {"large": (400, 300), "thumbnail": (100, 75), "medium": (200, 150)}
+
+
+class TestVariants(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        self.src = self.root / "photo.jpg"
+        Image.linear_gradient("L").resize((1000, 800)).convert("RGB").save(self.src, quality=95)
+
+    def test_cascade_runs_largest_first(self):
+        self.assertEqual([name for name, _ in variants.cascade_order(SIZES)], ["large", "medium", "thumbnail"])
+
+    def test_every_size_written_from_one_draft_decode(self):
+        finish = Pipeline([PillowFilter(ImageFilter.SHARPEN)])
+        outputs, timings = variants.make_variants(self.src, self.root / "out", SIZES, finish=finish, quality=85)
+        self.assertEqual(set(outputs), set(SIZES))
+        for name, size in SIZES.items():
+            self.assertEqual(outputs[name], self.root / "out" / name / "photo.jpg")
+            with Image.open(outputs[name]) as img:
+                self.assertEqual(img.size, size)
+        self.assertEqual(sum(stage == "decode" for stage in timings), 1)
+        self.assertIn("sharpen_medium", timings)
+
+        # 1000x800 -> 400x300 lets libjpeg decode at half size
+        with Image.open(self.src) as img:
+            img.draft("RGB", SIZES["large"])
+            self.assertEqual(img.size, (500, 400))
+
+    def test_matches_separate_full_decodes(self):
+        with ThreadPoolExecutor(2) as encoder:
+            cascade, _ = variants.make_variants(self.src, self.root / "cascade", SIZES, encoder=encoder)
+        separate, _ = variants.make_variants_separately(self.src, self.root / "separate", SIZES)
+        for name in SIZES:
+            with Image.open(cascade[name]) as a, Image.open(separate[name]) as b:
+                diff = ImageStat.Stat(ImageChops.difference(a.convert("L"), b.convert("L"))).mean[0]
+                self.assertLess(diff, 2.0, name)
+
+    def test_non_jpeg_input(self):
+        png = self.root / "photo.png"
+        Image.new("RGBA", (640, 480), (10, 20, 30, 255)).save(png)
+        outputs, _ = variants.make_variants(png, self.root / "out", SIZES, format="JPEG")
+        with Image.open(outputs["thumbnail"]) as img:
+            self.assertEqual((img.size, img.mode), ((100, 75), "RGB"))
+
+
+if __name__ == '__main__':
+    unittest.main()
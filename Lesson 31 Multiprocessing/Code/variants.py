@@ -0,0 +1,147 @@
+# Several output sizes (thumbnail, medium, large) from one decode.
+#
+# Running code_4.py once per size decodes every JPEG once per size, always at
+# full resolution. make_variants() instead:
+#   * asks the JPEG decoder for a smaller image up front with Image.draft():
+#     libjpeg scales by 1/2, 1/4 or 1/8 in the DCT domain while decoding, so
+#     a 4000x3000 photo headed for 1600x1200 is decoded at 2000x1500,
+#   * resizes in a cascade, largest variant first, each one from the previous
+#     (smaller) result instead of from the full image,
+#   * runs the per-variant finish (filters) and JPEG encoding in a thread pool;
+#     Pillow releases the GIL while filtering and encoding.
+#
+#   outputs, timings = make_variants("img/raw/photo.jpg", "img/variants", quality=85)
+#   # {'large': img/variants/large/photo.jpg, 'medium': ..., 'thumbnail': ...}
+#
+# Benchmark against one full decode per size: python bench_variants.py
+import sys
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+# The shared image pipeline lives with the AsyncIO lesson code
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Lesson 32 AsyncIO" / "Code"))
+from image_pipeline import Pipeline, Resize, make_executor
+
+VARIANTS = {
+    "large": (1600, 1200),
+    "medium": (800, 600),
+    "thumbnail": (400, 300),  # code_4.py's size
+}
+
+_encoder: ThreadPoolExecutor | None = None
+
+
+def _encode_pool() -> ThreadPoolExecutor:
+    # One per process, so worker processes don't start threads for every image
+    global _encoder
+    if _encoder is None:
+        _encoder = ThreadPoolExecutor(max_workers=len(VARIANTS), thread_name_prefix="encode")
+    return _encoder
+
+
+def cascade_order(variants: dict[str, tuple[int, int]]) -> list[tuple[str, tuple[int, int]]]:
+    """Largest first, so every resize starts from the smallest image that is still big enough."""
+    return sorted(variants.items(), key=lambda item: item[1][0] * item[1][1], reverse=True)
+
+
+def _finish_and_save(img: Image.Image, finish: Pipeline | None, dst: Path, save_options: dict) -> dict[str, float]:
+    timings = {}
+    if finish is not None:
+        img, timings = finish.run(img)
+    start = time.perf_counter()
+    dst.unlink(missing_ok=True)
+    img.save(dst, **save_options)
+    timings["encode"] = time.perf_counter() - start
+    return timings
+
+
+def make_variants(
+    src: str | Path,
+    out_dir: str | Path,
+    variants: dict[str, tuple[int, int]] = VARIANTS,
+    finish: Pipeline | None = None,
+    resample=Image.Resampling.LANCZOS,
+    draft: bool = True,
+    encoder: Executor | None = None,
+    **save_options,
+) -> tuple[dict[str, Path], dict[str, float]]:
+    """Write every variant of src to out_dir/<variant>/<name>; one decode in total.
+
+    finish runs on each resized variant before it is saved (e.g. code_4's
+    filters). encoder=None uses this process's shared thread pool; pass an
+    executor of your own, or draft=False to decode at full size.
+    """
+    src, out_dir = Path(src), Path(out_dir)
+    order = cascade_order(variants)
+    timings = {}
+
+    start = time.perf_counter()
+    with Image.open(src) as img:
+        if draft and img.format == "JPEG":
+            # Biggest 1/2, 1/4 or 1/8 reduction that still covers the largest variant
+            img.draft("RGB", order[0][1])
+        img.load()
+        timings["decode"] = time.perf_counter() - start
+        source = img.convert("RGB") if img.mode not in ("RGB", "L") else img.copy()
+
+    resized = []
+    for name, size in order:
+        start = time.perf_counter()
+        source = source.resize(size, resample)
+        timings[f"resize_{name}"] = time.perf_counter() - start
+        dst = out_dir / name / src.name
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        resized.append((name, source, dst))
+
+    pool = encoder or _encode_pool()
+    futures = {name: pool.submit(_finish_and_save, img, finish, dst, save_options) for name, img, dst in resized}
+    for name, future in futures.items():
+        for stage, seconds in future.result().items():
+            timings[f"{stage}_{name}"] = seconds
+    return {name: dst for name, _, dst in resized}, timings
+
+
+def make_variants_separately(
+    src: str | Path,
+    out_dir: str | Path,
+    variants: dict[str, tuple[int, int]] = VARIANTS,
+    finish: Pipeline | None = None,
+    **save_options,
+) -> tuple[dict[str, Path], dict[str, float]]:
+    """The old way: one full decode + resize + save per variant (code_4.py run once per size)."""
+    outputs, timings = {}, {}
+    for name, size in variants.items():
+        dst = Path(out_dir) / name / Path(src).name
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        stages = [Resize(size)] + (finish.stages if finish is not None else [])
+        outputs[name], stage_timings = Pipeline(stages).process_file(src, dst, **save_options)
+        for stage, seconds in stage_timings.items():
+            timings[f"{stage}_{name}"] = seconds
+    return outputs, timings
+
+
+def run_variants_batch(
+    paths: list[Path],
+    out_dir: str | Path,
+    executor: str | Executor = "process",
+    max_workers: int | None = None,
+    variants: dict[str, tuple[int, int]] = VARIANTS,
+    finish: Pipeline | None = None,
+    **save_options,
+) -> list[tuple[dict[str, Path], dict[str, float]]]:
+    """make_variants over many images, one image per task (like image_pipeline.run_batch)."""
+    out_dir = Path(out_dir)
+    for name in variants:
+        (out_dir / name).mkdir(parents=True, exist_ok=True)
+    pool = make_executor(executor, max_workers) if isinstance(executor, str) else executor
+    try:
+        futures = [
+            pool.submit(make_variants, path, out_dir, variants, finish, **save_options) for path in paths
+        ]
+        return [future.result() for future in futures]
+    finally:
+        if isinstance(executor, str):
+            pool.shutdown()
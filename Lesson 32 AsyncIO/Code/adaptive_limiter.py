@@ -0,0 +1,197 @@
+# Adaptive (AIMD) concurrency limits for downloads, instead of a fixed
+# DOWNLOAD_LIMIT = 4 semaphore or max_workers=15.
+#
+# Additive increase: after every window of `limit` completed requests, the
+# limit goes up by one as long as throughput (requests/second) didn't fall.
+# Multiplicative decrease: a 429/5xx, a connection error or a latency spike
+# halves the limit. Latency is the time to the response headers (until done()
+# is called), so body size doesn't count; a spike is more than spike_factor x
+# a moving average of recent latencies, which follows the server when it
+# settles at a new normal. Requests
+# that were already in flight when the limit dropped can't halve it again,
+# so one overloaded moment counts as one signal, like TCP congestion control.
+#
+#   limits = HostLimiters(initial=4)
+#   async with limits.request(url) as req:
+#       response = await client.get(url)
+#       req.done(response.status_code)
+#   limits.print_report()
+#
+# AsyncLimiter is for asyncio code, ThreadLimiter for thread pools; both share
+# the AIMDController arithmetic and keep a (time, limit) history.
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlsplit
+
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AIMDController:
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        spike_factor: float = 3.0,
+        baseline_weight: float = 0.2,
+        tolerance: float = 0.05,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.spike_factor = spike_factor
+        self.baseline_weight = baseline_weight  # share of each new latency in the moving average
+        self.tolerance = tolerance
+        self.epoch = 0  # bumped on every decrease
+        self.baseline_latency: float | None = None
+        self.throttled = 0
+        self._window_start = time.perf_counter()
+        self._window_done = 0
+        self._last_throughput = 0.0
+        self.history: list[tuple[float, int]] = [(self._window_start, self.allowed)]
+
+    @property
+    def allowed(self) -> int:
+        return int(self.limit)
+
+    def on_success(self, latency: float, epoch: int):
+        baseline = self.baseline_latency
+        # Spikes feed the average too, so a lasting change stops counting as one after a few requests
+        self.baseline_latency = latency if baseline is None else baseline + self.baseline_weight * (latency - baseline)
+        if baseline is not None and latency > self.spike_factor * baseline:
+            self.on_throttle(epoch)
+            return
+
+        self._window_done += 1
+        if self._window_done < max(1, self.allowed):
+            return
+        now = time.perf_counter()
+        throughput = self._window_done / max(now - self._window_start, 1e-9)
+        if throughput >= self._last_throughput * (1 - self.tolerance):
+            self._set(self.limit + self.increase)
+        self._last_throughput = throughput
+        self._window_start, self._window_done = now, 0
+
+    def on_throttle(self, epoch: int):
+        self.throttled += 1
+        if epoch != self.epoch:
+            return  # started before the last decrease; that decrease already covered it
+        self.epoch += 1
+        self._set(self.limit * self.decrease)
+        self._last_throughput = 0.0
+        self._window_start, self._window_done = time.perf_counter(), 0
+
+    def _set(self, limit: float):
+        before = self.allowed
+        self.limit = min(self.max_limit, max(self.min_limit, limit))
+        if self.allowed != before:
+            self.history.append((time.perf_counter(), self.allowed))
+
+
+class Request:
+    """One slot. Call done(status) as soon as the HTTP status arrives, before
+    reading the body: that stops the latency clock. Once it is called the
+    status decides, otherwise an exception (refused, reset, timeout) counts as
+    throttling."""
+
+    def __init__(self, epoch: int):
+        self.epoch = epoch
+        self.start = time.perf_counter()
+        self.status: int | None = None
+        self.latency: float | None = None
+
+    def done(self, status: int):
+        self.status = status
+        self.latency = time.perf_counter() - self.start
+
+
+def _record(controller: AIMDController, request: Request, failed: bool):
+    throttled = failed if request.status is None else request.status in THROTTLE_STATUSES
+    if throttled:
+        controller.on_throttle(request.epoch)
+    else:
+        controller.on_success(request.latency, request.epoch)
+
+
+class AsyncLimiter:
+    def __init__(self, **aimd_options):
+        self.controller = AIMDController(**aimd_options)
+        self.in_flight = 0
+        self._changed = asyncio.Condition()
+
+    @asynccontextmanager
+    async def request(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.in_flight < self.controller.allowed)
+            self.in_flight += 1
+        req = Request(self.controller.epoch)
+        failed = None  # stays None if cancelled: that says nothing about the server
+        try:
+            yield req
+            failed = False
+        except Exception:
+            failed = True
+            raise
+        finally:
+            async with self._changed:
+                self.in_flight -= 1
+                if failed is not None:
+                    _record(self.controller, req, failed)
+                self._changed.notify_all()
+
+
+class ThreadLimiter:
+    def __init__(self, **aimd_options):
+        self.controller = AIMDController(**aimd_options)
+        self.in_flight = 0
+        self._changed = threading.Condition()
+
+    @contextmanager
+    def request(self):
+        with self._changed:
+            self._changed.wait_for(lambda: self.in_flight < self.controller.allowed)
+            self.in_flight += 1
+        req = Request(self.controller.epoch)
+        failed = None  # stays None if cancelled: that says nothing about the server
+        try:
+            yield req
+            failed = False
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with self._changed:
+                self.in_flight -= 1
+                if failed is not None:
+                    _record(self.controller, req, failed)
+                self._changed.notify_all()
+
+
+class HostLimiters:
+    """One limiter per host, created on first use with the same AIMD settings."""
+
+    def __init__(self, threaded: bool = False, **aimd_options):
+        limiter_cls = ThreadLimiter if threaded else AsyncLimiter
+        self.limiters: dict[str, AsyncLimiter | ThreadLimiter] = defaultdict(lambda: limiter_cls(**aimd_options))
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> AsyncLimiter | ThreadLimiter:
+        with self._lock:
+            return self.limiters[urlsplit(url).netloc]
+
+    def request(self, url: str):
+        return self.for_url(url).request()
+
+    def print_report(self):
+        for host, limiter in self.limiters.items():
+            c = limiter.controller
+            start = c.history[0][0]
+            steps = " -> ".join(f"{limit}@{t - start:.1f}s" for t, limit in c.history)
+            print(f"{host}: concurrency {steps}; final {c.allowed}, {c.throttled} throttled responses")
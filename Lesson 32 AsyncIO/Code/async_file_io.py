@@ -0,0 +1,135 @@
+# Async file writes without a thread hop per chunk.
+#
+# aiofiles runs every f.write() in the event loop's thread pool, so saving a
+# 500 KB download read in 8 KB chunks costs ~60 executor round trips (plus
+# one each for open and close). AsyncFileWriter keeps the chunks in memory
+# and hands them to the executor in one call per FLUSH_BYTES; a file smaller
+# than that is opened, written and closed in a single executor call.
+#
+#   async with AsyncFileWriter(path) as f:
+#       async for chunk in response.aiter_bytes():
+#           await f.write(chunk)
+#
+# copy_file() copies file to file inside the kernel where it can:
+# os.copy_file_range (Linux, may even share blocks on CoW filesystems), then
+# os.sendfile (Linux), then a plain read/write loop. copy_file_async() runs
+# it as one executor call.
+#
+# Benchmark against aiofiles: python bench_async_file_io.py
+import asyncio
+import os
+import shutil
+from concurrent.futures import Executor
+from pathlib import Path
+
+FLUSH_BYTES = 4 * 1024 * 1024
+COPY_BLOCK = 64 * 1024 * 1024  # bytes per copy_file_range / sendfile call
+
+
+class AsyncFileWriter:
+    def __init__(
+        self,
+        path: str | Path,
+        mode: str = "wb",
+        flush_bytes: int = FLUSH_BYTES,
+        executor: Executor | None = None,
+    ):
+        if mode not in ("wb", "ab"):
+            raise ValueError(f"mode must be 'wb' or 'ab', not {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self.flush_bytes = flush_bytes
+        self.executor = executor  # None: the loop's default thread pool
+        self.bytes_written = 0
+        self.executor_calls = 0
+        self._chunks: list[bytes] = []
+        self._buffered = 0
+        self._file = None
+        self._closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # Also on errors: whatever was received so far ends up on disk
+        await self.close()
+
+    async def write(self, data: bytes) -> int:
+        if self._closed:
+            raise ValueError("write to closed AsyncFileWriter")
+        self._chunks.append(bytes(data))
+        self._buffered += len(data)
+        if self._buffered >= self.flush_bytes:
+            await self.flush()
+        return len(data)
+
+    async def flush(self):
+        await self._run(close=False)
+
+    async def close(self):
+        if not self._closed:
+            self._closed = True
+            await self._run(close=True)
+
+    async def _run(self, close: bool):
+        if not self._chunks and not close:
+            return
+        data, self._chunks, self._buffered = b"".join(self._chunks), [], 0
+        self.executor_calls += 1
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._write_blocking, data, close)
+
+    def _write_blocking(self, data: bytes, close: bool):
+        # Runs in the executor: open on first use, write, optionally close
+        if self._file is None:
+            self._file = open(self.path, self.mode)
+        try:
+            self._file.write(data)
+            self.bytes_written += len(data)
+        finally:
+            if close:
+                self._file.close()
+
+
+async def write_file(path: str | Path, data: bytes, executor: Executor | None = None) -> int:
+    """Write a whole in-memory file in one executor call."""
+    async with AsyncFileWriter(path, executor=executor) as f:
+        await f.write(data)
+    return f.bytes_written
+
+
+def copy_file(src: str | Path, dst: str | Path) -> tuple[int, str]:
+    """Copy src to dst with the fastest available call; returns (bytes, method)."""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        for method in ("copy_file_range", "sendfile"):
+            if not hasattr(os, method):
+                continue
+            try:
+                return _copy_in_kernel(getattr(os, method), fsrc.fileno(), fdst.fileno(), size), method
+            except OSError:
+                # Not supported for this pair of files (e.g. across filesystems on
+                # older kernels, or sendfile to a regular file); start over
+                fdst.seek(0)
+                fdst.truncate()
+                fsrc.seek(0)
+        shutil.copyfileobj(fsrc, fdst, COPY_BLOCK)
+        return fdst.tell(), "copyfileobj"
+
+
+def _copy_in_kernel(copy, fd_in: int, fd_out: int, size: int) -> int:
+    offset = 0
+    while offset < size:
+        if copy is os.sendfile:
+            sent = copy(fd_out, fd_in, offset, min(COPY_BLOCK, size - offset))
+        else:
+            sent = copy(fd_in, fd_out, min(COPY_BLOCK, size - offset), offset, offset)
+        if sent == 0:
+            break  # the source shrank while copying
+        offset += sent
+    return offset
+
+
+async def copy_file_async(src: str | Path, dst: str | Path, executor: Executor | None = None) -> tuple[int, str]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, copy_file, src, dst)
@@ -0,0 +1,64 @@
+# Benchmark: fixed download limits vs the adaptive (AIMD) limiter against a
+# local stand-in that throttles (429) above `capacity` concurrent requests and
+# shares a fixed bandwidth between active responses.
+# Run from this folder: python bench_adaptive_limiter.py [--capacity N] [--copies N]
+import argparse
+import asyncio
+import shutil
+import tempfile
+import time
+from http import HTTPStatus
+from pathlib import Path
+
+import httpx
+
+from adaptive_limiter import HostLimiters
+from download_manager import DownloadManager
+from image_server import serve_images
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / "img" / "raw" / "demo1"
+STRATEGIES = {
+    "fixed 4": dict(initial=4, min_limit=4, max_limit=4),
+    "fixed 15": dict(initial=15, min_limit=15, max_limit=15),
+    "adaptive": dict(initial=2, max_limit=64),
+}
+
+
+async def download_all(urls: list[str], out_dir: Path, limits: HostLimiters):
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=None)) as client:
+        manager = DownloadManager(client, out_dir / ".downloads.json", backoff_base=0.05, retries=10, limits=limits)
+        async with asyncio.TaskGroup() as tg:
+            for i, url in enumerate(urls):
+                tg.create_task(manager.fetch(url, out_dir / f"{i}_{url.rsplit('/', 1)[-1]}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixed vs adaptive download concurrency")
+    parser.add_argument("--capacity", type=int, default=10, help="server answers 429 above this many requests")
+    parser.add_argument("--bandwidth", type=float, default=40e6, help="server bandwidth in bytes/second")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--copies", type=int, default=8, help="how many times each sample image is fetched")
+    args = parser.parse_args()
+
+    rows = []
+    for name, options in STRATEGIES.items():
+        limits = HostLimiters(**options)
+        with tempfile.TemporaryDirectory() as tmp, serve_images(
+            SAMPLE_DIR, latency=args.latency, capacity=args.capacity, bandwidth=args.bandwidth,
+        ) as server:
+            urls = server.urls() * args.copies
+            start = time.perf_counter()
+            asyncio.run(download_all(urls, Path(tmp), limits))
+            elapsed = time.perf_counter() - start
+            throttled = sum(status == HTTPStatus.TOO_MANY_REQUESTS for _, _, status in server.log)
+            rows.append((name, len(urls), elapsed, throttled, server.peak_active))
+        print(f"[{name}]", end=" ")
+        limits.print_report()
+
+    print(f"\n{'strategy':<10} {'files':>6} {'seconds':>8} {'files/s':>8} {'429s':>6} {'peak':>5}")
+    for name, count, elapsed, throttled, peak in rows:
+        print(f"{name:<10} {count:>6} {elapsed:>8.2f} {count / elapsed:>8.1f} {throttled:>6} {peak:>5}")
+
+
+if __name__ == "__main__":
+    main()
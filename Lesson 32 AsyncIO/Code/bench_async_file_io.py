@@ -0,0 +1,108 @@
+# Benchmark: saving downloaded images with aiofiles (one thread hop per 8 KB
+# chunk, as code_11.py did) vs AsyncFileWriter (one hop per file or per
+# FLUSH_BYTES), for a demo-sized batch and a large one. Also times file-to-file
+# copies: aiofiles read/write vs copy_file_async's in-kernel fast path.
+# Run from this folder: python bench_async_file_io.py [--counts 12 1000] [--kb 400]
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import aiofiles
+
+from async_file_io import AsyncFileWriter, copy_file_async
+
+CHUNK = 8192  # code_11.py's aiter_bytes(chunk_size=8192)
+CONCURRENCY = 64  # files being written at once
+
+
+def chunks_of(body: bytes) -> list[bytes]:
+    return [body[i:i + CHUNK] for i in range(0, len(body), CHUNK)]
+
+
+async def save_aiofiles(path: Path, chunks: list[bytes]):
+    async with aiofiles.open(path, "wb") as f:
+        for chunk in chunks:
+            await f.write(chunk)
+
+
+async def save_writer(path: Path, chunks: list[bytes]):
+    async with AsyncFileWriter(path) as f:
+        for chunk in chunks:
+            await f.write(chunk)
+
+
+async def copy_aiofiles(src: Path, dst: Path):
+    async with aiofiles.open(src, "rb") as fsrc, aiofiles.open(dst, "wb") as fdst:
+        while chunk := await fsrc.read(64 * 1024):
+            await fdst.write(chunk)
+
+
+async def copy_fast(src: Path, dst: Path):
+    await copy_file_async(src, dst)
+
+
+async def run_all(job, count: int, make_args):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(i):
+        async with semaphore:
+            await job(*make_args(i))
+
+    await asyncio.gather(*(one(i) for i in range(count)))
+
+
+def time_job(job, count: int, make_args, runs: int) -> list[float]:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        asyncio.run(run_all(job, count, make_args))
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="aiofiles vs batched async writes and in-kernel copies")
+    parser.add_argument("--counts", type=int, nargs="+", default=[12, 1000])
+    parser.add_argument("--kb", type=int, default=400, help="size of each image")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    body = os.urandom(args.kb * 1024)
+    chunks = chunks_of(body)
+    methods = [name for name in ("copy_file_range", "sendfile") if hasattr(os, name)]
+    print(f"{args.kb} KB images in {len(chunks)} chunks of {CHUNK} bytes, {CONCURRENCY} at a time, {args.runs} runs")
+    print(f"in-kernel copy calls available: {', '.join(methods) or 'none'}\n")
+    print(f"{'images':>6} {'task':<6} {'approach':<16} {'mean s':>8} {'stdev':>7} {'MB/s':>8} {'speedup':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        src = root / "source.jpg"
+        src.write_bytes(body)
+        for count in args.counts:
+            tasks = {
+                "write": {
+                    "aiofiles": (save_aiofiles, lambda i: (root / f"w{i}.jpg", chunks)),
+                    "AsyncFileWriter": (save_writer, lambda i: (root / f"w{i}.jpg", chunks)),
+                },
+                "copy": {
+                    "aiofiles": (copy_aiofiles, lambda i: (src, root / f"c{i}.jpg")),
+                    "copy_file_async": (copy_fast, lambda i: (src, root / f"c{i}.jpg")),
+                },
+            }
+            for task, approaches in tasks.items():
+                baseline = None
+                for name, (job, make_args) in approaches.items():
+                    times = time_job(job, count, make_args, args.runs)
+                    mean = statistics.mean(times)
+                    baseline = baseline or mean
+                    stdev = statistics.stdev(times) if len(times) > 1 else 0.0
+                    mb_per_s = count * len(body) / mean / 1e6
+                    print(f"{count:>6} {task:<6} {name:<16} {mean:>8.3f} {stdev:>7.3f} {mb_per_s:>8.1f} {baseline / mean:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
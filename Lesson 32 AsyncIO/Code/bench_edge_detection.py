@@ -0,0 +1,50 @@
+# Benchmark: per-pixel Python loop vs the other edge detection backends (pillow,
+# numpy) on the sample images, plus what "auto" resolves to with and without NumPy
+# Run from this folder: python bench_edge_detection.py [image ...]
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+
+import edge_detection
+from edge_detection import available_backends, detect_edges, resolve_backend
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / "img" / "raw" / "demo1"
+
+
+def best_time(backend: str, img: Image.Image, repeat: int) -> tuple[float, bytes]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = detect_edges(img, backend=backend)
+        best = min(best, time.perf_counter() - start)
+    return best, result.tobytes()
+
+
+def main():
+    paths = [Path(p) for p in sys.argv[1:]] or sorted(SAMPLE_DIR.glob("*.jpg"))[:2]
+    print(f"{'image':<14} {'size':>10} {'backend':<8} {'seconds':>9} {'speedup':>8} {'identical':>9}")
+    for path in paths:
+        with Image.open(path) as img:
+            img.load()
+            # The reference loop takes seconds per image, so it runs once
+            reference_time, reference = best_time("python", img, repeat=1)
+            size = f"{img.width}x{img.height}"
+            print(f"{path.name:<14} {size:>10} {'python':<8} {reference_time:>9.3f} {1:>7.1f}x {'yes':>9}")
+            for backend in available_backends():
+                if backend == "python":
+                    continue
+                seconds, output = best_time(backend, img, repeat=5)
+                same = "yes" if output == reference else "NO"
+                print(f"{'':<14} {'':>10} {backend:<8} {seconds:>9.3f} {reference_time / seconds:>7.1f}x {same:>9}")
+
+    numpy = edge_detection.np
+    edge_detection.np = None
+    without_numpy = resolve_backend("auto")
+    edge_detection.np = numpy
+    print(f"\nauto -> {resolve_backend('auto')} here; {without_numpy} without NumPy")
+
+
+if __name__ == "__main__":
+    main()
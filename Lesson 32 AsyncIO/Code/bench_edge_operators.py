@@ -0,0 +1,104 @@
+# Benchmark: every edge operator, colour vs grayscale, in ms per megapixel
+# Also times Sobel as a direct 3x3 (9-tap) correlation against the two 1-D
+# passes edge_operators uses, and the neighbour difference from
+# edge_detection.py for reference. "edges" is the share of edge pixels with
+# the default thresholds.
+# Run from this folder: python bench_edge_operators.py [--repeat N] [image ...]
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import edge_operators
+from edge_detection import edge_mask_numpy
+from edge_operators import OPERATORS, X, Y, correlate1d, edge_mask
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / "img" / "raw" / "demo1"
+SOBEL_X = np.outer(edge_operators.SMOOTHING["sobel"], edge_operators.DERIVATIVE)
+
+
+def correlate3x3(pixels: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    # pixels: (height, width) or (channels, height, width)
+    padded = np.pad(pixels, [(0, 0)] * (pixels.ndim - 2) + [(1, 1), (1, 1)], mode="edge")
+    height, width = pixels.shape[-2:]
+    out = np.zeros(pixels.shape, dtype=np.float32)
+    for dy in range(3):
+        for dx in range(3):
+            if kernel[dy, dx]:
+                out += np.float32(kernel[dy, dx]) * padded[..., dy:dy + height, dx:dx + width]
+    return out
+
+
+def planes(pixels: np.ndarray) -> np.ndarray:
+    if pixels.ndim == 3:
+        pixels = np.moveaxis(pixels, 2, 0)
+    return np.ascontiguousarray(pixels, dtype=np.float32)
+
+
+def sobel_mask(magnitude: np.ndarray) -> np.ndarray:
+    return (magnitude.max(axis=0) if magnitude.ndim == 3 else magnitude) > edge_operators.DEFAULT_THRESHOLD["sobel"]
+
+
+def sobel_2d(pixels: np.ndarray) -> np.ndarray:
+    pixels = planes(pixels)
+    return sobel_mask(np.hypot(correlate3x3(pixels, SOBEL_X), correlate3x3(pixels, SOBEL_X.T)))
+
+
+def sobel_separable(pixels: np.ndarray) -> np.ndarray:
+    pixels = planes(pixels)
+    smooth, derive = edge_operators.SMOOTHING["sobel"], edge_operators.DERIVATIVE
+    gx = correlate1d(correlate1d(pixels, smooth, axis=Y), derive, axis=X)
+    gy = correlate1d(correlate1d(pixels, smooth, axis=X), derive, axis=Y)
+    return sobel_mask(np.hypot(gx, gy))
+
+
+def best_time(fn, pixels: np.ndarray, repeat: int) -> tuple[float, np.ndarray]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        mask = fn(pixels)
+        best = min(best, time.perf_counter() - start)
+    return best, mask
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Edge operator throughput")
+    parser.add_argument("images", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    paths = args.images or sorted(SAMPLE_DIR.glob("*.jpg"))[:3]
+
+    images = []
+    for path in paths:
+        with Image.open(path) as img:
+            images.append((np.asarray(img.convert("RGB")), np.asarray(img.convert("L"))))
+    megapixels = sum(rgb.shape[0] * rgb.shape[1] for rgb, _ in images) / 1e6
+    print(f"{len(images)} image(s), {megapixels:.1f} Mpixel, best of {args.repeat}\n")
+
+    cases = {f"{operator}": (lambda op: lambda pixels: edge_mask(pixels, op))(operator) for operator in OPERATORS}
+    cases["sobel 3x3 2-D"] = sobel_2d
+    cases["sobel 1-D x2"] = sobel_separable
+    print(f"{'operator':<15} {'colour ms/MP':>13} {'gray ms/MP':>11} {'gray speedup':>13} {'edges':>7}")
+    for name, fn in cases.items():
+        seconds = {"colour": 0.0, "gray": 0.0}
+        edges = 0
+        for rgb, gray in images:
+            elapsed, _ = best_time(fn, rgb, args.repeat)
+            seconds["colour"] += elapsed
+            elapsed, mask = best_time(fn, gray, args.repeat)
+            seconds["gray"] += elapsed
+            edges += np.count_nonzero(mask)
+        colour_ms, gray_ms = (1000 * seconds[k] / megapixels for k in ("colour", "gray"))
+        share = edges / (megapixels * 1e6)
+        print(f"{name:<15} {colour_ms:>13.1f} {gray_ms:>11.1f} {colour_ms / gray_ms:>12.1f}x {share:>7.1%}")
+
+    # The existing operator only takes RGB
+    seconds = sum(best_time(edge_mask_numpy, rgb, args.repeat)[0] for rgb, _ in images)
+    edges = sum(np.count_nonzero(edge_mask_numpy(rgb)) for rgb, _ in images)
+    print(f"{'neighbour':<15} {1000 * seconds / megapixels:>13.1f} {'-':>11} {'-':>13} {edges / (megapixels * 1e6):>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Benchmark: list(img.getdata()) / putdata() vs PixelBuffer (tobytes / frombuffer)
+# Measures reading the pixels, writing them back, and the whole pure Python
+# edge loop; "peak MB" is the largest Python heap growth seen by tracemalloc in
+# a second, untimed run (Pillow's own image memory is the same for both and not
+# counted).
+# Run from this folder: python bench_pixel_buffer.py [--crop WxH] [image]
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+from PIL import Image
+
+from edge_detection import THRESHOLD, detect_edges_python
+from pixel_buffer import PixelBuffer
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / "img" / "raw" / "demo1"
+
+
+def detect_edges_getdata(img: Image.Image) -> Image.Image:
+    """The edge loop as it was before PixelBuffer: one tuple per pixel in and out."""
+    data = list(img.getdata())
+    width, height = img.size
+    new_data = []
+
+    for i in range(len(data)):
+        current_r, current_g, current_b = data[i]
+
+        total_diff = 0
+        neighbor_count = 0
+
+        for dx, dy in [(1, 0), (0, 1)]:
+            x = (i % width) + dx
+            y = (i // width) + dy
+
+            if 0 <= x < width and 0 <= y < height:
+                neighbor_r, neighbor_g, neighbor_b = data[y * width + x]
+                total_diff += abs(current_r - neighbor_r) + abs(current_g - neighbor_g) + abs(current_b - neighbor_b)
+                neighbor_count += 1
+
+        if neighbor_count > 0 and total_diff // neighbor_count > THRESHOLD:
+            new_data.append((255, 255, 255))
+        else:
+            new_data.append((0, 0, 0))
+
+    edge_img = Image.new("RGB", (width, height))
+    edge_img.putdata(new_data)
+    return edge_img
+
+
+def measure(fn, *args):
+    # Timed and traced in separate runs: tracemalloc slows every allocation down
+    start = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 1e6
+
+
+def read_getdata(img):
+    return list(img.getdata())
+
+
+def write_putdata(img, pixels):
+    out = Image.new("RGB", img.size)
+    out.putdata(pixels)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="getdata/putdata vs PixelBuffer")
+    parser.add_argument("image", nargs="?", type=Path, default=sorted(SAMPLE_DIR.glob("*.jpg"))[0])
+    parser.add_argument("--crop", help="e.g. 640x480 to keep the edge loops short")
+    args = parser.parse_args()
+
+    with Image.open(args.image) as img:
+        img = img.convert("RGB")
+    if args.crop:
+        width, height = map(int, args.crop.split("x"))
+        img = img.crop((0, 0, width, height))
+    print(f"{args.image.name}: {img.width}x{img.height}, {img.width * img.height / 1e6:.1f} Mpixel\n")
+
+    rows = []
+    tuples, *stats = measure(read_getdata, img)
+    rows.append(("read", "getdata", *stats))
+    buffer, *stats = measure(PixelBuffer.from_image, img)
+    rows.append(("read", "buffer", *stats))
+    _, *stats = measure(write_putdata, img, tuples)
+    rows.append(("write", "putdata", *stats))
+    _, *stats = measure(buffer.to_image)
+    rows.append(("write", "frombuffer", *stats))
+    del tuples, buffer
+
+    old, *stats = measure(detect_edges_getdata, img)
+    rows.append(("edge loop", "getdata", *stats))
+    new, *stats = measure(detect_edges_python, img)
+    rows.append(("edge loop", "buffer", *stats))
+
+    print(f"{'step':<10} {'method':<11} {'seconds':>9} {'peak MB':>9}")
+    for step, method, seconds, peak in rows:
+        print(f"{step:<10} {method:<11} {seconds:>9.3f} {peak:>9.1f}")
+    print(f"\nedge outputs identical: {'yes' if old.tobytes() == new.tobytes() else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
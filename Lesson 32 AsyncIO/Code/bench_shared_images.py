@@ -0,0 +1,108 @@
+# Benchmark: three ways to hand images to process-pool workers for edge detection
+#   path   - send the file path; every worker decodes the JPEG itself
+#   pickle - send the decoded pixels; arrays are pickled to the worker and back
+#   shm    - decode once into shared memory; only small descriptors are pickled
+# Every mode returns the same 0/255 edge mask to the parent. Each row is timed end
+# to end from the file paths, so the parent-side decode of pickle and shm counts;
+# "pickled" (the size of what crossed the pipes) is measured after the clock stops.
+# Run from this folder: python bench_shared_images.py [--workers N] [--repeat N] [image ...]
+import argparse
+import os
+import pickle
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from edge_detection import edge_mask_numpy
+from shared_images import SharedArena, edge_mask_shared, shared_executor
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / "img" / "raw" / "demo1"
+
+
+def decode(path: Path) -> np.ndarray:
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+def edges_from_path(path: Path) -> np.ndarray:
+    return edge_mask_numpy(decode(path)).view(np.uint8) * 255
+
+
+def edges_from_array(pixels: np.ndarray) -> np.ndarray:
+    return edge_mask_numpy(pixels).view(np.uint8) * 255
+
+
+# Each run returns the edge masks and the (sent, returned) objects per image
+def run_path(executor, paths):
+    futures = [executor.submit(edges_from_path, path) for path in paths]
+    results = [future.result() for future in futures]
+    return results, list(zip(paths, results))
+
+
+def run_pickle(executor, paths):
+    futures = []
+    arrays = []
+    for path in paths:
+        arrays.append(decode(path))
+        futures.append(executor.submit(edges_from_array, arrays[-1]))  # earlier images are already being processed
+    results = [future.result() for future in futures]
+    return results, list(zip(arrays, results))
+
+
+def run_shm(executor, paths):
+    with SharedArena() as arena:
+        futures = []
+        pairs = []
+        for path in paths:
+            src = arena.put_file(path)  # decoded straight into shared memory
+            pairs.append((src, arena.empty(src.shape[:2])))
+            futures.append(executor.submit(edge_mask_shared, *pairs[-1]))
+        refs = [future.result() for future in futures]
+        # Copy out only so the arena can be closed; a real pipeline keeps using the views
+        results = [arena.view(ref).copy() for ref in refs]
+    return results, list(zip(pairs, refs))
+
+
+def pickled_size(messages) -> int:
+    return sum(len(pickle.dumps(sent)) + len(pickle.dumps(returned)) for sent, returned in messages)
+
+
+MODES = {"path": run_path, "pickle": run_pickle, "shm": run_shm}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare path, pickle and shared-memory handoff to workers")
+    parser.add_argument("images", nargs="*", type=Path)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = args.images or sorted(SAMPLE_DIR.glob("*.jpg"))
+    start = time.perf_counter()
+    sizes = [decode(path).shape for path in paths]
+    decode_time = time.perf_counter() - start
+    megapixels = sum(height * width for height, width, _ in sizes) / 1e6
+    print(f"{len(paths)} images, {megapixels:.1f} MP, {args.workers} workers "
+          f"(decoding all images in one process: {decode_time:.3f} s)\n")
+
+    reference = None
+    print(f"{'mode':<7} {'best s':>8} {'pickled':>12} {'identical':>9}")
+    with shared_executor(args.workers) as executor:
+        list(executor.map(abs, range(args.workers)))  # start the workers before timing
+        for name, run in MODES.items():
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results, messages = run(executor, paths)
+                best = min(best, time.perf_counter() - start)
+            moved = pickled_size(messages)
+            if reference is None:
+                reference = results
+            same = all(np.array_equal(a, b) for a, b in zip(reference, results))
+            print(f"{name:<7} {best:>8.3f} {moved / 1e6:>9.2f} MB {'yes' if same else 'NO':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# Benchmark harness: one download + edge-detect workload run by every
+# concurrency strategy from Lessons 30-32, against a generated image corpus
+# served by the local stand-in server (no hard-coded Windows paths, no live
+# Unsplash URLs, so numbers are repeatable).
+#
+#   sequential    download and process one image after another (Lesson 30 code_9)
+#   threaded      thread pool doing download + process per image (Lesson 30 code_10)
+#   multiprocess  process pool doing download + process per image (Lesson 31 code_4)
+#   asyncio       async downloads, then a process pool for the CPU work (code_11/12)
+#   pipeline      async downloads overlapped with processing (code_13)
+#
+# Run from this folder:
+#   python bench_strategies.py --images 24 --size 1280x720 --latency 0.1 --runs 5 --warmup 1
+#   python bench_strategies.py --strategies sequential asyncio --json results.json
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+from PIL import Image, ImageDraw, ImageFilter
+
+import code_13
+from image_pipeline import EdgeDetect, Pipeline
+from image_server import serve_images
+
+PIPELINE = Pipeline([EdgeDetect()])
+
+
+def generate_corpus(directory: Path, count: int, size: tuple[int, int], seed: int = 0) -> list[Path]:
+    """Photo-like JPEGs: noise, shapes and a blur, so edge detection has real work to do."""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        img = Image.effect_noise(size, 40 + 10 * (i % 5)).convert("RGB")
+        draw = ImageDraw.Draw(img)
+        for _ in range(30):
+            x, y = rng.randrange(size[0]), rng.randrange(size[1])
+            w, h = rng.randrange(20, size[0] // 3), rng.randrange(20, size[1] // 3)
+            colour = tuple(rng.randrange(256) for _ in range(3))
+            (draw.rectangle if rng.random() < 0.5 else draw.ellipse)((x, y, x + w, y + h), fill=colour)
+        path = directory / f"image_{i:04d}.jpg"
+        img.filter(ImageFilter.GaussianBlur(1)).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+# -- shared per-image work ---------------------------------------------------
+
+
+def _save_download(content: bytes, url: str, original_dir: Path) -> Path:
+    path = original_dir / url.rsplit("/", 1)[-1]
+    path.write_bytes(content)
+    return path
+
+
+def _process(path: Path, processed_dir: Path) -> Path:
+    return PIPELINE.process_file(path, processed_dir / path.name)[0]
+
+
+def _download_and_process(url: str, original_dir: Path, processed_dir: Path, client: httpx.Client | None = None) -> Path:
+    response = (client or httpx).get(url, timeout=30)
+    response.raise_for_status()
+    return _process(_save_download(response.content, url, original_dir), processed_dir)
+
+
+# -- strategies ---------------------------------------------------------------
+
+
+def run_sequential(urls, original_dir, processed_dir, workers):
+    with httpx.Client() as client:
+        return [_download_and_process(url, original_dir, processed_dir, client) for url in urls]
+
+
+def run_threaded(urls, original_dir, processed_dir, workers):
+    with httpx.Client(limits=httpx.Limits(max_connections=workers)) as client:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda url: _download_and_process(url, original_dir, processed_dir, client), urls))
+
+
+def run_multiprocess(urls, original_dir, processed_dir, workers):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        n = len(urls)
+        return list(executor.map(_download_and_process, urls, [original_dir] * n, [processed_dir] * n))
+
+
+def run_asyncio(urls, original_dir, processed_dir, workers):
+    async def main():
+        semaphore = asyncio.Semaphore(workers)
+
+        async def download(client, url):
+            async with semaphore:
+                response = await client.get(url, timeout=30)
+                response.raise_for_status()
+                return _save_download(response.content, url, original_dir)
+
+        async with httpx.AsyncClient() as client:
+            paths = await asyncio.gather(*(download(client, url) for url in urls))
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return await asyncio.gather(*(loop.run_in_executor(executor, _process, p, processed_dir) for p in paths))
+
+    return asyncio.run(main())
+
+
+def run_pipeline(urls, original_dir, processed_dir, workers):
+    results, _ = asyncio.run(code_13.run_pipeline(urls, original_dir, processed_dir, workers=workers))
+    return results
+
+
+STRATEGIES = {
+    "sequential": run_sequential,
+    "threaded": run_threaded,
+    "multiprocess": run_multiprocess,
+    "asyncio": run_asyncio,
+    "pipeline": run_pipeline,
+}
+
+
+# -- measurement ----------------------------------------------------------------
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silence the demos' per-image prints, including those from worker processes."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            with contextlib.redirect_stdout(devnull):
+                yield
+        finally:
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def _cpu_seconds() -> float:
+    # Includes finished child processes (the pools are shut down inside each run).
+    # Windows reports no child times, so multiprocess CPU use is undercounted there.
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def measure(strategy: str, urls: list[str], workers: int, runs: int, warmup: int) -> dict:
+    run = STRATEGIES[strategy]
+    walls, cpus = [], []
+    for i in range(warmup + runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            original_dir, processed_dir = Path(tmp) / "original", Path(tmp) / "processed"
+            original_dir.mkdir()
+            processed_dir.mkdir()
+            with _quiet():
+                cpu_start, start = _cpu_seconds(), time.perf_counter()
+                outputs = run(urls, original_dir, processed_dir, workers)
+                wall, cpu = time.perf_counter() - start, _cpu_seconds() - cpu_start
+            if len(outputs) != len(urls):
+                raise RuntimeError(f"{strategy} produced {len(outputs)} of {len(urls)} images")
+        if i >= warmup:
+            walls.append(wall)
+            cpus.append(cpu)
+    mean = statistics.mean(walls)
+    return {
+        "strategy": strategy,
+        "runs": walls,
+        "mean": mean,
+        "stdev": statistics.stdev(walls) if len(walls) > 1 else 0.0,
+        "min": min(walls),
+        "images_per_second": len(urls) / mean,
+        "cpu_seconds": statistics.mean(cpus),
+        # share of the machine's cores kept busy: 100% = every core for the whole run
+        "cpu_utilisation": statistics.mean(c / (w * os.cpu_count()) for c, w in zip(cpus, walls)),
+    }
+
+
+def print_table(results: list[dict]):
+    print(f"\n{'strategy':<13} {'mean s':>8} {'stdev':>7} {'min s':>7} {'img/s':>7} {'speedup':>8} {'cpu s':>7} {'cpu util':>9}")
+    for r in results:
+        print(
+            f"{r['strategy']:<13} {r['mean']:>8.3f} {r['stdev']:>7.3f} {r['min']:>7.3f} {r['images_per_second']:>7.1f} "
+            f"{r['speedup']:>7.2f}x {r['cpu_seconds']:>7.2f} {r['cpu_utilisation']:>9.1%}",
+        )
+
+
+def parse_size(text: str) -> tuple[int, int]:
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare concurrency strategies on one local image workload")
+    parser.add_argument("--strategies", nargs="+", choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument("--images", type=int, default=24)
+    parser.add_argument("--size", type=parse_size, default=(1280, 720), help="WIDTHxHEIGHT of generated images")
+    parser.add_argument("--latency", type=float, default=0.1, help="per-request latency of the local server")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        generate_corpus(Path(corpus_dir), args.images, args.size)
+        with serve_images(Path(corpus_dir), latency=args.latency) as server:
+            urls = server.urls()
+            print(
+                f"{len(urls)} images of {args.size[0]}x{args.size[1]}, {args.latency * 1000:.0f} ms latency, "
+                f"{args.workers} workers, {args.runs} runs + {args.warmup} warmup, {os.cpu_count()} CPUs",
+            )
+            results = []
+            for strategy in args.strategies:
+                print(f"  running {strategy}...", file=sys.stderr)
+                results.append(measure(strategy, urls, args.workers, args.runs, args.warmup))
+
+    baseline = next((r["mean"] for r in results if r["strategy"] == "sequential"), results[0]["mean"])
+    for r in results:
+        r["speedup"] = baseline / r["mean"]
+    print_table(results)
+
+    if args.json:
+        report = {
+            "config": {
+                "images": args.images,
+                "size": list(args.size),
+                "latency": args.latency,
+                "workers": args.workers,
+                "runs": args.runs,
+                "warmup": args.warmup,
+                "cpu_count": os.cpu_count(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+            },
+            "results": results,
+        }
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Benchmark: a fresh ProcessPoolExecutor per run (what the demos used to do)
+# vs one long-lived, pre-warmed WorkerPool reused by every run.
+# Run from this folder: python bench_worker_pool.py [--workers N] [--runs N]
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from image_pipeline import EdgeDetect, Pipeline, run_batch
+from worker_pool import WorkerPool
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / "img" / "raw" / "demo1"
+PIPELINE = Pipeline([EdgeDetect()])
+BATCHES = {"small": 2, "large": 12}
+
+
+def time_runs(make_run, runs: int) -> list[float]:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        make_run()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fresh pool per run vs a persistent warm pool")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = sorted(SAMPLE_DIR.glob("*.jpg"))
+    with tempfile.TemporaryDirectory() as out_dir:
+        start = time.perf_counter()
+        pool = WorkerPool(args.workers).start()
+        startup = time.perf_counter() - start
+        print(f"{args.workers} workers, {args.runs} runs per batch; warm pool start-up (paid once): {startup:.3f} s\n")
+        print(f"{'batch':<6} {'images':>6} {'approach':<12} {'first s':>8} {'mean s':>8} {'stdev':>7} {'speedup':>8}")
+        with pool:
+            for batch, count in BATCHES.items():
+                batch_paths = paths[:count]
+
+                def fresh():
+                    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+                        run_batch(PIPELINE, batch_paths, out_dir, executor=executor)
+
+                def warm():
+                    run_batch(PIPELINE, batch_paths, out_dir, executor=pool)
+
+                fresh_times = time_runs(fresh, args.runs)
+                warm_times = time_runs(warm, args.runs)
+                baseline = statistics.mean(fresh_times)
+                for name, times in (("fresh pool", fresh_times), ("warm pool", warm_times)):
+                    mean = statistics.mean(times)
+                    stdev = statistics.stdev(times) if len(times) > 1 else 0.0
+                    print(f"{batch:<6} {count:>6} {name:<12} {times[0]:>8.3f} {mean:>8.3f} {stdev:>7.3f} {baseline / mean:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
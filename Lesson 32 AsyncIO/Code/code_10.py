@@ -6,6 +6,8 @@ import asyncio
 import requests
 from PIL import Image
 
+from edge_detection import detect_edges
+
 IMAGE_URLS = [
     "https://images.unsplash.com/photo-1516117172878-fd2c41f4a759?w=1920&h=1080&fit=crop",
     "https://images.unsplash.com/photo-1532009324734-20a7a5813719?w=1920&h=1080&fit=crop",
@@ -24,6 +26,7 @@ IMAGE_URLS = [
 
 ORIGINAL_DIR = Path(r"D:\Desktop\Python_Programs\Lesson 32 AsyncIO\img\raw\demo1")
 PROCESSED_DIR = Path(r"D:\Desktop\Python_Programs\Lesson 32 AsyncIO\img\processed\demo1")
+EDGE_BACKEND = "auto"  # "numpy" (vectorized) when installed, else "pillow" (ImageChops); "python" is the per-pixel loop
 
 
 async def download_single_image(url: str, img_num: int) -> Path:
@@ -76,41 +79,7 @@ def _process_single_image(orig_path: Path) -> Path:
     save_path = PROCESSED_DIR / orig_path.name
 
     with Image.open(orig_path) as img:
-        data = list(img.getdata())
-        width, height = img.size
-        new_data = []
-
-        for i in range(len(data)):
-            current_r, current_g, current_b = data[i]
-
-            total_diff = 0
-            neighbor_count = 0
-
-            for dx, dy in [(1, 0), (0, 1)]:
-                x = (i % width) + dx
-                y = (i // width) + dy
-
-                if 0 <= x < width and 0 <= y < height:
-                    neighbor_r, neighbor_g, neighbor_b = data[y * width + x]
-                    diff = (
-                        abs(current_r - neighbor_r)
-                        + abs(current_g - neighbor_g)
-                        + abs(current_b - neighbor_b)
-                    )
-                    total_diff += diff
-                    neighbor_count += 1
-
-            if neighbor_count > 0:
-                edge_strength = total_diff // neighbor_count
-                if edge_strength > 30:
-                    new_data.append((255, 255, 255))
-                else:
-                    new_data.append((0, 0, 0))
-            else:
-                new_data.append((0, 0, 0))
-
-        edge_img = Image.new("RGB", (width, height))
-        edge_img.putdata(new_data)
+        edge_img = detect_edges(img, backend=EDGE_BACKEND)
         edge_img.save(save_path)
 
     print(f"Processed {orig_path} and saved to {save_path}")
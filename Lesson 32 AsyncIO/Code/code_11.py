@@ -1,13 +1,15 @@
 # Further modification running io bound code using thread and cpu bound code using process pool
 import asyncio
 import time
-from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-import aiofiles
 import httpx
 from PIL import Image
 
+from async_file_io import AsyncFileWriter
+from edge_detection import detect_edges
+from worker_pool import get_pool
+
 IMAGE_URLS = [
     "https://images.unsplash.com/photo-1516117172878-fd2c41f4a759?w=1920&h=1080&fit=crop",
     "https://images.unsplash.com/photo-1532009324734-20a7a5813719?w=1920&h=1080&fit=crop",
@@ -26,6 +28,10 @@ IMAGE_URLS = [
 
 ORIGINAL_DIR = Path("original_images")
 PROCESSED_DIR = Path("processed_images")
+EDGE_BACKEND = "auto"  # "numpy" (vectorized) when installed, else "pillow" (ImageChops); "python" is the per-pixel loop
+# "path": workers open and decode each file. "shm": this process decodes each file once into shared
+# memory and workers only attach to it (shared_images.py, needs NumPy; ignores EDGE_BACKEND)
+HANDOFF = "path"
 
 
 async def download_single_image(
@@ -43,7 +49,8 @@ async def download_single_image(
     filename = f"image_{img_num}.jpg"
     download_path = ORIGINAL_DIR / filename
 
-    async with aiofiles.open(download_path, "wb") as f:
+    # One executor call per file instead of one per 8 KB chunk (see async_file_io.py)
+    async with AsyncFileWriter(download_path) as f:
         async for chunk in response.aiter_bytes(chunk_size=8192):
             await f.write(chunk)
 
@@ -68,57 +75,43 @@ def process_single_image(orig_path: Path) -> Path:
     save_path = PROCESSED_DIR / orig_path.name
 
     with Image.open(orig_path) as img:
-        data = list(img.getdata())
-        width, height = img.size
-        new_data = []
-
-        for i in range(len(data)):
-            current_r, current_g, current_b = data[i]
-
-            total_diff = 0
-            neighbor_count = 0
-
-            for dx, dy in [(1, 0), (0, 1)]:
-                x = (i % width) + dx
-                y = (i // width) + dy
-
-                if 0 <= x < width and 0 <= y < height:
-                    neighbor_r, neighbor_g, neighbor_b = data[y * width + x]
-                    diff = (
-                        abs(current_r - neighbor_r)
-                        + abs(current_g - neighbor_g)
-                        + abs(current_b - neighbor_b)
-                    )
-                    total_diff += diff
-                    neighbor_count += 1
-
-            if neighbor_count > 0:
-                edge_strength = total_diff // neighbor_count
-                if edge_strength > 30:
-                    new_data.append((255, 255, 255))
-                else:
-                    new_data.append((0, 0, 0))
-            else:
-                new_data.append((0, 0, 0))
-
-        edge_img = Image.new("RGB", (width, height))
-        edge_img.putdata(new_data)
+        edge_img = detect_edges(img, backend=EDGE_BACKEND)
         edge_img.save(save_path)
 
     print(f"Processed {orig_path} and saved to {save_path}")
     return save_path
 
 
+async def process_images_shared(orig_paths: list[Path]) -> list[Path]:
+    from shared_images import SharedArena, process_file_shared
+
+    # The arena starts the resource tracker, so create it before the pool's workers
+    with SharedArena() as arena:
+        executor = get_pool()
+        results = await asyncio.gather(*(
+            process_file_shared(arena, executor, orig_path, PROCESSED_DIR / orig_path.name)
+            for orig_path in orig_paths
+        ))
+
+    for orig_path, (save_path, _) in zip(orig_paths, results):
+        print(f"Processed {orig_path} and saved to {save_path}")
+    return [save_path for save_path, _ in results]
+
+
 async def process_images(orig_paths: list[Path]) -> list[Path]:
+    if HANDOFF == "shm":
+        return await process_images_shared(orig_paths)
+
     loop = asyncio.get_running_loop()
 
-    with ProcessPoolExecutor() as executor:
-        tasks = [
-            loop.run_in_executor(executor, process_single_image, orig_path)
-            for orig_path in orig_paths
-        ]
+    # Long-lived, pre-warmed workers: later runs skip process start-up and imports
+    executor = get_pool()
+    tasks = [
+        loop.run_in_executor(executor, process_single_image, orig_path)
+        for orig_path in orig_paths
+    ]
 
-        processed_paths = await asyncio.gather(*tasks)
+    processed_paths = await asyncio.gather(*tasks)
 
     return processed_paths
 
@@ -1,15 +1,38 @@
-# Using semaphoeres to limit the number of concurrent threads
+# Limiting the number of concurrent downloads; the limit now adapts per host (adaptive_limiter.py)
+# Run again to reuse cached outputs for unchanged images; --force reprocesses everything
+# Each image is downloaded and processed on its own (pipeline_controller.py): a bad URL
+# fails only that image, Ctrl-C finishes the images in flight, and the next run picks
+# up where this one stopped (--retry-failed runs only the images that failed)
+# Every result is recorded in a SQLite index (result_index.py); unchanged images are
+# found there without hashing them again. Query it from the same folder with:
+#   python result_index.py stats
+# --operator picks Sobel, Scharr, Laplacian or Canny (edge_operators.py) instead of
+# the neighbour difference, e.g. --operator canny --low 5 --high 10 --grayscale
+# --handoff shm decodes each image once here and passes it to the workers through
+# shared memory (shared_images.py) instead of having every worker open the file
+import argparse
 import asyncio
 import os
 import time
-from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import aiofiles
 import httpx
-from PIL import Image
 
-DOWNLOAD_LIMIT = 4
+from adaptive_limiter import HostLimiters
+from download_manager import DownloadManager
+from edge_detection import detect_edges_tiled
+from image_cache import DEFAULT_CACHE_DIR, ImageCache
+from image_pipeline import EDGE_OPERATORS, EDGE_PARAMETERS, EdgeDetect, Pipeline, edge_stage
+from pipeline_controller import PipelineController, ProgressDisplay
+from result_index import DEFAULT_INDEX_PATH, ResultIndex, make_record
+from worker_pool import get_pool
+
+if TYPE_CHECKING:
+    from shared_images import SharedArena  # needs NumPy, so only imported for --handoff shm
+
+# Downloads per host start at 4 and adapt (AIMD) to throughput and 429/5xx responses
+DOWNLOAD_LIMITS = {"initial": 4, "max_limit": 32}
 CPU_WORKERS = os.cpu_count()
 
 
@@ -31,137 +54,169 @@ IMAGE_URLS = [
 
 ORIGINAL_DIR = Path("original_images")
 PROCESSED_DIR = Path("processed_images")
+DOWNLOAD_STATE = ORIGINAL_DIR / ".downloads.json"  # ETag / Last-Modified per URL
+RESUME_FILE = PROCESSED_DIR / ".run.json"  # which URLs finished or failed last time
+# Source URL, hash, sizes and timings of every result; the path result_index.py queries by default
+INDEX_PATH = DEFAULT_INDEX_PATH
+EDGE_BACKEND = "auto"  # "numpy" (vectorized) when installed, else "pillow" (ImageChops); "python" is the per-pixel loop
+EDGE_STRIP_HEIGHT = None  # e.g. 256 to process each image in strips with bounded memory (neighbour only)
+PIPELINE = Pipeline([EdgeDetect(backend=EDGE_BACKEND)])  # the default; --operator builds another
+CACHE_DIR = DEFAULT_CACHE_DIR
 
 
 async def download_single_image(
-    client: httpx.AsyncClient,
+    manager: DownloadManager,
     url: str,
     img_num: int,
-    semaphore: asyncio.Semaphore,
 ) -> Path:
-    async with semaphore:
-        print(f"Downloading {url}...")
-        ts = int(time.time())
-        url = f"{url}?ts={ts}"  # Add timestamp to avoid caching issues
-
-        response = await client.get(url, timeout=10, follow_redirects=True)
-        response.raise_for_status()
-
-        filename = f"image_{img_num}.jpg"
-        download_path = ORIGINAL_DIR / filename
+    # Conditional + resumable: unchanged images come back as 304, broken transfers resume.
+    # The manager's adaptive limiter decides how many requests run at once.
+    filename = f"image_{img_num}.jpg"
+    # Progress is reported by the controller's events instead of a print per image
+    result = await manager.fetch(url, ORIGINAL_DIR / filename)
+    return result.path
 
-        async with aiofiles.open(download_path, "wb") as f:
-            async for chunk in response.aiter_bytes(chunk_size=8192):
-                await f.write(chunk)
 
-        print(f"Downloaded and saved to: {download_path}")
-
-        return download_path
-
-
-async def download_images(urls: list) -> list[Path]:
-    dl_semaphore = asyncio.Semaphore(DOWNLOAD_LIMIT)
-    async with httpx.AsyncClient() as client:
-        async with asyncio.TaskGroup() as tg:
-            tasks = [
-                tg.create_task(
-                    download_single_image(client, url, img_num, dl_semaphore)
-                )
-                for img_num, url in enumerate(urls, start=1)
-            ]
+def process_single_image(orig_path: Path, pipeline: Pipeline = PIPELINE) -> tuple[Path, dict[str, float]]:
+    save_path = PROCESSED_DIR / orig_path.name
 
-        img_paths = [task.result() for task in tasks]
+    if EDGE_STRIP_HEIGHT and pipeline.fingerprint() == PIPELINE.fingerprint():
+        start = time.perf_counter()
+        detect_edges_tiled(orig_path, save_path, EDGE_STRIP_HEIGHT, backend=EDGE_BACKEND)
+        timings = {"tiled": time.perf_counter() - start}
+    else:
+        _, timings = pipeline.process_file(orig_path, save_path)
 
-    return img_paths
+    return save_path, timings
 
 
-def process_single_image(orig_path: Path) -> Path:
+async def process_cached(
+    url: str,
+    orig_path: Path,
+    cache: ImageCache,
+    index: ResultIndex,
+    pipeline: Pipeline,
+    fingerprint: str,
+    force: bool,
+    arena: "SharedArena | None" = None,
+) -> Path:
+    # Images whose bytes and pipeline settings were seen before are linked from the cache.
+    # The index knows the hash of files unchanged since the last run, so they are not read again.
+    start = time.perf_counter()
     save_path = PROCESSED_DIR / orig_path.name
-
-    with Image.open(orig_path) as img:
-        data = list(img.getdata())
-        width, height = img.size
-        new_data = []
-
-        for i in range(len(data)):
-            current_r, current_g, current_b = data[i]
-
-            total_diff = 0
-            neighbor_count = 0
-
-            for dx, dy in [(1, 0), (0, 1)]:
-                x = (i % width) + dx
-                y = (i // width) + dy
-
-                if 0 <= x < width and 0 <= y < height:
-                    neighbor_r, neighbor_g, neighbor_b = data[y * width + x]
-                    diff = (
-                        abs(current_r - neighbor_r)
-                        + abs(current_g - neighbor_g)
-                        + abs(current_b - neighbor_b)
-                    )
-                    total_diff += diff
-                    neighbor_count += 1
-
-            if neighbor_count > 0:
-                edge_strength = total_diff // neighbor_count
-                if edge_strength > 30:
-                    new_data.append((255, 255, 255))
-                else:
-                    new_data.append((0, 0, 0))
-            else:
-                new_data.append((0, 0, 0))
-
-        edge_img = Image.new("RGB", (width, height))
-        edge_img.putdata(new_data)
-        edge_img.save(save_path)
-
-    print(f"Processed {orig_path} and saved to {save_path}")
+    config = repr(pipeline)
+    known = index.known(orig_path, fingerprint)
+    source_hash, key = (known.source_hash, known.cache_key) if known else cache.hashes_for(orig_path, fingerprint)
+    if cache.fetch(key, save_path, force=force):
+        if not known:
+            timings = {"cache": time.perf_counter() - start}
+            index.add(make_record(url, orig_path, source_hash, key, fingerprint, config, save_path, timings, True))
+        return save_path
+
+    # Long-lived, pre-warmed workers: later runs skip process start-up and imports
+    if arena is not None:
+        from shared_images import process_file_shared
+
+        # --handoff shm: same output as the default pipeline, decoded here once
+        save_path, timings = await process_file_shared(arena, get_pool(CPU_WORKERS), orig_path, save_path)
+    else:
+        loop = asyncio.get_running_loop()
+        save_path, timings = await loop.run_in_executor(
+            get_pool(CPU_WORKERS), process_single_image, orig_path, pipeline,
+        )
+    cache.store(key, save_path)
+    index.add(make_record(url, orig_path, source_hash, key, fingerprint, config, save_path, timings))
     return save_path
 
 
-async def process_images(orig_paths: list[Path]) -> list[Path]:
-    loop = asyncio.get_running_loop()
-
-    with ProcessPoolExecutor(max_workers=CPU_WORKERS) as executor:
-        tasks = [
-            loop.run_in_executor(executor, process_single_image, orig_path)
-            for orig_path in orig_paths
-        ]
-
-        processed_paths = await asyncio.gather(*tasks)
-
-    return processed_paths
-
-
 async def main():
+    parser = argparse.ArgumentParser(description="Download and edge-detect the demo images")
+    parser.add_argument("--force", action="store_true", help="ignore cached outputs and reprocess every image")
+    parser.add_argument("--retry-failed", action="store_true", help="only retry the images that failed last run")
+    parser.add_argument("--operator", choices=EDGE_OPERATORS, default="neighbour", help="edge detection operator")
+    parser.add_argument("--threshold", type=float, help="Sobel/Scharr/Laplacian cut-off")
+    parser.add_argument("--low", type=float, help="Canny weak-edge threshold")
+    parser.add_argument("--high", type=float, help="Canny strong-edge threshold")
+    parser.add_argument("--grayscale", action="store_true", help="detect edges on grayscale (a third of the work)")
+    parser.add_argument(
+        "--handoff", choices=["path", "shm"], default="path",
+        help="how workers get the pixels: open the file, or attach to shared memory (neighbour only, needs NumPy)",
+    )
+    args = parser.parse_args()
+    # Flags the operator would ignore are errors, not silently dropped settings
+    given = {"threshold": args.threshold, "low": args.low, "high": args.high}
+    ignored = [f"--{k}" for k, v in given.items() if v is not None and k not in EDGE_PARAMETERS[args.operator]]
+    if args.grayscale and args.operator == "neighbour":
+        ignored.append("--grayscale")
+    if ignored:
+        parser.error(f"{', '.join(ignored)} not used by --operator {args.operator}")
+    if args.handoff == "shm" and (args.operator != "neighbour" or EDGE_STRIP_HEIGHT):
+        parser.error("--handoff shm only runs the default neighbour operator without EDGE_STRIP_HEIGHT")
+
+    try:
+        pipeline = Pipeline([
+            edge_stage(
+                args.operator, backend=EDGE_BACKEND, grayscale=args.grayscale,
+                threshold=args.threshold, low=args.low, high=args.high,
+            ),
+        ])
+    except ValueError as e:  # e.g. --low above --high
+        parser.error(str(e))
+
     ORIGINAL_DIR.mkdir(parents=True, exist_ok=True)
     PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
-
-    start_time = time.perf_counter()
-
-    img_paths = await download_images(IMAGE_URLS)
-
-    proc_start_time = time.perf_counter()
-
-    processed_paths = await process_images(img_paths)
-
-    finished_time = time.perf_counter()
-
-    dl_total_time = proc_start_time - start_time
-    proc_total_time = finished_time - proc_start_time
-    total_time = finished_time - start_time
-
-    print(
-        f"\nDownloaded {len(img_paths)} images in: {dl_total_time:.2f} seconds. {(dl_total_time / total_time) * 100:.2f}% of total time",
-    )
-    print(
-        f"Processed {len(processed_paths)} images in: {proc_total_time:.2f} seconds. {(proc_total_time / total_time) * 100:.2f}% of total time",
-    )
+    fingerprint = pipeline.fingerprint()
+    # Progress is per pipeline: switching operators must not skip images done with another one
+    resume_file = RESUME_FILE
+    if fingerprint != PIPELINE.fingerprint():
+        resume_file = RESUME_FILE.with_suffix(f".{fingerprint[:12]}.json")
+    if args.force:
+        resume_file.unlink(missing_ok=True)
+
+    limits = HostLimiters(**DOWNLOAD_LIMITS)
+    cache = ImageCache(CACHE_DIR)
+    display = ProgressDisplay()
+    index = ResultIndex(INDEX_PATH)
+    arena = None
+    if args.handoff == "shm":
+        from shared_images import SharedArena
+
+        # Created before get_pool() starts the workers, so they share its resource tracker
+        arena = SharedArena()
+    urls: dict[Path, str] = {}  # downloaded file -> URL, for the index
+
+    async def download(url: str, img_num: int) -> Path:
+        path = await download_single_image(manager, url, img_num)
+        urls[path] = url
+        return path
+
+    # No pool cap in httpx: the adaptive limiter is the only thing limiting concurrency
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=None)) as client:
+        manager = DownloadManager(client, DOWNLOAD_STATE, limits=limits)
+        controller = PipelineController(
+            download,
+            lambda path: process_cached(urls[path], path, cache, index, pipeline, fingerprint, args.force, arena),
+            resume_file,
+            listeners=[display],
+        )
+        summary = await controller.run(IMAGE_URLS, retry_failed=args.retry_failed)
+    display.close()
+    if arena is not None:
+        arena.close()
+    cache.save()
+    index.close()
+
+    limits.print_report()
+    cache.print_report()
     print(
-        f"\nTotal execution time: {total_time:.2f} seconds. {(total_time / total_time) * 100:.2f}% of total time",
+        f"\nProcessed {len(summary.done)} images in {summary.seconds:.2f} seconds "
+        f"({len(summary.skipped)} skipped, {len(summary.failed)} failed, {len(summary.not_started)} not started)",
     )
+    for url, error in summary.failed.items():
+        print(f"  failed: {url}: {error}")
+    if summary.failed or summary.interrupted:
+        print(f"Run again to resume; {resume_file} records what is finished")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,206 @@
+# Overlapping downloads and processing with a producer/consumer pipeline.
+# Waiting for every download before processing starts leaves the CPU workers
+# idle during the download phase and the network idle during processing.
+# Here each finished download goes onto a bounded asyncio.Queue and is handed
+# to the process pool straight away. When every worker is busy and the queue
+# is full, downloads wait (backpressure).
+#
+#   python code_13.py                      # live Unsplash URLs
+#   python code_13.py --local --latency 0.5   # local stand-in server
+import argparse
+import asyncio
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import httpx
+
+from async_file_io import AsyncFileWriter
+from image_pipeline import EdgeDetect, Pipeline
+from image_server import serve_images
+
+DOWNLOAD_LIMIT = 4
+CPU_WORKERS = os.cpu_count()
+QUEUE_SIZE = CPU_WORKERS  # downloaded images allowed to wait for a free worker
+
+
+IMAGE_URLS = [
+    "https://images.unsplash.com/photo-1516117172878-fd2c41f4a759?w=1920&h=1080&fit=crop",
+    "https://images.unsplash.com/photo-1532009324734-20a7a5813719?w=1920&h=1080&fit=crop",
+    "https://images.unsplash.com/photo-1524429656589-6633a470097c?w=1920&h=1080&fit=crop",
+    "https://images.unsplash.com/photo-1530224264768-7ff8c1789d79?w=1920&h=1080&fit=crop",
+    "https://images.unsplash.com/photo-1564135624576-c5c88640f235?w=1920&h=1080&fit=crop",
+    "https://images.unsplash.com/photo-1541698444083-023c97d3f4b6?w=1920&h=1080&fit=crop",
+    "https://images.unsplash.com/photo-1522364723953-452d3431c267?w=1920&h=1080&fit=crop",
+    "https://images.unsplash.com/photo-1493976040374-85c8e12f0c0e?w=1920&h=1080&fit=crop",
+    "https://images.unsplash.com/photo-1530122037265-a5f1f91d3b99?w=1920&h=1080&fit=crop",
+    "https://images.unsplash.com/photo-1516972810927-80185027ca84?w=1920&h=1080&fit=crop",
+    "https://images.unsplash.com/photo-1550439062-609e1531270e?w=1920&h=1080&fit=crop",
+    "https://images.unsplash.com/photo-1549692520-acc6669e2f0c?w=1920&h=1080&fit=crop",
+]
+
+
+ORIGINAL_DIR = Path("original_images")
+PROCESSED_DIR = Path("processed_images")
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / "img" / "raw" / "demo1"
+EDGE_BACKEND = "auto"  # "numpy" (vectorized) when installed, else "pillow" (ImageChops); "python" is the per-pixel loop
+PIPELINE = Pipeline([EdgeDetect(backend=EDGE_BACKEND)])
+
+
+class Timeline:
+    """Records when downloads and processing were active to measure their overlap."""
+
+    def __init__(self):
+        self.intervals: dict[str, list[tuple[float, float]]] = defaultdict(list)
+
+    def add(self, kind: str, start: float, end: float):
+        self.intervals[kind].append((start, end))
+
+    def merged(self, kind: str) -> list[tuple[float, float]]:
+        merged: list[list[float]] = []
+        for start, end in sorted(self.intervals[kind]):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return [(start, end) for start, end in merged]
+
+    def busy(self, kind: str) -> float:
+        return sum(end - start for start, end in self.merged(kind))
+
+    def overlap(self, first: str, second: str) -> float:
+        a, b = self.merged(first), self.merged(second)
+        i = j = 0
+        total = 0.0
+        while i < len(a) and j < len(b):
+            total += max(0.0, min(a[i][1], b[j][1]) - max(a[i][0], b[j][0]))
+            if a[i][1] < b[j][1]:
+                i += 1
+            else:
+                j += 1
+        return total
+
+
+async def download_single_image(
+    client: httpx.AsyncClient,
+    url: str,
+    img_num: int,
+    original_dir: Path,
+) -> Path:
+    print(f"Downloading {url}...")
+    response = await client.get(url, timeout=10, follow_redirects=True)
+    response.raise_for_status()
+
+    download_path = original_dir / f"image_{img_num}.jpg"
+    # One executor call per file instead of one per 8 KB chunk (see async_file_io.py)
+    async with AsyncFileWriter(download_path) as f:
+        async for chunk in response.aiter_bytes(chunk_size=8192):
+            await f.write(chunk)
+
+    print(f"Downloaded and saved to: {download_path}")
+    return download_path
+
+
+def process_single_image(orig_path: Path, processed_dir: Path) -> Path:
+    save_path = processed_dir / orig_path.name
+    PIPELINE.process_file(orig_path, save_path)
+    print(f"Processed {orig_path} and saved to {save_path}")
+    return save_path
+
+
+async def produce(
+    client: httpx.AsyncClient,
+    urls: list[str],
+    queue: asyncio.Queue,
+    original_dir: Path,
+    timeline: Timeline,
+):
+    semaphore = asyncio.Semaphore(DOWNLOAD_LIMIT)
+
+    async def fetch(url: str, img_num: int):
+        # The slot is held until the image is queued, so a full queue also stops new downloads
+        async with semaphore:
+            start = time.perf_counter()
+            path = await download_single_image(client, url, img_num, original_dir)
+            timeline.add("download", start, time.perf_counter())
+            await queue.put(path)
+
+    async with asyncio.TaskGroup() as tg:
+        for img_num, url in enumerate(urls, start=1):
+            tg.create_task(fetch(url, img_num))
+
+
+async def consume(
+    queue: asyncio.Queue,
+    executor: ProcessPoolExecutor,
+    processed_dir: Path,
+    timeline: Timeline,
+    results: list[Path],
+):
+    loop = asyncio.get_running_loop()
+    while (orig_path := await queue.get()) is not None:
+        start = time.perf_counter()
+        results.append(
+            await loop.run_in_executor(executor, process_single_image, orig_path, processed_dir),
+        )
+        timeline.add("process", start, time.perf_counter())
+
+
+async def run_pipeline(
+    urls: list[str],
+    original_dir: Path = ORIGINAL_DIR,
+    processed_dir: Path = PROCESSED_DIR,
+    workers: int = CPU_WORKERS,
+) -> tuple[list[Path], Timeline]:
+    original_dir.mkdir(parents=True, exist_ok=True)
+    processed_dir.mkdir(parents=True, exist_ok=True)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    timeline = Timeline()
+    results: list[Path] = []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        async with httpx.AsyncClient() as client:
+            async with asyncio.TaskGroup() as tg:
+                # One consumer per worker: a consumer only takes the next image once its worker is free
+                for _ in range(workers):
+                    tg.create_task(consume(queue, executor, processed_dir, timeline, results))
+                await produce(client, urls, queue, original_dir, timeline)
+                for _ in range(workers):
+                    await queue.put(None)
+
+    return results, timeline
+
+
+def print_report(count: int, total_time: float, timeline: Timeline):
+    download_time = timeline.busy("download")
+    process_time = timeline.busy("process")
+    overlap = timeline.overlap("download", "process")
+    shorter = min(download_time, process_time) or 1
+    print(f"\nDownloads active for: {download_time:.2f} seconds")
+    print(f"Processing active for: {process_time:.2f} seconds")
+    print(f"Both at once for: {overlap:.2f} seconds ({overlap / shorter * 100:.1f}% of the shorter phase)")
+    print(
+        f"\nProcessed {count} images in: {total_time:.2f} seconds "
+        f"(back-to-back phases would take ~{download_time + process_time:.2f} seconds)",
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Download and process images in one overlapping pipeline")
+    parser.add_argument("--local", action="store_true", help="serve the sample images from a local stand-in server")
+    parser.add_argument("--latency", type=float, default=0.3, help="per-request latency of the local server")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    if args.local:
+        with serve_images(SAMPLE_DIR, latency=args.latency) as server:
+            processed_paths, timeline = await run_pipeline(server.urls())
+    else:
+        processed_paths, timeline = await run_pipeline(IMAGE_URLS)
+    print_report(len(processed_paths), time.perf_counter() - start_time, timeline)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
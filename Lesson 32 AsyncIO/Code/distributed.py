@@ -0,0 +1,408 @@
+# Spreading image processing over several machines (or several local processes).
+#
+# code_12.py's process pool stops at one host. Here a coordinator holds the
+# task list and serves it over TCP with multiprocessing.managers; any number
+# of workers connect, pull tasks, and push results back:
+#
+#   python distributed.py coordinator img/raw -o img/processed --host 0.0.0.0 --port 50000
+#   DISTRIBUTED_AUTHKEY=<key> python distributed.py worker --connect coordinator-host:50000 -j 4
+#
+# The protocol is pickle underneath, so whoever can connect with the authkey
+# can run code on the coordinator and on every worker. The coordinator
+# therefore listens on 127.0.0.1 unless --host says otherwise, and there is no
+# built-in key: pass --authkey or set DISTRIBUTED_AUTHKEY, or the coordinator
+# generates a random one and prints it for the workers. Even with a key, only
+# listen on networks you trust. Image bytes travel with the tasks, so workers
+# need no shared filesystem.
+#
+# Scheduling: a worker that runs dry takes a batch of BATCH_SIZE tasks from
+# the shared pool into its own queue. Once the pool is empty, an idle worker
+# steals half of the longest queue of another worker (from the back), so a
+# slow or late-joining worker never holds up the end of the run.
+#
+# Failures: workers send a heartbeat every HEARTBEAT seconds. A worker not
+# heard from for lease_timeout seconds is considered lost: the task it was
+# running goes back to the pool (counting as an attempt) together with its
+# queued tasks. A task that raises is retried elsewhere up to max_attempts.
+import argparse
+import io
+import math
+import multiprocessing
+import os
+import secrets
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable, Hashable
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+
+from PIL import Image
+
+from image_pipeline import EdgeDetect, Pipeline
+
+BATCH_SIZE = 4
+HEARTBEAT = 1.0
+LEASE_TIMEOUT = 10.0
+MAX_ATTEMPTS = 3
+AUTHKEY_ENV = "DISTRIBUTED_AUTHKEY"
+DEFAULT_HOST = "127.0.0.1"  # this machine only; --host 0.0.0.0 to accept workers from elsewhere
+PIPELINE = Pipeline([EdgeDetect()])
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+class Coordinator:
+    """Task bookkeeping; every public method is called remotely by the workers.
+
+    load(task_id) produces the payload sent with a task (e.g. the image bytes),
+    on_result(task_id, result) is called once per finished task.
+    """
+
+    def __init__(
+        self,
+        task_ids: list[Hashable],
+        load: Callable = lambda task_id: task_id,
+        on_result: Callable | None = None,
+        batch_size: int = BATCH_SIZE,
+        lease_timeout: float = LEASE_TIMEOUT,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        self.load = load
+        self.on_result = on_result
+        self.batch_size = batch_size
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.pool: deque = deque(task_ids)
+        self.total = len(self.pool)
+        self.queues: dict[str, deque] = {}  # worker -> tasks reserved for it
+        self.running: dict[str, Hashable] = {}  # worker -> task it is working on
+        self.last_seen: dict[str, float] = {}
+        self.attempts: dict[Hashable, int] = {}
+        self.results: dict[Hashable, object] = {}
+        self.failed: dict[Hashable, str] = {}
+        self.completed_by: dict[str, int] = {}
+        self.steals = 0
+        self.lost_workers: list[str] = []
+        self._changed = threading.Condition()
+
+    # -- called by workers ---------------------------------------------------
+
+    def register(self, worker: str):
+        with self._changed:
+            self.queues.setdefault(worker, deque())
+            self.completed_by.setdefault(worker, 0)
+            self.last_seen[worker] = time.monotonic()
+
+    def heartbeat(self, worker: str):
+        self.register(worker)  # a worker declared lost that turns out to be alive simply rejoins
+
+    def next_task(self, worker: str, wait: float = 1.0):
+        """(task_id, payload), or None: retry after a while, or stop if finished() is True."""
+        with self._changed:
+            deadline = time.monotonic() + wait
+            while True:
+                self._reap()
+                # Rejoin if declared lost: its old tasks were handed back already
+                self.queues.setdefault(worker, deque())
+                self.last_seen[worker] = time.monotonic()
+                task_id = self._take(worker)
+                if task_id is not None:
+                    self.running[worker] = task_id
+                    self.attempts[task_id] = self.attempts.get(task_id, 0) + 1
+                    break
+                remaining = deadline - time.monotonic()
+                if self._finished() or remaining <= 0:
+                    return None
+                self._changed.wait(min(remaining, self.lease_timeout / 2))
+        return task_id, self.load(task_id)  # outside the lock: may read a file
+
+    def complete(self, worker: str, task_id, result):
+        with self._changed:
+            if self.running.get(worker) == task_id:
+                del self.running[worker]
+            if task_id in self.results or task_id in self.failed:
+                return  # a lost worker came back after its task was redone
+            self.results[task_id] = result
+            self.completed_by[worker] = self.completed_by.get(worker, 0) + 1
+            self._changed.notify_all()
+        if self.on_result is not None:
+            self.on_result(task_id, result)
+
+    def fail(self, worker: str, task_id, error: str):
+        with self._changed:
+            if self.running.get(worker) == task_id:
+                del self.running[worker]
+            self._retry(task_id, error)
+            self._changed.notify_all()
+
+    def finished(self) -> bool:
+        with self._changed:
+            return self._finished()
+
+    # -- coordinator side --------------------------------------------------------
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until every task succeeded or ran out of attempts."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while not self._finished():
+                self._reap()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._changed.wait(min(remaining or self.lease_timeout / 2, self.lease_timeout / 2))
+            self._changed.notify_all()  # wake idle workers so they can exit
+        return True
+
+    def progress(self) -> tuple[int, int, int]:
+        with self._changed:
+            return len(self.results), len(self.failed), self.total
+
+    # -- internals (lock held) -------------------------------------------------------
+
+    def _finished(self) -> bool:
+        return len(self.results) + len(self.failed) >= self.total
+
+    def _take(self, worker: str):
+        queue = self.queues[worker]
+        if not queue and self.pool:
+            for _ in range(min(self.batch_size, len(self.pool))):
+                queue.append(self.pool.popleft())
+        if not queue:
+            victim = max(self.queues.values(), key=len)
+            if len(victim) > 0:
+                # Steal from the back: the victim keeps the tasks it will reach soonest
+                for _ in range(math.ceil(len(victim) / 2)):
+                    queue.appendleft(victim.pop())
+                self.steals += 1
+        return queue.popleft() if queue else None
+
+    def _retry(self, task_id, error: str):
+        if task_id in self.results or task_id in self.failed:
+            return
+        if self.attempts.get(task_id, 0) >= self.max_attempts:
+            self.failed[task_id] = error
+        else:
+            self.pool.append(task_id)
+
+    def _reap(self):
+        now = time.monotonic()
+        for worker, seen in list(self.last_seen.items()):
+            if now - seen <= self.lease_timeout:
+                continue
+            self.lost_workers.append(worker)
+            del self.last_seen[worker]
+            self.pool.extend(self.queues.pop(worker))
+            if worker in self.running:
+                self._retry(self.running.pop(worker), f"worker {worker} lost")
+            self._changed.notify_all()
+
+
+# -- networking ----------------------------------------------------------------
+
+
+class _WorkerManager(BaseManager):
+    pass
+
+
+_WorkerManager.register("coordinator")
+
+
+def serve(coordinator: Coordinator, authkey: bytes, address: tuple[str, int] = (DEFAULT_HOST, 0)):
+    """Serve coordinator on address from background threads; returns the server (see stop()).
+
+    Server.serve_forever() is not used: it resets sys.stdout and spins on a
+    closed listener, both unwelcome in a process that keeps running.
+    """
+
+    class _CoordinatorManager(BaseManager):
+        pass
+
+    _CoordinatorManager.register("coordinator", callable=lambda: coordinator)
+    server = _CoordinatorManager(address=address, authkey=authkey).get_server()
+    server.stop_event = threading.Event()  # serve_client() checks it
+
+    def accept():
+        while not server.stop_event.is_set():
+            try:
+                conn = server.listener.accept()
+            except Exception:  # failed handshake (wrong authkey, port scan) or closed listener
+                continue
+            threading.Thread(target=server.handle_request, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True, name="coordinator").start()
+    return server
+
+
+def stop(server):
+    server.stop_event.set()
+    # accept() doesn't notice a closed socket on every platform; a connection wakes it
+    host, port = server.address
+    try:
+        socket.create_connection((host if host not in ("", "0.0.0.0") else "127.0.0.1", port), timeout=1).close()
+    except OSError:
+        pass
+    server.listener.close()
+
+
+def connect(address: tuple[str, int], authkey: bytes, retries: int = 20):
+    manager = _WorkerManager(address=address, authkey=authkey)
+    for attempt in range(retries):
+        try:
+            manager.connect()
+            return manager.coordinator()
+        except ConnectionRefusedError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(0.25)
+
+
+def process_image_task(task_id: str, payload: bytes) -> bytes:
+    """Default handler: run PIPELINE on image bytes, return the encoded output."""
+    with Image.open(io.BytesIO(payload)) as img:
+        img.load()
+        img_format = img.format
+        output, _ = PIPELINE.run(img)
+    buffer = io.BytesIO()
+    output.save(buffer, format=img_format)
+    return buffer.getvalue()
+
+
+def run_worker(
+    address: tuple[str, int],
+    authkey: bytes,
+    handler: Callable = process_image_task,
+    worker: str | None = None,
+    heartbeat: float = HEARTBEAT,
+) -> int:
+    """Pull tasks until the coordinator is finished; returns the number completed."""
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    coordinator = connect(address, authkey)
+    coordinator.register(worker)
+    alive = threading.Event()
+    alive.set()
+
+    def beat():
+        # Its own connection (proxies connect per thread), so a long task can't delay it
+        try:
+            proxy = connect(address, authkey)
+            while alive.is_set():
+                proxy.heartbeat(worker)
+                time.sleep(heartbeat)
+        except (ConnectionError, EOFError):
+            alive.clear()  # the coordinator is gone
+
+    threading.Thread(target=beat, daemon=True).start()
+    done = 0
+    try:
+        while alive.is_set():
+            task = coordinator.next_task(worker)
+            if task is None:
+                if coordinator.finished():
+                    break
+                continue
+            task_id, payload = task
+            try:
+                result = handler(task_id, payload)
+            except Exception as exc:  # report it; the coordinator decides about retrying
+                coordinator.fail(worker, task_id, f"{type(exc).__name__}: {exc}")
+            else:
+                coordinator.complete(worker, task_id, result)
+                done += 1
+    except (ConnectionError, EOFError):
+        pass  # the coordinator is gone: nothing left to do
+    finally:
+        alive.clear()
+    return done
+
+
+def parse_address(text: str) -> tuple[str, int]:
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def run_coordinator(args):
+    root = Path(args.inputs)
+    out_dir = Path(args.output)
+    names = sorted(
+        str(path.relative_to(root)) for path in root.rglob("*") if path.suffix.lower() in IMAGE_EXTENSIONS
+    )
+
+    def save(name: str, data: bytes):
+        dst = out_dir / name
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        dst.write_bytes(data)
+
+    coordinator = Coordinator(
+        names,
+        load=lambda name: (root / name).read_bytes(),
+        on_result=save,
+        lease_timeout=args.lease_timeout,
+    )
+    authkey = args.authkey or os.environ.get(AUTHKEY_ENV)
+    shown_key = "<your key>"  # a key the user chose is not echoed into logs
+    if not authkey:
+        authkey = shown_key = secrets.token_hex(16)
+        print(f"No --authkey or ${AUTHKEY_ENV} given; generated a key for this run")
+    server = serve(coordinator, authkey.encode(), (args.host, args.port))
+    host, port = server.address
+    print(f"Coordinating {len(names)} images on {host}:{port}; start workers with:")
+    print(f"  {AUTHKEY_ENV}={shown_key} python distributed.py worker --connect {host}:{port}")
+    start = time.perf_counter()
+    while not coordinator.wait(timeout=2):
+        done, failed, total = coordinator.progress()
+        print(f"  {done + failed}/{total} finished ({failed} failed), {len(coordinator.queues)} workers")
+    elapsed = time.perf_counter() - start
+    time.sleep(0.5)  # let idle workers see finished() and disconnect
+    stop(server)
+
+    print(f"\nProcessed {len(coordinator.results)} images in {elapsed:.2f} seconds ({coordinator.steals} steals)")
+    for worker, count in coordinator.completed_by.items():
+        print(f"  {worker}: {count}")
+    for name, error in coordinator.failed.items():
+        print(f"  failed: {name}: {error}")
+    if coordinator.lost_workers:
+        print(f"  lost workers: {', '.join(coordinator.lost_workers)}")
+
+
+def run_workers(args, authkey: bytes):
+    address = parse_address(args.connect)
+    if args.jobs == 1:
+        print(f"Completed {run_worker(address, authkey)} tasks")
+        return
+    processes = [multiprocessing.Process(target=run_worker, args=(address, authkey)) for _ in range(args.jobs)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed edge detection over TCP")
+    commands = parser.add_subparsers(dest="command", required=True)
+    coordinator = commands.add_parser("coordinator", help="serve the images in a folder as tasks")
+    coordinator.add_argument("inputs", help="folder of images (searched recursively)")
+    coordinator.add_argument("-o", "--output", required=True)
+    coordinator.add_argument("--host", default=DEFAULT_HOST, help=f"interface to listen on (default {DEFAULT_HOST})")
+    coordinator.add_argument("--port", type=int, default=50000)
+    coordinator.add_argument("--lease-timeout", type=float, default=LEASE_TIMEOUT)
+    coordinator.add_argument("--authkey", help=f"shared secret (default: ${AUTHKEY_ENV}, else a random one)")
+    worker = commands.add_parser("worker", help="process tasks from a coordinator")
+    worker.add_argument("--connect", required=True, help="HOST:PORT of the coordinator")
+    worker.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes on this machine")
+    worker.add_argument("--authkey", help=f"the coordinator's secret (default: ${AUTHKEY_ENV})")
+    args = parser.parse_args(argv)
+    if args.command == "coordinator":
+        run_coordinator(args)
+        return
+    authkey = args.authkey or os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        parser.error(f"workers need the coordinator's key: pass --authkey or set ${AUTHKEY_ENV}")
+    run_workers(args, authkey.encode())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
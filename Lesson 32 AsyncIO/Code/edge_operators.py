@@ -0,0 +1,229 @@
+# Gradient-based edge operators: Sobel, Scharr, Laplacian and Canny.
+#
+# edge_detection.py implements one operator: the averaged difference to the
+# right and bottom neighbours against a fixed threshold of 30. Here the classic
+# operators run on NumPy float32 arrays. Every kernel is separable, so it is
+# applied as two 1-D passes: 3 + 2 multiply-adds per pixel for a Sobel
+# gradient instead of 6, and 11 + 11 instead of 121 for Canny's Gaussian blur:
+#
+#   Sobel  x: [1, 2, 1]^T (smooth) * [-1, 0, 1] (derive)    y: the transpose
+#   Scharr x: [3, 10, 3]^T         * [-1, 0, 1]
+#   Laplacian: [1, -2, 1] along x + [1, -2, 1] along y
+#   Canny: Gaussian blur (separable) -> Sobel -> non-maximum suppression
+#          -> double threshold -> hysteresis (weak edges survive only when
+#          connected to a strong one)
+#
+# Smoothing kernels are normalised, so gradients are in intensity units:
+# a clean 0 -> 255 step gives a magnitude of 127.5 (half the step, as the
+# derivative spans two pixels). Photos are much softer than that: on the
+# sample images 99% of Sobel magnitudes are below 11-30, hence the low
+# defaults. Colour images are processed per channel and the strongest channel
+# wins; grayscale=True converts to "L" first, which does a third of the work
+# and misses edges between colours of equal brightness.
+#
+#   mask = edge_mask(np.asarray(img), "canny", low=5, high=10)
+#   edges = detect_edges(img, "sobel", threshold=20, grayscale=True)  # "L" image
+#
+# Command line:
+#   python edge_operators.py in.jpg out.png --operator canny --low 5 --high 10 --grayscale
+import argparse
+import math
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+OPERATORS = ["sobel", "scharr", "laplacian", "canny"]
+DEFAULT_THRESHOLD = {"sobel": 12.0, "scharr": 12.0, "laplacian": 12.0}
+DEFAULT_LOW, DEFAULT_HIGH = 5.0, 10.0  # Canny hysteresis thresholds
+DEFAULT_SIGMA = 1.4  # Canny pre-blur
+
+DERIVATIVE = (-0.5, 0.0, 0.5)  # central difference; 0.5 keeps the units per pixel
+SMOOTHING = {"sobel": (0.25, 0.5, 0.25), "scharr": (3 / 16, 10 / 16, 3 / 16)}
+SECOND_DERIVATIVE = (1.0, -2.0, 1.0)
+TAN_22_5 = math.tan(math.radians(22.5))
+Y, X = -2, -1  # image axes; colour images are stacked as (channels, height, width) planes
+
+
+def correlate1d(a: np.ndarray, kernel: tuple[float, ...], axis: int) -> np.ndarray:
+    """1-D correlation along axis (Y or X), edges replicated."""
+    radius = len(kernel) // 2
+    pad = [(0, 0)] * a.ndim
+    pad[axis] = (radius, radius)
+    padded = np.pad(a, pad, mode="edge")
+    n = a.shape[axis]
+    out = term = None
+    index = [slice(None)] * a.ndim
+    for i, weight in enumerate(kernel):
+        if weight == 0:
+            continue
+        # Shifted views of the padded array: no copies, one multiply-add per tap
+        index[axis] = slice(i, i + n)
+        shifted = padded[tuple(index)]
+        if out is None:
+            out = shifted * np.float32(weight)
+            term = np.empty_like(out)
+        else:
+            np.multiply(shifted, np.float32(weight), out=term)
+            out += term
+    return out
+
+
+def gaussian_kernel(sigma: float) -> tuple[float, ...]:
+    if not sigma > 0:  # also catches NaN
+        raise ValueError(f"Gaussian sigma must be positive, got {sigma:g}")
+    radius = max(1, math.ceil(3 * sigma))
+    weights = [math.exp(-(x * x) / (2 * sigma * sigma)) for x in range(-radius, radius + 1)]
+    total = sum(weights)
+    return tuple(w / total for w in weights)
+
+
+def gradients(pixels: np.ndarray, operator: str = "sobel") -> tuple[np.ndarray, np.ndarray]:
+    """(gx, gy) for a (height, width) or (channels, height, width) array."""
+    smooth = SMOOTHING[operator]
+    gx = correlate1d(correlate1d(pixels, smooth, axis=Y), DERIVATIVE, axis=X)
+    gy = correlate1d(correlate1d(pixels, smooth, axis=X), DERIVATIVE, axis=Y)
+    return gx, gy
+
+
+def _strongest_channel(gx: np.ndarray, gy: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    magnitude = np.hypot(gx, gy)
+    if magnitude.ndim == 2:
+        return gx, gy, magnitude
+    # Per pixel, the gradient of whichever channel changes most
+    best = magnitude.argmax(axis=0)[None]
+    pick = lambda a: np.take_along_axis(a, best, axis=0)[0]  # noqa: E731
+    return pick(gx), pick(gy), pick(magnitude)
+
+
+def non_maximum_suppression(gx: np.ndarray, gy: np.ndarray, magnitude: np.ndarray) -> np.ndarray:
+    """Keep pixels whose magnitude is a local maximum across the edge (1 pixel wide edges)."""
+    padded = np.pad(magnitude, 1)
+    height, width = magnitude.shape
+
+    def neighbour(dy: int, dx: int) -> np.ndarray:
+        return padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+
+    ax, ay = np.abs(gx), np.abs(gy)
+    horizontal = ay <= TAN_22_5 * ax  # gradient points along x: compare left/right
+    vertical = ax <= TAN_22_5 * ay
+    # y grows downwards, so gx * gy > 0 is the "\" diagonal
+    falling = ~horizontal & ~vertical & (gx * gy > 0)
+    rising = ~horizontal & ~vertical & ~falling
+
+    keep = np.zeros(magnitude.shape, dtype=bool)
+    for direction, (dy, dx) in ((horizontal, (0, 1)), (vertical, (1, 0)), (falling, (1, 1)), (rising, (1, -1))):
+        keep |= direction & (magnitude >= neighbour(dy, dx)) & (magnitude >= neighbour(-dy, -dx))
+    return keep & (magnitude > 0)
+
+
+def hysteresis(weak: np.ndarray, strong: np.ndarray) -> np.ndarray:
+    """Weak pixels 8-connected (through other weak pixels) to a strong one, plus the strong ones."""
+    # Flood fill outwards from the strong pixels, one ring of neighbours per
+    # pass. Dilating the whole mask would cost a full-image pass per pixel of
+    # edge length; here a pass only touches the pixels added by the last one.
+    height, width = weak.shape
+    row = width + 2  # padded by one pixel so neighbour offsets never wrap or leave the array
+    candidates = np.pad(weak, 1).ravel()
+    edges = np.zeros_like(candidates)
+    frontier = np.flatnonzero(np.pad(strong & weak, 1))
+    edges[frontier] = True
+    offsets = np.array([dy * row + dx for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx])
+    while frontier.size:
+        neighbours = (frontier[:, None] + offsets).ravel()
+        neighbours = np.unique(neighbours[candidates[neighbours] & ~edges[neighbours]])
+        edges[neighbours] = True
+        frontier = neighbours
+    return edges.reshape(height + 2, row)[1:-1, 1:-1]
+
+
+def canny_thresholds(low: float | None, high: float | None) -> tuple[float, float]:
+    """(low, high) with the defaults filled in; ValueError unless low <= high."""
+    low = DEFAULT_LOW if low is None else low
+    high = DEFAULT_HIGH if high is None else high
+    if low > high:
+        raise ValueError(f"Canny needs low <= high, got low={low:g}, high={high:g}")
+    return low, high
+
+
+def edge_mask(
+    pixels: np.ndarray,
+    operator: str = "sobel",
+    threshold: float | None = None,
+    low: float | None = None,
+    high: float | None = None,
+    sigma: float = DEFAULT_SIGMA,
+) -> np.ndarray:
+    """Boolean edge mask for a (height, width) or (height, width, channels) uint8 array."""
+    if operator not in OPERATORS:
+        raise ValueError(f"Unknown edge operator: {operator!r} (have {OPERATORS})")
+    if operator == "canny":
+        low, high = canny_thresholds(low, high)  # before any work
+        blur = gaussian_kernel(sigma)
+    if pixels.ndim == 3:
+        # One contiguous plane per channel: every pass then runs like grayscale, three times
+        pixels = np.moveaxis(pixels, 2, 0)
+    pixels = np.ascontiguousarray(pixels, dtype=np.float32)
+
+    if operator == "laplacian":
+        response = correlate1d(pixels, SECOND_DERIVATIVE, axis=X)
+        response += correlate1d(pixels, SECOND_DERIVATIVE, axis=Y)
+        np.abs(response, out=response)
+        if response.ndim == 3:
+            response = response.max(axis=0)
+        return response > (DEFAULT_THRESHOLD[operator] if threshold is None else threshold)
+
+    if operator == "canny":
+        pixels = correlate1d(correlate1d(pixels, blur, axis=Y), blur, axis=X)
+        gx, gy, magnitude = _strongest_channel(*gradients(pixels, "sobel"))
+        thin = non_maximum_suppression(gx, gy, magnitude)
+        return hysteresis(thin & (magnitude >= low), thin & (magnitude >= high))
+
+    magnitude = np.hypot(*gradients(pixels, operator))
+    if magnitude.ndim == 3:
+        magnitude = magnitude.max(axis=0)
+    return magnitude > (DEFAULT_THRESHOLD[operator] if threshold is None else threshold)
+
+
+def detect_edges(img: Image.Image, operator: str = "sobel", grayscale: bool = False, **thresholds) -> Image.Image:
+    """0/255 "L" edge image; thresholds are threshold=, or low=/high=/sigma= for Canny."""
+    img = img.convert("L" if grayscale else "RGB")
+    mask = edge_mask(np.asarray(img), operator, **thresholds)
+    return Image.fromarray(mask.view(np.uint8) * np.uint8(255), "L")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detect edges with Sobel, Scharr, Laplacian or Canny")
+    parser.add_argument("src", type=Path)
+    parser.add_argument("dst", type=Path)
+    parser.add_argument("--operator", choices=OPERATORS, default="sobel")
+    parser.add_argument("--threshold", type=float, help="Sobel/Scharr/Laplacian cut-off (default per operator)")
+    parser.add_argument("--low", type=float, help=f"Canny weak threshold (default {DEFAULT_LOW:g})")
+    parser.add_argument("--high", type=float, help=f"Canny strong threshold (default {DEFAULT_HIGH:g})")
+    parser.add_argument("--grayscale", action="store_true", help="convert to grayscale first (a third of the work)")
+    parser.add_argument("--sigma", type=float, help=f"Canny Gaussian blur (default {DEFAULT_SIGMA:g})")
+    args = parser.parse_args(argv)
+
+    given = {"threshold": args.threshold, "low": args.low, "high": args.high, "sigma": args.sigma}
+    if args.operator == "canny":
+        thresholds = {k: given[k] for k in ("low", "high", "sigma") if given[k] is not None}
+    else:
+        thresholds = {"threshold": args.threshold}
+    ignored = [f"--{k}" for k, v in given.items() if v is not None and k not in thresholds]
+    if ignored:
+        parser.error(f"{', '.join(ignored)} not used by --operator {args.operator}")
+    if args.operator == "canny":
+        try:
+            canny_thresholds(args.low, args.high)
+            gaussian_kernel(DEFAULT_SIGMA if args.sigma is None else args.sigma)
+        except ValueError as e:
+            parser.error(str(e))
+    with Image.open(args.src) as img:
+        edges = detect_edges(img, args.operator, grayscale=args.grayscale, **thresholds)
+    edges.save(args.dst)
+    share = np.count_nonzero(np.asarray(edges)) / (edges.width * edges.height)
+    print(f"{args.dst}: {args.operator}, {share:.1%} edge pixels")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# Content-addressed cache of processed images.
+#
+# An output is keyed by sha256(input bytes + pipeline fingerprint), so a file
+# is only processed again when its bytes or the pipeline settings change; the
+# file name and download time don't matter. Cached outputs are hard-linked
+# into place (copied when the cache is on another filesystem) and the least
+# recently used entries are evicted once the cache grows past max_bytes.
+#
+#   cache = ImageCache(".image_cache")
+#   results = run_cached_batch(PIPELINE, paths, out_dir, cache)
+#   cache.print_report()
+#
+# Layout: <root>/objects/<key[:2]>/<key><suffix> plus <root>/index.json with
+# the size, mtime and last use of every object.
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path
+
+from image_pipeline import Pipeline, run_batch
+from result_index import ResultIndex, make_record
+
+DEFAULT_CACHE_DIR = Path(".image_cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stored: int = 0
+    evicted: int = 0
+    bytes_reused: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ImageCache:
+    def __init__(self, root: str | Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.index_path = self.root / "index.json"
+        self.stats = CacheStats()
+        self._entries: dict[str, dict] = {}
+        if self.index_path.exists():
+            with self.index_path.open() as f:
+                self._entries = json.load(f)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry["size"] for entry in self._entries.values())
+
+    @staticmethod
+    def key_for(src: Path, fingerprint: str) -> str:
+        return ImageCache.hashes_for(src, fingerprint)[1]
+
+    @staticmethod
+    def hashes_for(src: Path, fingerprint: str) -> tuple[str, str]:
+        """(sha256 of the input bytes, cache key) from a single read of src."""
+        with open(src, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256")
+        content_hash = digest.hexdigest()
+        digest.update(fingerprint.encode())
+        return content_hash, digest.hexdigest()
+
+    def _object_path(self, key: str, suffix: str) -> Path:
+        return self.root / "objects" / key[:2] / f"{key}{suffix}"
+
+    def fetch(self, key: str, dst: Path, force: bool = False) -> bool:
+        """Put the cached output for key at dst; False means it must be computed.
+
+        dst is always removed first, so a fresh output is never written
+        through a hard link into the cache.
+        """
+        dst = Path(dst)
+        dst.unlink(missing_ok=True)
+        entry = self._entries.get(key)
+        if force or entry is None:
+            self.stats.misses += 1
+            return False
+
+        obj = self._object_path(key, entry["suffix"])
+        try:
+            st = obj.stat()
+            # A changed size or mtime means someone wrote to a linked output
+            if st.st_size != entry["size"] or st.st_mtime_ns != entry["mtime_ns"]:
+                raise FileNotFoundError(obj)
+            _link_or_copy(obj, dst)
+        except FileNotFoundError:
+            self._drop(key)
+            self.stats.misses += 1
+            return False
+
+        entry["last_used"] = time.time()
+        self.stats.hits += 1
+        self.stats.bytes_reused += entry["size"]
+        return True
+
+    def store(self, key: str, output: Path):
+        output = Path(output)
+        obj = self._object_path(key, output.suffix)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        obj.unlink(missing_ok=True)
+        _link_or_copy(output, obj)
+        st = obj.stat()
+        self._entries[key] = {
+            "suffix": output.suffix,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "last_used": time.time(),
+        }
+        self.stats.stored += 1
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        total = self.total_bytes
+        for key in sorted(self._entries, key=lambda k: self._entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._entries[key]["size"]
+            self._drop(key)
+            self.stats.evicted += 1
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        self._object_path(key, entry["suffix"]).unlink(missing_ok=True)
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        with tmp_path.open("w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.index_path)
+
+    def print_report(self):
+        s = self.stats
+        print(
+            f"Cache: {s.hits} hits, {s.misses} misses ({s.hit_rate:.0%} hit rate), "
+            f"{s.bytes_reused / 1e6:.1f} MB reused, {s.stored} stored, {s.evicted} evicted; "
+            f"{len(self)} entries, {self.total_bytes / 1e6:.1f} / {self.max_bytes / 1e6:.0f} MB",
+        )
+
+
+def _link_or_copy(src: Path, dst: Path):
+    try:
+        os.link(src, dst)
+    except OSError:  # other filesystem, or links not supported
+        shutil.copy2(src, dst)
+
+
+def run_cached_batch(
+    pipeline: Pipeline,
+    paths: list[Path],
+    out_dir: Path,
+    cache: ImageCache,
+    force: bool = False,
+    executor: str | Executor = "process",
+    max_workers: int | None = None,
+    index: ResultIndex | None = None,
+    **save_options,
+) -> list[tuple[Path, dict[str, float]]]:
+    """Like image_pipeline.run_batch, but outputs already in the cache are reused.
+
+    With a result_index.ResultIndex, every result is recorded there, and
+    unchanged inputs (same size and mtime as last time) are looked up in it
+    instead of being read and hashed again.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fingerprint = pipeline.fingerprint(**save_options)
+
+    results: dict[Path, tuple[Path, dict[str, float]]] = {}
+    hashes: dict[Path, tuple[str, str]] = {}
+    unchanged: set[Path] = set()  # cache hits the index already describes
+    misses: list[tuple[Path, str]] = []
+    for src in map(Path, paths):
+        start = time.perf_counter()
+        dst = out_dir / src.name
+        known = index.known(src, fingerprint) if index is not None else None
+        hashes[src] = (known.source_hash, known.cache_key) if known else cache.hashes_for(src, fingerprint)
+        key = hashes[src][1]
+        if cache.fetch(key, dst, force=force):
+            results[src] = (dst, {"cache": time.perf_counter() - start})
+            if known and Path(known.output) == dst.resolve():
+                unchanged.add(src)
+        else:
+            misses.append((src, key))
+
+    if misses:
+        computed = run_batch(
+            pipeline, [src for src, _ in misses], out_dir, executor=executor, max_workers=max_workers, **save_options,
+        )
+        for (src, key), result in zip(misses, computed):
+            results[src] = result
+            cache.store(key, result[0])
+    cache.save()
+
+    if index is not None:
+        # Keeps the original processing timings of unchanged cache hits
+        config = repr(pipeline)
+        for src, (output, timings) in results.items():
+            if src in unchanged:
+                continue
+            source_hash, key = hashes[src]
+            index.add(make_record(src, src, source_hash, key, fingerprint, config, output, timings, "cache" in timings))
+        index.flush()
+    return [results[Path(src)] for src in paths]
@@ -0,0 +1,264 @@
+# Composable image pipeline shared by the AsyncIO demo (code_12.py) and
+# Lesson 31's code_4.py.
+#
+#   pipeline = Pipeline([Resize((400, 300)), PillowFilter(ImageFilter.SHARPEN), Gamma(0.8), Invert()])
+#   results = run_batch(pipeline, paths, out_dir, executor="process")
+#   print_timings(results)
+#
+# Consecutive pixel-wise stages (lookup tables) are fused into a single
+# Image.point() pass; everything else runs as its own stage.
+import concurrent.futures
+import hashlib
+import os
+import time
+from collections import defaultdict
+from itertools import repeat
+from pathlib import Path
+
+from PIL import Image
+
+from edge_detection import THRESHOLD, detect_edges
+
+
+class Stage:
+    """One image -> image step. Subclasses set name and implement apply()."""
+
+    name = "stage"
+
+    def apply(self, img: Image.Image) -> Image.Image:
+        raise NotImplementedError
+
+    def config(self) -> tuple:
+        """Everything that affects the output pixels; feeds Pipeline.fingerprint()."""
+        return (type(self).__name__, self.name)
+
+    def __repr__(self):
+        return f"<{self.name}>"
+
+
+class Resize(Stage):
+    def __init__(self, size: tuple[int, int], resample=Image.Resampling.LANCZOS):
+        self.size = size
+        self.resample = resample
+        self.name = f"resize{size[0]}x{size[1]}"
+
+    def apply(self, img):
+        return img.resize(self.size, self.resample)
+
+    def config(self):
+        return ("Resize", tuple(self.size), int(self.resample))
+
+
+class PillowFilter(Stage):
+    def __init__(self, image_filter):
+        self.image_filter = image_filter
+        self.name = getattr(image_filter, "name", type(image_filter).__name__).lower().replace(" ", "_")
+
+    def apply(self, img):
+        return img.filter(self.image_filter)
+
+    def config(self):
+        # Filters are either classes (ImageFilter.SHARPEN) or configured instances (GaussianBlur(2))
+        f = self.image_filter
+        params = sorted((k, repr(v)) for k, v in vars(f).items()) if not isinstance(f, type) else []
+        return ("PillowFilter", getattr(f, "__qualname__", type(f).__qualname__), tuple(params))
+
+
+class EdgeDetect(Stage):
+    def __init__(self, backend: str = "auto"):
+        self.backend = backend
+        self.name = "edges"
+
+    def apply(self, img):
+        return detect_edges(img, backend=self.backend)
+
+    def config(self):
+        return ("EdgeDetect", THRESHOLD)  # every backend gives identical pixels
+
+
+class EdgeOperator(Stage):
+    """Sobel, Scharr, Laplacian or Canny (edge_operators.py); writes a 0/255 "L" image."""
+
+    def __init__(self, operator: str = "sobel", grayscale: bool = False, **thresholds):
+        # Imported here so pipelines without this stage don't need NumPy
+        from edge_operators import OPERATORS, canny_thresholds, gaussian_kernel
+
+        if operator not in OPERATORS:
+            raise ValueError(f"Unknown edge operator: {operator!r} (have {OPERATORS})")
+        self.operator = operator
+        self.grayscale = grayscale
+        # Only what this operator reads, so ignored values can't change the fingerprint
+        used = EDGE_PARAMETERS[operator]
+        self.thresholds = {k: v for k, v in thresholds.items() if k in used and v is not None}
+        if operator == "canny":
+            canny_thresholds(self.thresholds.get("low"), self.thresholds.get("high"))
+            if "sigma" in self.thresholds:
+                gaussian_kernel(self.thresholds["sigma"])
+        self.name = f"{operator}_gray" if grayscale else operator
+
+    def apply(self, img):
+        from edge_operators import detect_edges as detect_operator_edges
+
+        return detect_operator_edges(img, self.operator, grayscale=self.grayscale, **self.thresholds)
+
+    def config(self):
+        return ("EdgeOperator", self.operator, self.grayscale, tuple(sorted(self.thresholds.items())))
+
+
+EDGE_OPERATORS = ["neighbour", "sobel", "scharr", "laplacian", "canny"]  # "neighbour" is EdgeDetect
+# Keyword arguments each operator takes; neighbour has a fixed threshold and is always colour
+EDGE_PARAMETERS = {
+    "neighbour": (),
+    "sobel": ("threshold",),
+    "scharr": ("threshold",),
+    "laplacian": ("threshold",),
+    "canny": ("low", "high", "sigma"),
+}
+
+
+def edge_stage(operator: str = "neighbour", backend: str = "auto", grayscale: bool = False, **thresholds) -> Stage:
+    """EdgeDetect for the original neighbour difference, EdgeOperator for everything else."""
+    if operator == "neighbour":
+        return EdgeDetect(backend=backend)
+    return EdgeOperator(operator, grayscale=grayscale, **thresholds)
+
+
+class PointStage(Stage):
+    """Pixel-wise stage described by a 256-entry lookup table applied to every band."""
+
+    def __init__(self, lut: list[int], name: str):
+        self.lut = lut
+        self.name = name
+
+    def apply(self, img):
+        return img.point(self.lut * len(img.getbands()))
+
+    def config(self):
+        return ("PointStage", tuple(self.lut))
+
+    def then(self, other: "PointStage") -> "PointStage":
+        # lut(x) then other.lut(x)  ==  one table: other.lut[lut[x]]
+        return PointStage([other.lut[v] for v in self.lut], f"{self.name}+{other.name}")
+
+
+class Invert(PointStage):
+    def __init__(self):
+        super().__init__([255 - v for v in range(256)], "invert")
+
+
+class Threshold(PointStage):
+    def __init__(self, level: int):
+        super().__init__([255 if v > level else 0 for v in range(256)], f"threshold{level}")
+
+
+class Gamma(PointStage):
+    def __init__(self, gamma: float):
+        super().__init__([round(255 * (v / 255) ** gamma) for v in range(256)], f"gamma{gamma}")
+
+
+class Brightness(PointStage):
+    def __init__(self, factor: float):
+        super().__init__([min(255, round(v * factor)) for v in range(256)], f"brightness{factor}")
+
+
+def fuse(stages: list[Stage]) -> list[Stage]:
+    fused: list[Stage] = []
+    for stage in stages:
+        if isinstance(stage, PointStage) and fused and isinstance(fused[-1], PointStage):
+            fused[-1] = fused[-1].then(stage)
+        else:
+            fused.append(stage)
+    return fused
+
+
+class Pipeline:
+    def __init__(self, stages: list[Stage]):
+        self.stages = fuse(list(stages))
+
+    def __repr__(self):
+        return " -> ".join(stage.name for stage in self.stages)
+
+    def fingerprint(self, **save_options) -> str:
+        """Stable hash of the stages and save options, for caching outputs."""
+        config = repr(([stage.config() for stage in self.stages], sorted(save_options.items())))
+        return hashlib.sha256(config.encode()).hexdigest()
+
+    def run(self, img: Image.Image) -> tuple[Image.Image, dict[str, float]]:
+        timings = {}
+        for position, stage in enumerate(self.stages, start=1):
+            start = time.perf_counter()
+            img = stage.apply(img)
+            # The same filter may appear twice; keep both timings
+            key = stage.name if stage.name not in timings else f"{stage.name}#{position}"
+            timings[key] = time.perf_counter() - start
+        return img, timings
+
+    def process_file(self, src: Path, dst: Path, **save_options) -> tuple[Path, dict[str, float]]:
+        start = time.perf_counter()
+        with Image.open(src) as img:
+            img.load()
+            timings = {"decode": time.perf_counter() - start}
+            img, stage_timings = self.run(img)
+        timings.update(stage_timings)
+        start = time.perf_counter()
+        # A fresh file, never a write through a hard link (see image_cache.py)
+        Path(dst).unlink(missing_ok=True)
+        img.save(dst, **save_options)
+        timings["encode"] = time.perf_counter() - start
+        return Path(dst), timings
+
+
+def make_executor(kind: str = "process", max_workers: int | None = None) -> concurrent.futures.Executor:
+    if kind == "process":
+        return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    if kind == "thread":
+        # Pillow releases the GIL inside most C operations, so threads do scale
+        return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or os.cpu_count())
+    raise ValueError(f"Unknown executor kind: {kind!r} (use 'process' or 'thread')")
+
+
+def _process_one(pipeline: Pipeline, src: Path, dst: Path, save_options: dict):
+    return pipeline.process_file(src, dst, **save_options)
+
+
+def run_batch(
+    pipeline: Pipeline,
+    paths: list[Path],
+    out_dir: Path,
+    executor: str | concurrent.futures.Executor = "process",
+    max_workers: int | None = None,
+    chunksize: int | None = None,
+    **save_options,
+) -> list[tuple[Path, dict[str, float]]]:
+    """Run pipeline over paths into out_dir; executor is 'process', 'thread' or an Executor.
+
+    chunksize batches several images per inter-process message; a WorkerPool
+    picks one automatically, plain executors default to one image per task.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    pool = make_executor(executor, max_workers) if isinstance(executor, str) else executor
+    srcs = [Path(src) for src in paths]
+    dsts = [out_dir / src.name for src in srcs]
+    map_options = {} if chunksize is None else {"chunksize": chunksize}
+    try:
+        count = len(srcs)
+        return list(
+            pool.map(_process_one, repeat(pipeline, count), srcs, dsts, repeat(save_options, count), **map_options),
+        )
+    finally:
+        if isinstance(executor, str):
+            pool.shutdown()
+
+
+def print_timings(results: list[tuple[Path, dict[str, float]]]):
+    totals: dict[str, float] = defaultdict(float)
+    for _, timings in results:
+        for name, seconds in timings.items():
+            totals[name] += seconds
+    grand_total = sum(totals.values()) or 1
+    count = len(results) or 1
+    width = max([len(name) for name in totals] + [5])
+    print(f"{'stage':<{width}} {'total s':>9} {'avg ms':>9} {'share':>7}")
+    for name, seconds in totals.items():
+        print(f"{name:<{width}} {seconds:>9.3f} {seconds / count * 1000:>9.1f} {seconds / grand_total:>7.1%}")
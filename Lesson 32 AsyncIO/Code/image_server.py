@@ -0,0 +1,197 @@
+# Local stand-in for the Unsplash image CDN used by the demos and tests.
+# Serves every file in a folder over HTTP from a background thread, with a
+# configurable per-request latency, so pipelines can be exercised offline.
+#
+#   with serve_images("../img/raw/demo1", latency=0.2) as server:
+#       urls = server.urls()
+#
+# Like a real CDN it sends ETag/Last-Modified, answers conditional requests
+# with 304 and byte ranges with 206. For failure tests, fail_next makes the
+# next N requests return 503 and drop_after makes the next response hang up
+# after that many body bytes. Every request is recorded in server.log.
+#
+# To stand in for a throttling CDN, capacity answers 429 once more requests
+# than that are active at once, and bandwidth (bytes/second) is shared by all
+# active responses, so more concurrency stops helping past some point.
+import hashlib
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+
+class ImageRequestHandler(BaseHTTPRequestHandler):
+    server: "ImageServer"
+
+    def do_GET(self):
+        active = self.server.enter()
+        try:
+            time.sleep(self.server.latency)
+            name = urlsplit(self.path).path.lstrip("/")
+            path = self.server.files.get(name)
+            status = self._respond(path, active)
+        finally:
+            self.server.leave()
+        self.server.log.append((name, dict(self.headers), status))
+
+    def _respond(self, path, active: int) -> HTTPStatus:
+        if self.server.take_failure():
+            self.send_error(HTTPStatus.SERVICE_UNAVAILABLE)
+            return HTTPStatus.SERVICE_UNAVAILABLE
+        if self.server.capacity is not None and active > self.server.capacity:
+            self.send_error(HTTPStatus.TOO_MANY_REQUESTS)
+            return HTTPStatus.TOO_MANY_REQUESTS
+        if path is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return HTTPStatus.NOT_FOUND
+
+        body = path.read_bytes()
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        mtime = int(path.stat().st_mtime)
+        last_modified = formatdate(mtime, usegmt=True)
+
+        if self._not_modified(etag, mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            return HTTPStatus.NOT_MODIFIED
+
+        status, start = HTTPStatus.OK, 0
+        if_range = self.headers.get("If-Range")
+        range_header = self.headers.get("Range", "")
+        if range_header.startswith("bytes=") and if_range in (None, etag, last_modified):
+            start = int(range_header[6:].split("-")[0])
+            if start >= len(body):
+                self.send_error(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                return HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+            status = HTTPStatus.PARTIAL_CONTENT
+
+        part = body[start:]
+        self.send_response(status)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(part)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.end_headers()
+
+        if self.server.bandwidth:
+            time.sleep(len(part) * self.server.active / self.server.bandwidth)
+        drop_after = self.server.take_drop()
+        if drop_after is not None and drop_after < len(part):
+            self.wfile.write(part[:drop_after])
+            self.close_connection = True  # the client sees a truncated body
+        else:
+            self.wfile.write(part)
+        return status
+
+    def _not_modified(self, etag: str, mtime: int) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def log_message(self, format, *args):
+        pass  # keep demo output readable
+
+
+class ImageServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        directory: Path,
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        capacity: int | None = None,
+        bandwidth: float | None = None,
+    ):
+        super().__init__((host, port), ImageRequestHandler)
+        self.directory = Path(directory)
+        self.latency = latency
+        self.capacity = capacity
+        self.bandwidth = bandwidth
+        self.active = 0
+        self.peak_active = 0
+        self.files = {p.name: p for p in sorted(self.directory.iterdir()) if p.is_file()}
+        self.log: list[tuple[str, dict[str, str], HTTPStatus]] = []
+        self.fail_next = 0
+        self.drop_after: int | None = None
+        self._state_lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def enter(self) -> int:
+        with self._state_lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            return self.active
+
+    def leave(self):
+        with self._state_lock:
+            self.active -= 1
+
+    def take_failure(self) -> bool:
+        with self._state_lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return True
+            return False
+
+    def take_drop(self) -> int | None:
+        with self._state_lock:
+            drop_after, self.drop_after = self.drop_after, None
+            return drop_after
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+    def urls(self) -> list[str]:
+        return [self.url(name) for name in self.files]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+def serve_images(directory: Path, latency: float = 0.0, port: int = 0, **throttling) -> ImageServer:
+    return ImageServer(directory, latency=latency, port=port, **throttling)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a folder of images for the AsyncIO demos")
+    parser.add_argument("directory", nargs="?", default=str(Path(__file__).resolve().parent.parent / "img" / "raw" / "demo1"))
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before each response")
+    args = parser.parse_args()
+
+    with serve_images(args.directory, latency=args.latency, port=args.port) as server:
+        print(f"Serving {len(server.files)} files from {args.directory} at {server.base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
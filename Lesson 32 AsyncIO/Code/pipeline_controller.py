@@ -0,0 +1,236 @@
+# Runs download -> process for many items with progress events, a live
+# throughput/ETA line, graceful Ctrl-C and a resume file.
+#
+# asyncio.TaskGroup cancels every sibling as soon as one task fails, so one
+# bad URL threw away all the work in flight. PipelineController instead runs
+# every item in isolation: an exception marks that item failed and the batch
+# carries on. Every state change is published as a ProgressEvent:
+#
+#   queued -> downloading -> processing -> done
+#                     \             \
+#                      +-------------+--> failed
+#
+# The first Ctrl-C stops new items from starting and lets the ones in flight
+# finish; a second one cancels them. Done and failed items are recorded in a
+# JSON resume file after every change, so the next run skips finished items
+# and retries the failures (or only the failures, with retry_failed=True).
+#
+#   controller = PipelineController(download, process, "run.json", listeners=[ProgressDisplay()])
+#   summary = await controller.run(urls)
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+QUEUED = "queued"
+DOWNLOADING = "downloading"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    item: str
+    index: int
+    state: str
+    time: float
+    path: Path | None = None
+    error: str | None = None
+
+
+@dataclass
+class RunSummary:
+    done: dict[str, Path] = field(default_factory=dict)
+    failed: dict[str, str] = field(default_factory=dict)
+    skipped: list[str] = field(default_factory=list)  # finished earlier (or not failed, with retry_failed)
+    not_started: list[str] = field(default_factory=list)  # left over after Ctrl-C
+    seconds: float = 0.0
+
+    @property
+    def interrupted(self) -> bool:
+        return bool(self.not_started)
+
+
+def describe(exc: Exception) -> str:
+    # First line only: httpx errors append a multi-line help text
+    message = str(exc).splitlines()
+    return f"{type(exc).__name__}: {message[0]}" if message else type(exc).__name__
+
+
+class ResumeFile:
+    """{"done": {item: output}, "failed": {item: error}}, rewritten atomically."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.done: dict[str, str] = {}
+        self.failed: dict[str, str] = {}
+        if self.path.exists():
+            with self.path.open() as f:
+                state = json.load(f)
+            self.done, self.failed = state.get("done", {}), state.get("failed", {})
+
+    def is_done(self, item: str) -> bool:
+        # An output deleted since the last run means the item has to run again
+        return item in self.done and Path(self.done[item]).exists()
+
+    def mark_done(self, item: str, path: Path):
+        self.failed.pop(item, None)
+        self.done[item] = str(path)
+        self.save()
+
+    def mark_failed(self, item: str, error: str):
+        self.done.pop(item, None)
+        self.failed[item] = error
+        self.save()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with tmp_path.open("w") as f:
+            json.dump({"done": self.done, "failed": self.failed}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class ProgressDisplay:
+    """Listener printing '7/12 finished (1 failed), 2 downloading, 3 processing | 3.2 items/s | ETA 2s'.
+
+    On a terminal the line is redrawn in place; otherwise (logs, pipes) a line
+    is printed for every finished item.
+    """
+
+    def __init__(self, stream=None, window: int = 20):
+        self.stream = stream or sys.stderr
+        self.live = self.stream.isatty()
+        self.total = 0
+        self.states: dict[str, str] = {}
+        self.finished: deque[float] = deque(maxlen=window)  # recent completion times
+        self.start = time.perf_counter()
+
+    def __call__(self, event: ProgressEvent):
+        if event.state == QUEUED:
+            self.total += 1
+        self.states[event.item] = event.state
+        if event.state in (DONE, FAILED):
+            self.finished.append(event.time)
+        if self.live:
+            self.stream.write("\r" + self.line() + "\033[K")
+            self.stream.flush()
+        elif event.state in (DONE, FAILED):
+            detail = f" ({event.error})" if event.error else ""
+            print(f"{event.state:<6} {event.item}{detail} | {self.line()}", file=self.stream)
+
+    def rate(self) -> float:
+        """Items per second: since the start until `window` items finished, then over the last `window`."""
+        if len(self.finished) < self.finished.maxlen:
+            elapsed = time.perf_counter() - self.start
+            return len(self.finished) / elapsed if elapsed > 0 else 0.0
+        return (len(self.finished) - 1) / max(self.finished[-1] - self.finished[0], 1e-9)
+
+    def line(self) -> str:
+        counts = Counter(self.states.values())
+        finished = counts[DONE] + counts[FAILED]
+        rate = self.rate()
+        remaining = self.total - finished
+        eta = f"{remaining / rate:.0f}s" if rate > 0 and remaining else "-"
+        return (
+            f"{finished}/{self.total} finished ({counts[FAILED]} failed), "
+            f"{counts[DOWNLOADING]} downloading, {counts[PROCESSING]} processing | "
+            f"{rate:.1f} items/s | ETA {eta}"
+        )
+
+    def close(self):
+        if self.live:
+            self.stream.write("\n")
+
+
+class PipelineController:
+    def __init__(
+        self,
+        download: Callable[[str, int], Awaitable[Path]],
+        process: Callable[[Path], Awaitable[Path]],
+        resume_path: str | Path,
+        max_active: int = 16,
+        listeners: list[Callable[[ProgressEvent], None]] | None = None,
+    ):
+        self.download = download
+        self.process = process
+        self.resume = ResumeFile(resume_path)
+        self.max_active = max_active  # items between 'downloading' and 'done' at once
+        self.listeners = list(listeners or [])
+        self.stopping = False
+
+    def emit(self, item: str, index: int, state: str, **details):
+        event = ProgressEvent(item, index, state, time.perf_counter(), **details)
+        for listener in self.listeners:
+            listener(event)
+
+    def stop(self):
+        """Finish what is in flight, start nothing new."""
+        self.stopping = True
+
+    async def run(self, items: list[str], retry_failed: bool = False) -> RunSummary:
+        summary = RunSummary()
+        start = time.perf_counter()
+        todo = []
+        for index, item in enumerate(items, start=1):
+            if self.resume.is_done(item) or (retry_failed and item not in self.resume.failed):
+                summary.skipped.append(item)
+            else:
+                todo.append((index, item))
+                self.emit(item, index, QUEUED)
+
+        slots = asyncio.Semaphore(self.max_active)
+
+        async def run_item(index: int, item: str):
+            async with slots:
+                if self.stopping:
+                    summary.not_started.append(item)
+                    return
+                try:
+                    self.emit(item, index, DOWNLOADING)
+                    downloaded = await self.download(item, index)
+                    self.emit(item, index, PROCESSING, path=downloaded)
+                    output = await self.process(downloaded)
+                except Exception as exc:  # isolate the item; the batch carries on
+                    error = describe(exc)
+                    summary.failed[item] = error
+                    self.resume.mark_failed(item, error)
+                    self.emit(item, index, FAILED, error=error)
+                else:
+                    summary.done[item] = output
+                    self.resume.mark_done(item, output)
+                    self.emit(item, index, DONE, path=output)
+
+        with _graceful_interrupt(self):
+            await asyncio.gather(*(run_item(index, item) for index, item in todo))
+        summary.seconds = time.perf_counter() - start
+        return summary
+
+
+@contextmanager
+def _graceful_interrupt(controller: PipelineController):
+    """First Ctrl-C calls controller.stop(); a second one raises KeyboardInterrupt as usual."""
+
+    def handle(signum, frame):
+        if controller.stopping:
+            raise KeyboardInterrupt
+        print("\nStopping: finishing items in flight (Ctrl-C again to abort)", file=sys.stderr)
+        controller.stop()
+
+    try:
+        previous = signal.signal(signal.SIGINT, handle)
+    except ValueError:  # not the main thread: leave Ctrl-C alone
+        yield
+        return
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
@@ -0,0 +1,78 @@
+# Compact pixel access for pure Python image code.
+#
+# list(img.getdata()) turns every pixel into a tuple of three ints: about 64
+# bytes of tuple plus an 8-byte list slot per pixel, so roughly 150 MB for a
+# 1920x1080 image, and putdata() needs another list like it for the output.
+# PixelBuffer keeps the raw bytes from img.tobytes() in one bytearray
+# (3 bytes per RGB pixel, 1 per "L" pixel). Indexing it gives small ints, which
+# Python never allocates, so a per-pixel loop creates no objects at all.
+#
+#   pixels = PixelBuffer.from_image(img)
+#   r, g, b = pixels.rgb(x, y)
+#   out = PixelBuffer.new(pixels.size, "L")
+#   out.data[pixels.index(x, y)] = 255
+#   out.to_image()
+#
+# Hot loops should read pixels.data directly at pixels.offset(x, y) (+0/+1/+2
+# for R/G/B); rgb() builds a tuple per call and is meant for readable code.
+from PIL import Image
+
+CHANNELS = {"L": 1, "RGB": 3, "RGBA": 4}
+
+
+class PixelBuffer:
+    def __init__(self, data: bytearray, size: tuple[int, int], mode: str = "RGB"):
+        if mode not in CHANNELS:
+            raise ValueError(f"Unsupported mode {mode!r} (have {list(CHANNELS)})")
+        self.width, self.height = size
+        self.mode = mode
+        self.channels = CHANNELS[mode]
+        if len(data) != self.width * self.height * self.channels:
+            raise ValueError(f"{len(data)} bytes do not hold a {mode} image of {size}")
+        self.data = data
+
+    @classmethod
+    def from_image(cls, img: Image.Image, mode: str = "RGB") -> "PixelBuffer":
+        if img.mode != mode:
+            img = img.convert(mode)
+        return cls(bytearray(img.tobytes()), img.size, mode)
+
+    @classmethod
+    def new(cls, size: tuple[int, int], mode: str = "RGB") -> "PixelBuffer":
+        """All-zero (black) pixels."""
+        return cls(bytearray(size[0] * size[1] * CHANNELS.get(mode, 0)), size, mode)
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.width, self.height
+
+    @property
+    def row_bytes(self) -> int:
+        return self.width * self.channels
+
+    def index(self, x: int, y: int) -> int:
+        """Pixel number of (x, y) in row-major order."""
+        return y * self.width + x
+
+    def offset(self, x: int, y: int) -> int:
+        """Position of the first channel of (x, y) in data."""
+        return (y * self.width + x) * self.channels
+
+    def rgb(self, x: int, y: int) -> tuple[int, int, int]:
+        o = self.offset(x, y)
+        return self.data[o], self.data[o + 1], self.data[o + 2]
+
+    def set_rgb(self, x: int, y: int, rgb: tuple[int, int, int]):
+        o = self.offset(x, y)
+        self.data[o:o + 3] = bytes(rgb)
+
+    def row(self, y: int) -> memoryview:
+        """Row y as a writable view into data; slicing it copies nothing."""
+        start = y * self.row_bytes
+        return memoryview(self.data)[start:start + self.row_bytes]
+
+    def to_image(self) -> Image.Image:
+        # frombuffer() wraps the bytes without copying for "L" and "RGBA";
+        # "RGB" is stored 4 bytes per pixel inside Pillow, so it is unpacked once.
+        # Either way no per-pixel Python objects are involved.
+        return Image.frombuffer(self.mode, self.size, self.data, "raw", self.mode, 0, 1)
@@ -0,0 +1,295 @@
+# SQLite index of every processed image.
+#
+# processed_images/ only says that an output exists. The index records, per
+# source and pipeline: where the image came from (URL or path), its size,
+# mtime and content hash, the pipeline config and fingerprint, input and
+# output dimensions, the output path and the per-stage timings.
+#
+# Records are buffered and written batch_size at a time in one transaction
+# (one fsync per batch instead of one per image). Because the index also
+# remembers each source's size and mtime, a re-run finds the cache key of an
+# unchanged file without reading and hashing it again (known()). known() answers
+# from the pending batch first and reads SQLite without flushing, so lookups
+# mixed in with add() don't cut the batches short.
+#
+#   with ResultIndex(".image_index.db") as index:
+#       results = run_cached_batch(PIPELINE, paths, out_dir, cache, index=index)
+#       index.slowest(5)
+#
+# Query from the command line:
+#   python result_index.py stats
+#   python result_index.py slowest -n 10
+#   python result_index.py find 3fa9c1          # content hash prefix
+#   python result_index.py source "*unsplash*"  # glob on the source URL/path
+#   python result_index.py missing              # outputs deleted since
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+
+from PIL import Image
+
+DEFAULT_INDEX_PATH = Path(".image_index.db")
+BATCH_SIZE = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    source          TEXT NOT NULL,     -- URL or path the image came from
+    source_path     TEXT NOT NULL,     -- local file that was processed
+    source_size     INTEGER NOT NULL,
+    source_mtime_ns INTEGER NOT NULL,
+    source_hash     TEXT NOT NULL,     -- sha256 of the input bytes
+    fingerprint     TEXT NOT NULL,     -- Pipeline.fingerprint()
+    config          TEXT NOT NULL,     -- the pipeline, readable
+    cache_key       TEXT NOT NULL,     -- ImageCache key
+    source_width    INTEGER,
+    source_height   INTEGER,
+    output          TEXT NOT NULL,
+    output_bytes    INTEGER,
+    width           INTEGER,
+    height          INTEGER,
+    seconds         REAL NOT NULL,     -- sum of the stage timings
+    timings         TEXT NOT NULL,     -- JSON {stage: seconds}
+    cached          INTEGER NOT NULL,  -- 1 when the output came from the cache
+    created         REAL NOT NULL,
+    PRIMARY KEY (source_path, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS results_hash ON results (source_hash);
+CREATE INDEX IF NOT EXISTS results_seconds ON results (seconds);
+CREATE INDEX IF NOT EXISTS results_source ON results (source);
+"""
+
+
+@dataclass
+class ResultRecord:
+    source: str
+    source_path: str
+    source_size: int
+    source_mtime_ns: int
+    source_hash: str
+    fingerprint: str
+    config: str
+    cache_key: str
+    source_width: int | None
+    source_height: int | None
+    output: str
+    output_bytes: int | None
+    width: int | None
+    height: int | None
+    seconds: float
+    timings: dict[str, float] = field(default_factory=dict)
+    cached: bool = False
+    created: float = field(default_factory=time.time)
+
+
+COLUMNS = [f.name for f in fields(ResultRecord)]
+
+
+def _dimensions(path: Path) -> tuple[int | None, int | None]:
+    try:
+        with Image.open(path) as img:  # reads the header only
+            return img.size
+    except OSError:
+        return None, None
+
+
+def make_record(
+    source: str,
+    src_path: Path,
+    source_hash: str,
+    cache_key: str,
+    fingerprint: str,
+    config: str,
+    output: Path,
+    timings: dict[str, float],
+    cached: bool = False,
+) -> ResultRecord:
+    """Stat and measure src_path and output; call once the output is written."""
+    src_path, output = Path(src_path), Path(output)
+    st = src_path.stat()
+    try:
+        output_bytes = output.stat().st_size
+    except FileNotFoundError:
+        output_bytes = None
+    source_width, source_height = _dimensions(src_path)
+    width, height = _dimensions(output)
+    return ResultRecord(
+        source=str(source),
+        source_path=str(src_path.resolve()),
+        source_size=st.st_size,
+        source_mtime_ns=st.st_mtime_ns,
+        source_hash=source_hash,
+        fingerprint=fingerprint,
+        config=config,
+        cache_key=cache_key,
+        source_width=source_width,
+        source_height=source_height,
+        output=str(output.resolve()),
+        output_bytes=output_bytes,
+        width=width,
+        height=height,
+        seconds=sum(timings.values()),
+        timings=timings,
+        cached=cached,
+    )
+
+
+class ResultIndex:
+    def __init__(self, path: str | Path = DEFAULT_INDEX_PATH, batch_size: int = BATCH_SIZE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        # WAL: readers (the query CLI) don't block the writing pipeline
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # (source_path, fingerprint) -> newest record not yet written; a later add() replaces an earlier one
+        self._pending: dict[tuple[str, str], ResultRecord] = {}
+        self.transactions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # -- writing ------------------------------------------------------------
+
+    def add(self, record: ResultRecord):
+        self._pending[record.source_path, record.fingerprint] = record
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        rows = [
+            {**asdict(record), "timings": json.dumps(record.timings), "cached": int(record.cached)}
+            for record in self._pending.values()
+        ]
+        placeholders = ", ".join(f":{name}" for name in COLUMNS)
+        updates = ", ".join(f"{name} = excluded.{name}" for name in COLUMNS)
+        with self.conn:  # one transaction for the whole batch
+            self.conn.executemany(
+                f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT (source_path, fingerprint) DO UPDATE SET {updates}",
+                rows,
+            )
+        self.transactions += 1
+        self._pending.clear()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    # -- lookups ------------------------------------------------------------
+
+    def known(self, src_path: str | Path, fingerprint: str) -> ResultRecord | None:
+        """The last result for src_path if the file is unchanged (same size and mtime)."""
+        src_path = Path(src_path)
+        try:
+            st = src_path.stat()
+        except FileNotFoundError:
+            return None
+        source_path = str(src_path.resolve())
+        record = self._pending.get((source_path, fingerprint))
+        if record is None:
+            records = self._select(
+                "WHERE source_path = ? AND fingerprint = ?", (source_path, fingerprint), flush=False,
+            )
+            record = records[0] if records else None
+        if record is None or (record.source_size, record.source_mtime_ns) != (st.st_size, st.st_mtime_ns):
+            return None
+        return record
+
+    def find_hash(self, prefix: str) -> list[ResultRecord]:
+        # A range scan on the index; hashes are hex, so every match sorts before prefix + "g"
+        return self._select("WHERE source_hash >= ? AND source_hash < ? ORDER BY created DESC", (prefix, prefix + "g"))
+
+    def by_source(self, pattern: str) -> list[ResultRecord]:
+        return self._select("WHERE source GLOB ? ORDER BY source", (pattern,))
+
+    def slowest(self, n: int = 10, include_cached: bool = False) -> list[ResultRecord]:
+        where = "" if include_cached else "WHERE cached = 0"
+        return self._select(f"{where} ORDER BY seconds DESC LIMIT ?", (n,))
+
+    def missing_outputs(self) -> list[ResultRecord]:
+        return [record for record in self._select("ORDER BY output", ()) if not Path(record.output).exists()]
+
+    def stats(self) -> dict:
+        self.flush()
+        row = self.conn.execute(
+            "SELECT COUNT(*) AS images, COUNT(DISTINCT source_hash) AS unique_inputs, "
+            "COUNT(DISTINCT fingerprint) AS pipelines, SUM(cached) AS cached, "
+            "SUM(seconds) AS total_seconds, AVG(seconds) AS mean_seconds, SUM(output_bytes) AS output_bytes "
+            "FROM results",
+        ).fetchone()
+        return dict(row)
+
+    def _select(self, clause: str, params: tuple, flush: bool = True) -> list[ResultRecord]:
+        if flush:
+            self.flush()  # queries see everything added so far
+        rows = self.conn.execute(f"SELECT * FROM results {clause}", params).fetchall()
+        return [
+            ResultRecord(**{**dict(row), "timings": json.loads(row["timings"]), "cached": bool(row["cached"])})
+            for row in rows
+        ]
+
+
+def print_records(records: list[ResultRecord]):
+    print(f"{'seconds':>8} {'source size':>11} {'output size':>11} {'hash':<12} source")
+    for r in records:
+        source_size = f"{r.source_width}x{r.source_height}"
+        output_size = f"{r.width}x{r.height}"
+        cached = " (cached)" if r.cached else ""
+        print(f"{r.seconds:>8.3f} {source_size:>11} {output_size:>11} {r.source_hash[:12]:<12} {r.source}{cached}")
+    print(f"{len(records)} result(s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the processed-image index")
+    parser.add_argument("--db", default=str(DEFAULT_INDEX_PATH))
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="totals over the whole index")
+    slowest = commands.add_parser("slowest", help="images that took longest to process")
+    slowest.add_argument("-n", type=int, default=10)
+    find = commands.add_parser("find", help="results for a content hash (prefix)")
+    find.add_argument("hash")
+    source = commands.add_parser("source", help="results whose source matches a glob pattern")
+    source.add_argument("pattern")
+    commands.add_parser("missing", help="indexed outputs that no longer exist")
+    args = parser.parse_args(argv)
+
+    if not Path(args.db).exists():
+        parser.error(f"no index at {args.db}")
+    with ResultIndex(args.db) as index:
+        if args.command == "stats":
+            result = index.stats()
+        elif args.command == "slowest":
+            result = index.slowest(args.n)
+        elif args.command == "find":
+            result = index.find_hash(args.hash.lower())
+        elif args.command == "source":
+            result = index.by_source(args.pattern)
+        else:
+            result = index.missing_outputs()
+
+    if args.json:
+        data = result if isinstance(result, dict) else [asdict(record) for record in result]
+        json.dump(data, sys.stdout, indent=2)
+        print()
+    elif isinstance(result, dict):
+        for key, value in result.items():
+            print(f"{key:<14} {value if not isinstance(value, float) else f'{value:.3f}'}")
+    else:
+        print_records(result)
+
+
+if __name__ == "__main__":
+    main()
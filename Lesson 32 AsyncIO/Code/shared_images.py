@@ -0,0 +1,186 @@
+# Zero-copy image handoff between the parent and process-pool workers.
+#
+# Passing a path makes every worker decode the JPEG again; passing a decoded
+# array pickles megabytes through the pool's pipe in both directions. Here the
+# parent decodes once (or takes the downloaded bytes) into a
+# multiprocessing.shared_memory block and sends workers only a small
+# SharedArray descriptor. Workers attach NumPy views to the same memory, read
+# the pixels and write their result into an output block the parent created.
+#
+#   with SharedArena() as arena:
+#       src = arena.put_image(img)
+#       dst = arena.empty(src.shape[:2])
+#       shared_executor().submit(edge_mask_shared, src, dst).result()
+#       edges = arena.view(dst)
+#
+# process_file_shared() wraps that for one file (decode, worker, save,
+# release); code_11.py (HANDOFF) and code_12.py (--handoff shm) use it.
+#
+# The parent owns every block and unlinks them all when the arena closes.
+# Workers only attach and close. Create the pool with shared_executor() so
+# the workers share the parent's resource tracker; a pool forked before the
+# tracker exists gives every worker its own tracker, which then "cleans up"
+# (unlinks) blocks the parent still owns when the worker exits. None of this
+# applies on Windows, where blocks live until their last handle is closed.
+import asyncio
+import io
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from edge_detection import edge_mask_numpy
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Picklable handle to an array living in a shared memory block."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str = "uint8"
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+
+@contextmanager
+def attached(ref: SharedArray):
+    """Worker side: a NumPy view of ref for the duration of the with block.
+
+    Don't keep references to the view (or slices of it) after the block ends;
+    the memory is unmapped on exit.
+    """
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=ref.name, track=False)
+    else:
+        shm = shared_memory.SharedMemory(name=ref.name)
+    view = np.ndarray(ref.shape, dtype=ref.dtype, buffer=shm.buf)
+    try:
+        yield view
+    finally:
+        del view
+        shm.close()
+
+
+def share_resource_tracker():
+    """Start the resource tracker now, so processes started later share it.
+
+    POSIX only: Windows has no resource tracker (ensure_running() fails there)
+    and frees a block when its last handle closes, so there is nothing to share.
+    """
+    if os.name == "posix":
+        resource_tracker.ensure_running()
+
+
+def shared_executor(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """Process pool whose workers report to the parent's resource tracker."""
+    share_resource_tracker()
+    return ProcessPoolExecutor(max_workers=max_workers)
+
+
+class SharedArena:
+    """Parent side: creates shared blocks and unlinks all of them on close."""
+
+    def __init__(self):
+        share_resource_tracker()
+        self._blocks: dict[str, shared_memory.SharedMemory] = {}
+        self._views: dict[str, np.ndarray] = {}
+
+    def empty(self, shape: tuple[int, ...], dtype: str = "uint8") -> SharedArray:
+        size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        ref = SharedArray(shm.name, tuple(shape), dtype)
+        self._blocks[ref.name] = shm
+        self._views[ref.name] = np.ndarray(ref.shape, dtype=dtype, buffer=shm.buf)
+        return ref
+
+    def put_array(self, array: np.ndarray) -> SharedArray:
+        ref = self.empty(array.shape, array.dtype.str)
+        self._views[ref.name][...] = array  # the only copy
+        return ref
+
+    def put_image(self, img: Image.Image) -> SharedArray:
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        return self.put_array(np.asarray(img))
+
+    def put_file(self, path: str | Path) -> SharedArray:
+        with Image.open(path) as img:
+            return self.put_image(img)
+
+    def put_encoded(self, data: bytes) -> SharedArray:
+        """Decode downloaded image bytes straight into shared memory."""
+        with Image.open(io.BytesIO(data)) as img:
+            return self.put_image(img)
+
+    def view(self, ref: SharedArray) -> np.ndarray:
+        return self._views[ref.name]
+
+    def release(self, ref: SharedArray):
+        self._views.pop(ref.name, None)
+        shm = self._blocks.pop(ref.name, None)
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    def close(self):
+        for name in list(self._blocks):
+            self.release(SharedArray(name, ()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def edge_mask_shared(src: SharedArray, dst: SharedArray) -> SharedArray:
+    """Worker entry point: edge-detect src pixels into the 0/255 dst block."""
+    with attached(src) as pixels, attached(dst) as out:
+        np.multiply(edge_mask_numpy(pixels), 255, out=out, casting="unsafe")
+    return dst
+
+
+def edges_image(edges: np.ndarray) -> Image.Image:
+    """0/255 mask -> the RGB image the other backends produce."""
+    return Image.fromarray(edges, "L").convert("RGB")
+
+
+async def process_file_shared(
+    arena: SharedArena,
+    executor: Executor,
+    src_path: str | Path,
+    dst_path: str | Path,
+) -> tuple[Path, dict[str, float]]:
+    """Decode src_path once here, edge-detect it in a worker through shared memory, save dst_path.
+
+    The executor's workers must have been started after the arena (or come
+    from shared_executor()) so they share this process's resource tracker.
+    Both blocks are released as soon as the output is saved.
+    """
+    loop = asyncio.get_running_loop()
+    timings = {}
+    start = time.perf_counter()
+    src = await asyncio.to_thread(arena.put_file, src_path)  # decoding releases the GIL
+    dst = arena.empty(src.shape[:2])
+    timings["decode"] = time.perf_counter() - start
+    try:
+        start = time.perf_counter()
+        await loop.run_in_executor(executor, edge_mask_shared, src, dst)
+        timings["edges"] = time.perf_counter() - start
+        start = time.perf_counter()
+        await asyncio.to_thread(edges_image(arena.view(dst)).save, dst_path)
+        timings["save"] = time.perf_counter() - start
+    finally:
+        arena.release(src)
+        arena.release(dst)
+    return Path(dst_path), timings
@@ -0,0 +1,116 @@
+# Tests for adaptive_limiter.py, including a run against a throttling stand-in server
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import httpx
+
+from adaptive_limiter import AIMDController, HostLimiters, ThreadLimiter
+from download_manager import DownloadManager
+from image_server import serve_images
+
+
+class TestAIMDController(unittest.TestCase):
+    def test_additive_increase_per_window(self):
+        c = AIMDController(initial=2, max_limit=5)
+        for _ in range(2 + 3 + 4 + 5 + 5):
+            c.on_success(0.01, c.epoch)
+        self.assertEqual(c.allowed, 5)
+        self.assertEqual([limit for _, limit in c.history], [2, 3, 4, 5])
+
+    def test_throttle_halves_once_per_epoch(self):
+        c = AIMDController(initial=16)
+        epoch = c.epoch
+        for _ in range(5):  # five requests that were in flight together
+            c.on_throttle(epoch)
+        self.assertEqual(c.allowed, 8)
+        self.assertEqual(c.throttled, 5)
+        c.on_throttle(c.epoch)
+        self.assertEqual(c.allowed, 4)
+
+    def test_latency_spike_counts_as_throttling(self):
+        c = AIMDController(initial=8, spike_factor=3)
+        c.on_success(0.01, c.epoch)
+        c.on_success(0.05, c.epoch)
+        self.assertEqual(c.allowed, 4)
+
+    def test_baseline_follows_recent_latency(self):
+        # One fast response (a 304, say) must not turn every normal one into a spike
+        c = AIMDController(initial=8, spike_factor=3)
+        c.on_success(0.001, c.epoch)
+        for _ in range(5):
+            c.on_success(0.02, c.epoch)
+        self.assertLessEqual(c.throttled, 2)  # then the average has caught up
+        lowest = c.allowed
+        for _ in range(30):
+            c.on_success(0.02, c.epoch)
+        self.assertLessEqual(c.throttled, 2)
+        self.assertGreater(c.allowed, lowest)
+        self.assertAlmostEqual(c.baseline_latency, 0.02, places=4)
+
+    def test_latency_is_time_to_headers(self):
+        limiter = ThreadLimiter(initial=2)
+        with limiter.request() as req:
+            req.done(200)
+            time.sleep(0.05)  # reading the body
+        self.assertLess(limiter.controller.baseline_latency, 0.04)
+
+    def test_never_below_min_limit(self):
+        c = AIMDController(initial=2, min_limit=1)
+        for _ in range(5):
+            c.on_throttle(c.epoch)
+        self.assertEqual(c.allowed, 1)
+
+
+class TestLimiters(unittest.TestCase):
+    def test_thread_limiter_counts_exceptions_without_status(self):
+        limiter = ThreadLimiter(initial=4)
+        with self.assertRaises(ConnectionError):
+            with limiter.request():
+                raise ConnectionError
+        self.assertEqual(limiter.controller.allowed, 2)
+        with self.assertRaises(LookupError):
+            with limiter.request() as req:
+                req.done(404)  # a client error, not throttling
+                raise LookupError
+        self.assertEqual(limiter.controller.allowed, 2)
+
+    def test_per_host_limiters(self):
+        limits = HostLimiters(initial=3)
+        a = limits.for_url("http://a.example/x.jpg")
+        self.assertIs(a, limits.for_url("http://a.example/y.jpg"))
+        self.assertIsNot(a, limits.for_url("http://b.example/x.jpg"))
+
+    def test_converges_under_throttling_server(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            served, out = Path(tmp) / "served", Path(tmp) / "out"
+            served.mkdir()
+            for i in range(10):
+                (served / f"photo_{i}.jpg").write_bytes(os.urandom(20_000))
+
+            limits = HostLimiters(initial=1, max_limit=64)
+            with serve_images(served, latency=0.02, capacity=6) as server:
+                urls = server.urls() * 8
+
+                async def run():
+                    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=None)) as client:
+                        manager = DownloadManager(client, out / ".state.json", backoff_base=0.01, retries=20, limits=limits)
+                        async with asyncio.TaskGroup() as tg:
+                            for i, url in enumerate(urls):
+                                tg.create_task(manager.fetch(url, out / f"{i}.jpg"))
+
+                asyncio.run(run())
+
+            controller = limits.for_url(urls[0]).controller
+            peak = max(limit for _, limit in controller.history)
+            self.assertEqual(len(list(out.glob("*.jpg"))), len(urls))
+            self.assertGreater(peak, 1)  # it did ramp up
+            self.assertLessEqual(controller.allowed, 12)  # and backed off near capacity
+            self.assertLessEqual(server.peak_active, 13)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# Unit tests for async_file_io.py
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import async_file_io
+from async_file_io import AsyncFileWriter, copy_file, copy_file_async, write_file
+
+
+class TestAsyncFileWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        self.body = os.urandom(100_000)
+
+    def save(self, path, chunk=8192, **options):
+        async def run():
+            async with AsyncFileWriter(path, **options) as f:
+                for i in range(0, len(self.body), chunk):
+                    await f.write(self.body[i:i + chunk])
+            return f
+
+        return asyncio.run(run())
+
+    def test_small_file_is_one_executor_call(self):
+        f = self.save(self.root / "a.jpg")
+        self.assertEqual((f.executor_calls, f.bytes_written), (1, len(self.body)))
+        self.assertEqual((self.root / "a.jpg").read_bytes(), self.body)
+
+    def test_flushes_every_flush_bytes(self):
+        f = self.save(self.root / "a.jpg", chunk=10_000, flush_bytes=30_000)
+        self.assertEqual(f.executor_calls, 4)  # 3 flushes of 30 000 bytes, then the last 10 000 on close
+        self.assertEqual((self.root / "a.jpg").read_bytes(), self.body)
+
+    def test_buffer_reaches_disk_when_the_body_fails(self):
+        path = self.root / "a.jpg.part"
+
+        async def run():
+            async with AsyncFileWriter(path) as f:
+                await f.write(b"x" * 500)
+                raise ConnectionResetError
+
+        with self.assertRaises(ConnectionResetError):
+            asyncio.run(run())
+        self.assertEqual(path.read_bytes(), b"x" * 500)
+
+        asyncio.run(write_file(path, b"y" * 10))
+        self.save(path, mode="ab")
+        self.assertEqual(path.read_bytes(), b"y" * 10 + self.body)
+
+    def test_copy_fast_path_and_fallback(self):
+        src = self.root / "src.jpg"
+        src.write_bytes(self.body)
+        size, method = asyncio.run(copy_file_async(src, self.root / "fast.jpg"))
+        self.assertEqual(size, len(self.body))
+        self.assertEqual((self.root / "fast.jpg").read_bytes(), self.body)
+
+        def unsupported(*args):
+            raise OSError("not supported")
+
+        fallback_patches = [mock.patch.object(async_file_io.os, name, unsupported, create=True) for name in ("copy_file_range", "sendfile")]
+        for patch in fallback_patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.assertEqual(copy_file(src, self.root / "slow.jpg"), (len(self.body), "copyfileobj"))
+        self.assertEqual((self.root / "slow.jpg").read_bytes(), self.body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# Tests for code_13.py against the local stand-in image server
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+import code_13
+from image_server import serve_images
+from test_edge_detection import random_image
+
+
+class TestTimeline(unittest.TestCase):
+    def test_busy_and_overlap(self):
+        timeline = code_13.Timeline()
+        timeline.add("download", 0, 2)
+        timeline.add("download", 1, 3)  # overlaps the first download
+        timeline.add("download", 5, 6)
+        timeline.add("process", 2.5, 5.5)
+        self.assertAlmostEqual(timeline.busy("download"), 4)
+        self.assertAlmostEqual(timeline.busy("process"), 3)
+        self.assertAlmostEqual(timeline.overlap("download", "process"), 1)
+
+
+class TestStreamingPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.served, self.original, self.processed = root / "served", root / "original", root / "processed"
+        self.served.mkdir()
+        for i in range(8):
+            random_image(120, 80, seed=i, spread=64).save(self.served / f"photo_{i}.jpg")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_downloads_overlap_processing(self):
+        with serve_images(self.served, latency=0.2) as server:
+            urls = server.urls()
+            results, timeline = asyncio.run(
+                code_13.run_pipeline(urls, self.original, self.processed, workers=2),
+            )
+
+        self.assertEqual(len(results), len(urls))
+        self.assertGreater(timeline.overlap("download", "process"), 0)
+        for result in results:
+            expected, _ = code_13.PIPELINE.process_file(self.original / result.name, self.served / f"expected_{result.name}")
+            self.assertEqual(expected.read_bytes(), result.read_bytes())
+
+    def test_missing_image_fails_the_run(self):
+        with serve_images(self.served) as server:
+            urls = server.urls() + [server.url("missing.jpg")]
+            with self.assertRaises(ExceptionGroup):
+                asyncio.run(code_13.run_pipeline(urls, self.original, self.processed, workers=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# Tests for distributed.py: scheduling on its own, then real workers over localhost
+import contextlib
+import io
+import multiprocessing
+import os
+import secrets
+import time
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import distributed
+from distributed import Coordinator
+
+TASK_SECONDS = 0.05
+AUTHKEY = secrets.token_hex(16).encode()
+
+
+def slow_double(task_id, payload):
+    time.sleep(TASK_SECONDS)  # stands in for an image that takes a while
+    return payload * 2
+
+
+def crash(task_id, payload):
+    os._exit(1)  # the whole worker dies mid-task, no goodbye
+
+
+def fails_on_five(task_id, payload):
+    if payload == 5:
+        raise ValueError("corrupt image")
+    return slow_double(task_id, payload)
+
+
+class TestScheduling(unittest.TestCase):
+    def test_idle_worker_steals_half_from_the_back(self):
+        coordinator = Coordinator(list(range(10)), batch_size=8)
+        self.assertEqual(coordinator.next_task("a", wait=0), (0, 0))  # a reserves 0-7
+        self.assertEqual(coordinator.next_task("b", wait=0), (8, 8))  # b gets what is left
+        self.assertEqual(coordinator.next_task("b", wait=0), (9, 9))
+        self.assertEqual(coordinator.next_task("b", wait=0), (4, 4))  # steals 4-7 of a's 1-7
+        self.assertEqual((list(coordinator.queues["a"]), coordinator.steals), ([1, 2, 3], 1))
+
+    def test_lost_worker_tasks_go_back_to_the_pool(self):
+        coordinator = Coordinator(["x", "y"], batch_size=2, lease_timeout=0.1)
+        self.assertEqual(coordinator.next_task("a", wait=0)[0], "x")
+        time.sleep(0.2)
+        self.assertEqual(coordinator.next_task("b", wait=0)[0], "y")
+        self.assertEqual(coordinator.next_task("b", wait=0)[0], "x")
+        self.assertEqual((coordinator.lost_workers, coordinator.attempts["x"]), (["a"], 2))
+
+        coordinator.complete("b", "x", 1)
+        coordinator.complete("a", "x", 2)  # late answer from the lost worker is ignored
+        self.assertEqual(coordinator.results, {"x": 1})
+
+    def test_failures_retry_until_max_attempts(self):
+        coordinator = Coordinator(["bad"], max_attempts=2)
+        for _ in range(2):
+            task_id, _ = coordinator.next_task("a", wait=0)
+            coordinator.fail("a", task_id, "ValueError: corrupt")
+        self.assertEqual(coordinator.failed, {"bad": "ValueError: corrupt"})
+        self.assertTrue(coordinator.wait(timeout=0))
+
+
+class TestAccess(unittest.TestCase):
+    def test_listens_on_localhost_by_default(self):
+        server = distributed.serve(Coordinator([]), AUTHKEY)
+        self.addCleanup(distributed.stop, server)
+        self.assertEqual(server.address[0], "127.0.0.1")
+
+    def test_wrong_key_is_refused(self):
+        server = distributed.serve(Coordinator([]), AUTHKEY)
+        self.addCleanup(distributed.stop, server)
+        with self.assertRaises(multiprocessing.AuthenticationError):
+            distributed.connect(server.address, b"guessed")
+
+    def test_worker_needs_a_key(self):
+        with mock.patch.dict(os.environ, {distributed.AUTHKEY_ENV: ""}), \
+                contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            distributed.main(["worker", "--connect", "127.0.0.1:50000"])
+
+
+class TestLocalWorkers(unittest.TestCase):
+    def run_workers(self, coordinator, handlers):
+        server = distributed.serve(coordinator, AUTHKEY)
+        self.addCleanup(distributed.stop, server)
+        processes = [
+            multiprocessing.Process(
+                target=distributed.run_worker,
+                args=(server.address, AUTHKEY, handler),
+                kwargs={"heartbeat": 0.1},
+            )
+            for handler in handlers
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        self.assertTrue(coordinator.wait(timeout=30))
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join(timeout=10)
+            self.assertFalse(process.is_alive())
+        return elapsed
+
+    def test_throughput_scales_with_workers(self):
+        tasks = 32
+        times = {}
+        for workers in (1, 4):
+            coordinator = Coordinator(list(range(tasks)), batch_size=2)
+            times[workers] = self.run_workers(coordinator, [slow_double] * workers)
+            self.assertEqual(coordinator.results, {i: i * 2 for i in range(tasks)})
+        # Tasks wait instead of computing, so one CPU is enough to see the scaling
+        self.assertGreater(times[1] / times[4], 0.7 * 4)
+
+    def test_crashed_worker_is_replaced_and_bad_task_fails(self):
+        coordinator = Coordinator(list(range(8)), batch_size=2, lease_timeout=0.5, max_attempts=2)
+        self.run_workers(coordinator, [crash, fails_on_five, fails_on_five])
+        self.assertEqual(len(coordinator.lost_workers), 1)
+        # Whatever the crashed worker held was redone by the survivors
+        self.assertEqual(coordinator.results, {i: i * 2 for i in range(8) if i != 5})
+        self.assertEqual(set(coordinator.failed), {5})
+
+    def test_images_round_trip(self):
+        buffer = io.BytesIO()
+        Image.linear_gradient("L").convert("RGB").resize((64, 48)).save(buffer, format="PNG")
+        coordinator = Coordinator(["a.png"], load=lambda name: buffer.getvalue())
+        self.run_workers(coordinator, [distributed.process_image_task])
+        with Image.open(io.BytesIO(coordinator.results["a.png"])) as img:
+            self.assertEqual((img.format, img.size), ("PNG", (64, 48)))
+
+
+if __name__ == '__main__':
+    unittest.main()
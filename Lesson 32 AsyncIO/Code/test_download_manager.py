@@ -0,0 +1,100 @@
+# Tests for download_manager.py against the local stand-in image server
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import httpx
+
+from download_manager import DownloadError, DownloadManager
+from image_server import serve_images
+
+
+class TestDownloadManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        root = Path(self.tmp.name)
+        self.served, self.downloads = root / "served", root / "downloads"
+        self.served.mkdir()
+        self.body = os.urandom(200_000)
+        (self.served / "photo.jpg").write_bytes(self.body)
+        self.server = serve_images(self.served).__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.url = self.server.url("photo.jpg")
+        self.dest = self.downloads / "photo.jpg"
+
+    def fetch(self, **options):
+        async def run():
+            async with httpx.AsyncClient() as client:
+                manager = DownloadManager(client, self.downloads / ".downloads.json", backoff_base=0.01, **options)
+                return await manager.fetch(self.url, self.dest)
+
+        return asyncio.run(run())
+
+    def last_request_headers(self):
+        return self.server.log[-1][1]
+
+    def test_second_fetch_is_conditional(self):
+        first = self.fetch()
+        second = self.fetch()
+        self.assertEqual((first.status, second.status), ("downloaded", "not_modified"))
+        self.assertEqual(second.bytes_received, 0)
+        self.assertIn("If-None-Match", self.last_request_headers())
+        self.assertEqual(self.dest.read_bytes(), self.body)
+
+    def test_changed_file_is_downloaded_again(self):
+        self.fetch()
+        new_body = os.urandom(1000)
+        (self.served / "photo.jpg").write_bytes(new_body)
+        self.assertEqual(self.fetch().status, "downloaded")
+        self.assertEqual(self.dest.read_bytes(), new_body)
+
+    def test_dropped_connection_resumes_with_range(self):
+        self.server.drop_after = 50_000
+        result = self.fetch()
+        self.assertEqual((result.status, result.attempts), ("resumed", 2))
+        self.assertEqual(self.last_request_headers()["Range"], "bytes=50000-")
+        self.assertEqual(result.bytes_received, len(self.body))
+        self.assertEqual(self.dest.read_bytes(), self.body)
+        self.assertFalse(self.dest.with_name("photo.jpg.part").exists())
+
+    def test_partial_file_resumes_in_a_later_run(self):
+        self.server.drop_after = 120_000
+        with self.assertRaises(DownloadError):
+            self.fetch(retries=1)
+        self.assertFalse(self.dest.exists())  # nothing half-written at the real path
+        self.assertEqual(self.dest.with_name("photo.jpg.part").stat().st_size, 120_000)
+
+        result = self.fetch()
+        self.assertEqual(result.status, "resumed")
+        self.assertEqual(result.bytes_received, len(self.body) - 120_000)
+        self.assertEqual(self.dest.read_bytes(), self.body)
+
+    def test_partial_file_of_an_old_version_is_replaced(self):
+        self.server.drop_after = 120_000
+        with self.assertRaises(DownloadError):
+            self.fetch(retries=1)
+        new_body = os.urandom(150_000)
+        (self.served / "photo.jpg").write_bytes(new_body)
+        result = self.fetch()
+        self.assertEqual(result.status, "downloaded")  # If-Range didn't match, full 200
+        self.assertEqual(self.dest.read_bytes(), new_body)
+
+    def test_server_errors_are_retried(self):
+        self.server.fail_next = 2
+        result = self.fetch()
+        self.assertEqual(result.attempts, 3)
+        self.assertEqual(self.dest.read_bytes(), self.body)
+
+    def test_gives_up_after_retries(self):
+        self.server.fail_next = 10
+        with self.assertRaises(DownloadError) as ctx:
+            self.fetch(retries=3)
+        self.assertEqual(ctx.exception.attempts, 3)
+        self.assertFalse(self.dest.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
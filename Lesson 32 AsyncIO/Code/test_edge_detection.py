@@ -0,0 +1,186 @@
+# Unit tests for edge_detection.py: every backend must match the reference loop pixel for pixel
+import random
+import tempfile
+import unittest
+import warnings
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+import edge_detection
+
+SAMPLE_IMAGE = Path(__file__).resolve().parent.parent / "img" / "raw" / "demo1" / "image_1.jpg"
+
+
+def random_image(width, height, seed=0, spread=256):
+    rng = random.Random(seed)
+    img = Image.new("RGB", (width, height))
+    img.putdata([tuple(rng.randrange(spread) for _ in range(3)) for _ in range(width * height)])
+    return img
+
+
+def detect_edges_getdata(img):
+    # The original loop over list(img.getdata()), kept verbatim as the oracle for detect_edges_python
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)  # getdata() is deprecated in newer Pillow
+        data = list(img.getdata())
+    width, height = img.size
+    new_data = []
+
+    for i in range(len(data)):
+        current_r, current_g, current_b = data[i]
+
+        total_diff = 0
+        neighbor_count = 0
+
+        for dx, dy in [(1, 0), (0, 1)]:
+            x = (i % width) + dx
+            y = (i // width) + dy
+
+            if 0 <= x < width and 0 <= y < height:
+                neighbor_r, neighbor_g, neighbor_b = data[y * width + x]
+                total_diff += abs(current_r - neighbor_r) + abs(current_g - neighbor_g) + abs(current_b - neighbor_b)
+                neighbor_count += 1
+
+        if neighbor_count > 0 and total_diff // neighbor_count > 30:
+            new_data.append((255, 255, 255))
+        else:
+            new_data.append((0, 0, 0))
+
+    edge_img = Image.new("RGB", (width, height))
+    edge_img.putdata(new_data)
+    return edge_img
+
+
+class TestReferenceLoop(unittest.TestCase):
+    def test_matches_original_getdata_loop(self):
+        sizes = [(1, 1), (9, 1), (1, 9), (23, 17)]
+        fixtures = {f"random {size}": random_image(*size, seed=7, spread=64) for size in sizes}
+        if SAMPLE_IMAGE.exists():
+            with Image.open(SAMPLE_IMAGE) as img:
+                fixtures["photo crop"] = img.convert("RGB").crop((1280, 600, 1440, 720))  # ~3% edges
+        for name, img in fixtures.items():
+            with self.subTest(image=name):
+                expected = detect_edges_getdata(img)
+                actual = edge_detection.detect_edges_python(img)
+                self.assertEqual((expected.mode, expected.size), (actual.mode, actual.size))
+                self.assertEqual(expected.tobytes(), actual.tobytes())
+
+
+class TestEdgeBackends(unittest.TestCase):
+    SIZES = [(1, 1), (1, 7), (7, 1), (2, 2), (13, 9), (64, 48)]
+
+    def assertSameImage(self, expected, actual):
+        self.assertEqual(expected.mode, actual.mode)
+        self.assertEqual(expected.size, actual.size)
+        self.assertEqual(expected.tobytes(), actual.tobytes())
+
+    def check_backend(self, backend):
+        for width, height in self.SIZES:
+            # A small spread keeps many differences close to the threshold
+            for spread in (256, 48):
+                with self.subTest(backend=backend, size=(width, height), spread=spread):
+                    img = random_image(width, height, seed=width * 100 + height, spread=spread)
+                    expected = edge_detection.detect_edges_python(img)
+                    self.assertSameImage(expected, edge_detection.detect_edges(img, backend=backend))
+
+    def test_threshold_boundaries(self):
+        # Diffs of exactly 30/31 (one neighbour) and 61/62 (two neighbours) sit on the rounding edge
+        values = [0, 30, 31, 61, 62, 0, 255, 225, 0, 31, 0, 30]
+        img = Image.new("RGB", (4, 3))
+        img.putdata([(v, 0, 0) for v in values])
+        expected = edge_detection.detect_edges_python(img)
+        for backend in edge_detection.available_backends():
+            with self.subTest(backend=backend):
+                self.assertSameImage(expected, edge_detection.detect_edges(img, backend=backend))
+
+    @unittest.skipIf(edge_detection.np is None, "NumPy not installed")
+    def test_numpy_backend(self):
+        self.check_backend("numpy")
+
+    def test_pillow_backend(self):
+        self.check_backend("pillow")
+
+    def test_pillow_backend_saturation(self):
+        # Channel sums far above 255 are clipped by ImageChops.add; the result must not change
+        img = Image.new("RGB", (3, 2))
+        img.putdata([(255, 255, 255), (0, 0, 0), (255, 0, 255), (0, 255, 0), (255, 255, 255), (0, 0, 0)])
+        self.assertSameImage(edge_detection.detect_edges_python(img), edge_detection.detect_edges_pillow(img))
+
+    def test_auto_backend(self):
+        self.check_backend("auto")
+
+    def test_auto_without_numpy_uses_pillow(self):
+        with mock.patch.object(edge_detection, "np", None):
+            self.assertEqual(edge_detection.resolve_backend("auto"), "pillow")
+            self.assertNotIn("numpy", edge_detection.available_backends())
+            self.check_backend("auto")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            edge_detection.detect_edges(Image.new("RGB", (2, 2)), backend="cuda")
+
+
+class TestTiledEdges(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_tiled(self, img, suffix, strip_heights):
+        src = self.dir / f"src{suffix}"
+        img.save(src)
+        with Image.open(src) as saved:
+            expected = edge_detection.detect_edges(saved)
+        for strip_height in strip_heights:
+            with self.subTest(suffix=suffix, size=img.size, strip_height=strip_height):
+                dst = edge_detection.detect_edges_tiled(src, self.dir / f"dst{suffix}", strip_height)
+                with Image.open(dst) as actual:
+                    self.assertEqual(expected.tobytes(), actual.convert("RGB").tobytes())
+
+    def test_ppm_streaming_is_seam_free(self):
+        # Strip heights of 1 and 2 put a seam on (almost) every row
+        for width, height in [(1, 1), (9, 1), (1, 9), (17, 11)]:
+            img = random_image(width, height, seed=width + height, spread=64)
+            self.check_tiled(img, ".ppm", [1, 2, 3, 5, height - 1 or 1, height, height + 4])
+
+    def test_png_is_seam_free(self):
+        img = random_image(23, 19, seed=3, spread=64)
+        self.check_tiled(img, ".png", [1, 4, 7, 18, 19, 64])
+
+    def test_jpeg_matches_untiled_output_file(self):
+        src = self.dir / "src.jpg"
+        random_image(40, 30, seed=5).save(src)
+        with Image.open(src) as img:
+            edge_detection.detect_edges(img).save(self.dir / "full.jpg")
+        edge_detection.detect_edges_tiled(src, self.dir / "tiled.jpg", strip_height=6)
+        self.assertEqual((self.dir / "full.jpg").read_bytes(), (self.dir / "tiled.jpg").read_bytes())
+
+    def test_pillow_backend_strips(self):
+        src = self.dir / "src.ppm"
+        random_image(12, 10, seed=9, spread=64).save(src)
+        with Image.open(src) as img:
+            expected = edge_detection.detect_edges_python(img)
+        dst = edge_detection.detect_edges_tiled(src, self.dir / "dst.ppm", 3, backend="pillow")
+        with Image.open(dst) as actual:
+            self.assertEqual(expected.tobytes(), actual.tobytes())
+
+    def test_python_backend_strips(self):
+        src = self.dir / "src.ppm"
+        random_image(12, 10, seed=9, spread=64).save(src)
+        with Image.open(src) as img:
+            expected = edge_detection.detect_edges_python(img)
+        dst = edge_detection.detect_edges_tiled(src, self.dir / "dst.ppm", 3, backend="python")
+        with Image.open(dst) as actual:
+            self.assertEqual(expected.tobytes(), actual.tobytes())
+
+    def test_invalid_strip_height(self):
+        with self.assertRaises(ValueError):
+            edge_detection.detect_edges_tiled(self.dir / "a.ppm", self.dir / "b.ppm", 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# Unit tests for edge_operators.py
+import io
+import unittest
+from contextlib import redirect_stderr
+
+import numpy as np
+from PIL import Image
+
+import edge_operators
+from edge_operators import OPERATORS, correlate1d, edge_mask, hysteresis
+from image_pipeline import EDGE_OPERATORS, EdgeDetect, EdgeOperator, Pipeline, edge_stage
+from test_edge_detection import random_image
+
+
+def correlate2d(pixels, kernel):
+    # Direct 3x3 correlation with replicated edges, the slow way
+    padded = np.pad(pixels.astype(np.float64), 1, mode="edge")
+    height, width = pixels.shape
+    out = np.zeros((height, width))
+    for dy in range(3):
+        for dx in range(3):
+            out += kernel[dy][dx] * padded[dy:dy + height, dx:dx + width]
+    return out
+
+
+def step_image(width=12, height=8, column=6, left=0, right=200):
+    pixels = np.full((height, width), left, dtype=np.uint8)
+    pixels[:, column:] = right
+    return pixels
+
+
+class TestEdgeOperators(unittest.TestCase):
+    def test_separable_passes_match_the_2d_kernels(self):
+        pixels = np.asarray(random_image(13, 9, seed=4).convert("L"))
+        sobel_x = np.outer([1, 2, 1], [-1, 0, 1]) / 8
+        scharr_y = np.outer([-1, 0, 1], [3, 10, 3]) / 32
+        laplacian = [[0, 1, 0], [1, -4, 1], [0, 1, 0]]
+        gx, _ = edge_operators.gradients(pixels.astype(np.float32), "sobel")
+        _, gy = edge_operators.gradients(pixels.astype(np.float32), "scharr")
+        second_derivative = edge_operators.SECOND_DERIVATIVE
+        second = correlate1d(pixels, second_derivative, 0) + correlate1d(pixels, second_derivative, 1)
+        np.testing.assert_allclose(gx, correlate2d(pixels, sobel_x), atol=1e-3)
+        np.testing.assert_allclose(gy, correlate2d(pixels, scharr_y), atol=1e-3)
+        np.testing.assert_allclose(second, correlate2d(pixels, laplacian), atol=1e-3)
+
+    def test_step_edge(self):
+        pixels = step_image()
+        for operator in OPERATORS:
+            with self.subTest(operator=operator):
+                columns = np.flatnonzero(edge_mask(pixels, operator).any(axis=0))
+                if operator == "canny":
+                    self.assertEqual(len(columns), 1)  # non-maximum suppression leaves a thin line
+                self.assertTrue(set(columns) <= {5, 6}, columns)
+                self.assertTrue(edge_mask(pixels, operator)[:, columns].all())
+        # A 0 -> 200 step has a Sobel magnitude of 100 next to it
+        self.assertFalse(edge_mask(pixels, "sobel", threshold=100).any())
+        self.assertTrue(edge_mask(pixels, "sobel", threshold=99).any())
+
+    def test_hysteresis_keeps_weak_pixels_connected_to_strong_ones(self):
+        weak = np.zeros((5, 8), dtype=bool)
+        weak[2, 0:4] = True  # a line reaching a strong pixel through a diagonal step
+        weak[3, 4] = True
+        weak[0, 7] = True  # weak and on its own
+        strong = np.zeros_like(weak)
+        strong[3, 4] = True
+        expected = weak.copy()
+        expected[0, 7] = False
+        np.testing.assert_array_equal(hysteresis(weak, strong), expected)
+
+    def test_color_vs_grayscale(self):
+        # Red next to a green of (almost) the same brightness: invisible in grayscale
+        img = Image.new("RGB", (12, 8), (200, 0, 0))
+        img.paste((0, 100, 0), (6, 0, 12, 8))
+        gray_left, gray_right = img.convert("L").getpixel((0, 0)), img.convert("L").getpixel((11, 0))
+        self.assertLessEqual(abs(gray_left - gray_right), 1)
+        color = edge_operators.detect_edges(img, "sobel")
+        gray = edge_operators.detect_edges(img, "sobel", grayscale=True)
+        self.assertEqual((color.mode, color.size), ("L", (12, 8)))
+        self.assertEqual(np.unique(np.asarray(color)).tolist(), [0, 255])
+        self.assertEqual(gray.getextrema(), (0, 0))
+
+    def test_invalid_arguments(self):
+        pixels = step_image()
+        with self.assertRaises(ValueError):
+            edge_mask(pixels, "prewitt")
+        with self.assertRaises(ValueError):
+            edge_mask(pixels, "canny", low=30, high=10)
+        with self.assertRaises(ValueError):
+            EdgeOperator("prewitt")
+        with self.assertRaises(ValueError):
+            EdgeOperator("canny", low=20)  # above the default high
+        for sigma in (0, -1.5, float("nan")):
+            with self.assertRaises(ValueError):
+                edge_mask(pixels, "canny", sigma=sigma)
+            with self.assertRaises(ValueError):
+                EdgeOperator("canny", sigma=sigma)
+        for flags in (["--operator", "sobel", "--low", "1"], ["--operator", "canny", "--sigma", "0"]):
+            with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+                edge_operators.main(["in.jpg", "out.png", *flags])
+
+    def test_pipeline_stage(self):
+        self.assertEqual(EDGE_OPERATORS, ["neighbour", *OPERATORS])
+        self.assertIsInstance(edge_stage("neighbour"), EdgeDetect)
+        img = Image.fromarray(step_image()).convert("RGB")
+        stage = edge_stage("canny", low=4, high=None)
+        self.assertEqual(stage.thresholds, {"low": 4})
+        # Settings the operator doesn't read are dropped, so they can't change the fingerprint
+        self.assertEqual(edge_stage("sobel", low=1, high=2).thresholds, {})
+        self.assertEqual(edge_stage("canny", threshold=3).thresholds, {})
+        self.assertEqual(Pipeline([edge_stage("sobel", low=1)]).fingerprint(), Pipeline([edge_stage("sobel")]).fingerprint())
+        self.assertEqual(stage.apply(img).tobytes(), edge_operators.detect_edges(img, "canny", low=4).tobytes())
+        stages = [
+            edge_stage("sobel"), edge_stage("sobel", threshold=20), edge_stage("sobel", grayscale=True),
+            edge_stage("scharr"), edge_stage("neighbour"),
+        ]
+        self.assertEqual(len({Pipeline([stage]).fingerprint() for stage in stages}), len(stages))
+
+
+if __name__ == '__main__':
+    unittest.main()
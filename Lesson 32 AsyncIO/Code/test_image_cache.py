@@ -0,0 +1,76 @@
+# Unit tests for image_cache.py
+import tempfile
+import unittest
+from pathlib import Path
+
+from image_cache import ImageCache, run_cached_batch
+from image_pipeline import Gamma, Invert, Pipeline
+from test_edge_detection import random_image
+
+
+class TestImageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        root = Path(self.tmp.name)
+        self.src_dir, self.out_dir, self.cache_dir = root / "src", root / "out", root / "cache"
+        self.src_dir.mkdir()
+        self.paths = []
+        for seed in range(3):
+            path = self.src_dir / f"image_{seed}.png"
+            random_image(24, 16, seed=seed).save(path)
+            self.paths.append(path)
+
+    def run_batch(self, pipeline, force=False, cache=None):
+        cache = cache or ImageCache(self.cache_dir)
+        results = run_cached_batch(pipeline, self.paths, self.out_dir, cache, force=force, executor="thread")
+        return cache, results
+
+    def test_second_run_is_served_from_cache(self):
+        pipeline = Pipeline([Invert()])
+        first, _ = self.run_batch(pipeline)
+        expected = {p.name: p.read_bytes() for p in self.out_dir.iterdir()}
+        second, results = self.run_batch(pipeline)
+        self.assertEqual((first.stats.hits, first.stats.misses), (0, 3))
+        self.assertEqual((second.stats.hits, second.stats.misses), (3, 0))
+        self.assertTrue(all("cache" in timings for _, timings in results))
+        self.assertEqual(expected, {p.name: p.read_bytes() for p in self.out_dir.iterdir()})
+
+    def test_changed_input_or_settings_miss(self):
+        self.run_batch(Pipeline([Invert()]))
+        random_image(24, 16, seed=99).save(self.paths[0])
+        cache, _ = self.run_batch(Pipeline([Invert()]))
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (2, 1))
+        cache, _ = self.run_batch(Pipeline([Invert(), Gamma(0.5)]))
+        self.assertEqual(cache.stats.hits, 0)
+
+    def test_force_recomputes(self):
+        pipeline = Pipeline([Invert()])
+        self.run_batch(pipeline)
+        cache, _ = self.run_batch(pipeline, force=True)
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (0, 3))
+
+    def test_lru_eviction_keeps_cache_under_budget(self):
+        cache, _ = self.run_batch(Pipeline([Invert()]))
+        sizes = sorted(entry["size"] for entry in cache._entries.values())
+        budget = sizes[-1] + sizes[-2]  # room for two outputs
+        small = ImageCache(self.cache_dir, max_bytes=budget)
+        self.run_batch(Pipeline([Gamma(0.5)]), cache=small)
+        self.assertLessEqual(small.total_bytes, budget)
+        self.assertGreater(small.stats.evicted, 0)
+        self.assertEqual(len(list((self.cache_dir / "objects").rglob("*.png"))), len(small))
+
+    def test_overwritten_output_does_not_poison_cache(self):
+        pipeline = Pipeline([Invert()])
+        self.run_batch(pipeline)
+        expected = (self.out_dir / "image_0.png").read_bytes()
+        # Writing into an output that is a hard link to the cache object
+        with open(self.out_dir / "image_0.png", "wb") as f:
+            f.write(b"garbage")
+        cache, _ = self.run_batch(pipeline)
+        self.assertEqual(cache.stats.misses, 1)
+        self.assertEqual(expected, (self.out_dir / "image_0.png").read_bytes())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# Unit tests for pipeline_controller.py
+import asyncio
+import io
+import json
+import os
+import signal
+import tempfile
+import unittest
+from pathlib import Path
+
+from pipeline_controller import DONE, FAILED, PipelineController, ProgressDisplay
+
+
+class TestPipelineController(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        self.resume_path = self.root / "run.json"
+        self.bad = {"b"}
+        self.calls: list[str] = []
+
+    async def download(self, item, index):
+        self.calls.append(item)
+        await asyncio.sleep(0.01 * index)
+        if item in self.bad:
+            raise ValueError(f"bad url {item}\nsecond line")
+        return self.root / f"{item}.raw"
+
+    async def process(self, path):
+        out = path.with_suffix(".out")
+        out.write_text("edges")
+        return out
+
+    def run_items(self, items, events=None, **options):
+        controller = PipelineController(
+            self.download, self.process, self.resume_path, listeners=[events.append] if events is not None else [],
+        )
+        return controller, asyncio.run(controller.run(items, **options))
+
+    def test_one_failure_does_not_abort_the_batch(self):
+        events = []
+        _, summary = self.run_items(["a", "b", "c"], events)
+        self.assertEqual(sorted(summary.done), ["a", "c"])
+        self.assertEqual(summary.failed, {"b": "ValueError: bad url b"})
+        states = [event.state for event in events if event.item == "a"]
+        self.assertEqual(states, ["queued", "downloading", "processing", "done"])
+        self.assertEqual([event.state for event in events if event.item == "b"][-1], FAILED)
+
+        state = json.loads(self.resume_path.read_text())
+        self.assertEqual(sorted(state["done"]), ["a", "c"])
+        self.assertEqual(list(state["failed"]), ["b"])
+
+    def test_resume_skips_done_and_retries_failures(self):
+        self.run_items(["a", "b", "c"])
+        self.bad.clear()
+        self.calls.clear()
+        _, summary = self.run_items(["a", "b", "c", "d"], retry_failed=True)
+        self.assertEqual((self.calls, sorted(summary.skipped)), (["b"], ["a", "c", "d"]))
+
+        self.calls.clear()
+        (self.root / "c.out").unlink()  # a missing output runs again
+        _, summary = self.run_items(["a", "b", "c", "d"])
+        self.assertEqual(sorted(self.calls), ["c", "d"])
+        self.assertEqual(summary.failed, {})
+        self.assertEqual(json.loads(self.resume_path.read_text())["failed"], {})
+
+    def test_stop_finishes_in_flight_items_only(self):
+        controller = PipelineController(self.download, self.process, self.resume_path, max_active=2)
+
+        def stop_after_first(event):
+            if event.state == DONE:
+                controller.stop()
+
+        controller.listeners.append(stop_after_first)
+        summary = asyncio.run(controller.run(["a", "c", "d", "e", "f"]))
+        self.assertEqual(sorted(summary.done), ["a", "c"])  # both were in flight when a finished
+        self.assertEqual(sorted(summary.not_started), ["d", "e", "f"])
+        self.assertTrue(summary.interrupted)
+
+    @unittest.skipIf(os.name == "nt", "os.kill(SIGINT) ends the process on Windows")
+    def test_ctrl_c_is_graceful(self):
+        controller = PipelineController(self.download, self.process, self.resume_path, max_active=1)
+
+        def interrupt_after_first(event):
+            if event.state == DONE:
+                os.kill(os.getpid(), signal.SIGINT)
+
+        controller.listeners.append(interrupt_after_first)
+        summary = asyncio.run(controller.run(["a", "c", "d"]))
+        self.assertEqual((list(summary.done), summary.not_started), (["a"], ["c", "d"]))
+        self.assertIs(signal.getsignal(signal.SIGINT), signal.default_int_handler)
+
+    def test_progress_display_counts_and_eta(self):
+        stream = io.StringIO()
+        display = ProgressDisplay(stream)
+        controller = PipelineController(self.download, self.process, self.root / "other.json", listeners=[display])
+        asyncio.run(controller.run(["x", "b", "y"]))
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)  # not a terminal: one line per finished item
+        self.assertTrue(lines[-1].endswith("ETA -"))
+        self.assertIn("3/3 finished (1 failed)", lines[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+# Unit tests for pixel_buffer.py
+import unittest
+
+from PIL import Image
+
+from pixel_buffer import PixelBuffer
+from test_edge_detection import random_image
+
+
+class TestPixelBuffer(unittest.TestCase):
+    def test_round_trip(self):
+        img = random_image(7, 5, seed=1)
+        for mode in ("RGB", "L", "RGBA"):
+            with self.subTest(mode=mode):
+                expected = img.convert(mode)
+                pixels = PixelBuffer.from_image(img, mode)
+                self.assertEqual((pixels.size, len(pixels.data)), ((7, 5), 7 * 5 * pixels.channels))
+                out = pixels.to_image()
+                self.assertEqual((out.mode, out.size, out.tobytes()), (mode, (7, 5), expected.tobytes()))
+
+    def test_rgb_access_matches_getpixel(self):
+        img = random_image(6, 4, seed=2)
+        pixels = PixelBuffer.from_image(img)
+        for x, y in [(0, 0), (5, 0), (0, 3), (5, 3), (2, 1)]:
+            self.assertEqual(pixels.rgb(x, y), img.getpixel((x, y)))
+        self.assertEqual(pixels.index(2, 1), 8)
+        self.assertEqual(pixels.offset(2, 1), 24)
+
+        pixels.set_rgb(2, 1, (1, 2, 3))
+        self.assertEqual(pixels.to_image().getpixel((2, 1)), (1, 2, 3))
+
+    def test_row_is_a_view(self):
+        pixels = PixelBuffer.new((4, 3))
+        row = pixels.row(1)
+        self.assertEqual(len(row), 12)
+        row[3:6] = b"\xff\x80\x01"
+        self.assertEqual(pixels.rgb(1, 1), (255, 128, 1))
+        self.assertEqual(pixels.to_image().getpixel((1, 1)), (255, 128, 1))
+
+    def test_invalid_buffers(self):
+        with self.assertRaises(ValueError):
+            PixelBuffer(bytearray(10), (2, 2))
+        with self.assertRaises(ValueError):
+            PixelBuffer.new((2, 2), "CMYK")
+        self.assertEqual(PixelBuffer.from_image(Image.new("P", (2, 2))).mode, "RGB")
+
+
+if __name__ == '__main__':
+    unittest.main()
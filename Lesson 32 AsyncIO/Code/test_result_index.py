@@ -0,0 +1,116 @@
+# Unit tests for result_index.py
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import result_index
+from image_cache import ImageCache, run_cached_batch
+from image_pipeline import Invert, Pipeline
+from result_index import ResultIndex, make_record
+from test_edge_detection import random_image
+
+
+class TestResultIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        self.db = self.root / "index.db"
+        self.paths = []
+        for seed in range(5):
+            path = self.root / f"image_{seed}.png"
+            random_image(24, 16, seed=seed).save(path)
+            self.paths.append(path)
+
+    def record(self, path, seconds, fingerprint="fp", source_hash=None):
+        return make_record(
+            f"https://example.com/{path.name}", path, source_hash or f"{path.stem:0<64}", "key", fingerprint,
+            "Pipeline([])", path, {"load": seconds / 2, "save": seconds / 2},
+        )
+
+    def test_records_are_written_in_batches_and_upserted(self):
+        with ResultIndex(self.db, batch_size=2) as index:
+            for i, path in enumerate(self.paths):
+                index.add(self.record(path, seconds=i))
+            self.assertEqual(index.transactions, 2)  # the fifth record is still pending
+            index.add(self.record(self.paths[0], seconds=10))  # same source and pipeline: replaced
+            self.assertEqual(index.stats()["images"], 5)
+            self.assertEqual(index.transactions, 3)
+            self.assertEqual([r.source_path for r in index.slowest(2)], [str(self.paths[0]), str(self.paths[4])])
+            self.assertEqual(index.slowest(1)[0].timings, {"load": 5.0, "save": 5.0})
+
+    def test_known_does_not_flush_the_batch(self):
+        with ResultIndex(self.db, batch_size=10) as index:
+            index.add(self.record(self.paths[0], seconds=1))
+            index.flush()
+            for path in self.paths[1:]:
+                index.add(self.record(path, seconds=1))
+                self.assertEqual(index.known(path, "fp").source_path, str(path))  # from the pending batch
+                self.assertIsNotNone(index.known(self.paths[0], "fp"))  # from SQLite
+                self.assertIsNone(index.known(path, "other"))
+            self.assertEqual(index.transactions, 1)
+            os.utime(self.paths[1], ns=(0, 0))
+            self.assertIsNone(index.known(self.paths[1], "fp"))  # changed since it was recorded
+        with ResultIndex(self.db) as index:
+            self.assertEqual(index.stats()["images"], 5)
+
+    def test_queries(self):
+        with ResultIndex(self.db) as index:
+            for i, path in enumerate(self.paths):
+                index.add(self.record(path, seconds=i, source_hash=f"{'ab' if i < 2 else 'cd'}{i:0<62}"))
+            self.assertEqual(len(index.find_hash("ab")), 2)
+            self.assertEqual(len(index.find_hash("cd3")), 1)
+            self.assertEqual([r.source for r in index.by_source("*image_[34].png")], [
+                "https://example.com/image_3.png", "https://example.com/image_4.png",
+            ])
+            self.paths[1].unlink()
+            self.assertEqual([r.output for r in index.missing_outputs()], [str(self.paths[1])])
+            self.assertEqual(index.slowest(1)[0].width, 24)
+
+    def test_known_skips_hashing_unchanged_files(self):
+        pipeline = Pipeline([Invert()])
+        cache = ImageCache(self.root / "cache")
+        out_dir = self.root / "out"
+        with ResultIndex(self.db) as index:
+            run_cached_batch(pipeline, self.paths, out_dir, cache, executor="thread", index=index)
+            first = {r.source_path: r for r in index.by_source("*")}
+            self.assertFalse(any(r.cached for r in first.values()))
+
+            random_image(24, 16, seed=99).save(self.paths[0])
+            with mock.patch.object(cache, "hashes_for", wraps=cache.hashes_for) as hashes_for:
+                results = run_cached_batch(pipeline, self.paths, out_dir, cache, executor="thread", index=index)
+            self.assertEqual([call.args[0] for call in hashes_for.call_args_list], [self.paths[0]])
+            self.assertEqual(sum("cache" in timings for _, timings in results), 4)
+
+            second = {r.source_path: r for r in index.by_source("*")}
+            changed = str(self.paths[0].resolve())
+            self.assertNotEqual(second[changed].source_hash, first[changed].source_hash)
+            # Unchanged cache hits keep the timings of the run that processed them
+            unchanged = str(self.paths[1].resolve())
+            self.assertEqual(second[unchanged], first[unchanged])
+
+    def test_cli(self):
+        with ResultIndex(self.db) as index:
+            for i, path in enumerate(self.paths):
+                index.add(self.record(path, seconds=i))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result_index.main(["--db", os.fspath(self.db), "--json", "stats"])
+        stats = json.loads(output.getvalue())
+        self.assertEqual((stats["images"], stats["total_seconds"]), (5, 10.0))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result_index.main(["--db", os.fspath(self.db), "slowest", "-n", "2"])
+        lines = output.getvalue().splitlines()
+        self.assertIn("image_4.png", lines[1])
+        self.assertEqual(lines[-1], "2 result(s)")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+# Unit tests for shared_images.py: shared-memory handoff must match the in-process backend
+import asyncio
+import io
+import tempfile
+import unittest
+from multiprocessing import shared_memory
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+import edge_detection
+import shared_images
+from PIL import Image
+
+from shared_images import SharedArena, attached, edge_mask_shared, edges_image, process_file_shared, shared_executor
+from test_edge_detection import random_image
+
+
+class TestSharedImages(unittest.TestCase):
+    def test_worker_output_matches_numpy_backend(self):
+        images = [random_image(40, 30, seed=seed) for seed in range(3)]
+        with SharedArena() as arena, shared_executor(max_workers=2) as executor:
+            pairs = [(arena.put_image(img), arena.empty((img.height, img.width))) for img in images]
+            refs = list(executor.map(edge_mask_shared, *zip(*pairs)))
+            for img, ref in zip(images, refs):
+                expected = edge_detection.detect_edges_numpy(img)
+                self.assertEqual(expected.tobytes(), edges_image(arena.view(ref)).tobytes())
+
+    def test_put_encoded_decodes_into_shared_block(self):
+        img = random_image(16, 9, seed=4)
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        with SharedArena() as arena:
+            ref = arena.put_encoded(buffer.getvalue())
+            self.assertEqual(ref.shape, (9, 16, 3))
+            with attached(ref) as pixels:
+                np.testing.assert_array_equal(pixels, np.asarray(img))
+
+    def test_process_file_shared_saves_the_edges_and_frees_its_blocks(self):
+        img = random_image(24, 18, seed=5)
+        with tempfile.TemporaryDirectory() as tmp, SharedArena() as arena, shared_executor(1) as executor:
+            src, dst = Path(tmp) / "in.png", Path(tmp) / "out.png"
+            img.save(src)
+            saved, timings = asyncio.run(process_file_shared(arena, executor, src, dst))
+            self.assertEqual(saved, dst)
+            self.assertEqual(set(timings), {"decode", "edges", "save"})
+            self.assertFalse(arena._blocks)
+            with Image.open(dst) as out:
+                self.assertEqual(out.tobytes(), edge_detection.detect_edges_numpy(img).tobytes())
+
+    def test_no_resource_tracker_outside_posix(self):
+        with mock.patch.object(shared_images.resource_tracker, "ensure_running") as ensure_running:
+            with mock.patch.object(shared_images.os, "name", "nt"):
+                shared_images.share_resource_tracker()
+            ensure_running.assert_not_called()
+            shared_images.share_resource_tracker()
+            self.assertEqual(ensure_running.call_count, 1 if shared_images.os.name == "posix" else 0)
+
+    def test_close_unlinks_every_block(self):
+        with SharedArena() as arena:
+            refs = [arena.empty((4, 4)), arena.put_image(random_image(3, 3))]
+        for ref in refs:
+            with self.assertRaises(FileNotFoundError):
+                shared_memory.SharedMemory(name=ref.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
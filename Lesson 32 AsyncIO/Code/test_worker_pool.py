@@ -0,0 +1,37 @@
+# Unit tests for worker_pool.py
+import os
+import unittest
+
+from worker_pool import WorkerPool
+
+
+def square(x):
+    return x * x
+
+
+def worker_pid(_):
+    return os.getpid()
+
+
+class TestWorkerPool(unittest.TestCase):
+    def test_map_keeps_order_with_automatic_chunks(self):
+        with WorkerPool(2) as pool:
+            self.assertEqual(list(pool.map(square, range(50))), [x * x for x in range(50)])
+            self.assertEqual(pool.submit(square, 7).result(), 49)
+
+    def test_pool_is_reused_between_runs(self):
+        with WorkerPool(1, recycle_after=None) as pool:
+            first = set(pool.map(worker_pid, range(4)))
+            second = set(pool.map(worker_pid, range(4)))
+            self.assertEqual(first, second)
+            self.assertEqual(pool.recycles, 0)
+
+    def test_workers_are_recycled_after_n_tasks(self):
+        with WorkerPool(1, recycle_after=3) as pool:
+            pids = [set(pool.map(worker_pid, range(3))) for _ in range(3)]
+            self.assertEqual(pool.recycles, 2)
+            self.assertEqual(len(set.union(*pids)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
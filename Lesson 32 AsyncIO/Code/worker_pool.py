@@ -0,0 +1,123 @@
+# Long-lived, pre-warmed process pool shared by the image demos.
+#
+# Creating a ProcessPoolExecutor per run means every run pays for starting the
+# workers and for importing Pillow/NumPy in each of them, which dominates when
+# a batch is only a few images. A WorkerPool is created once and reused:
+#
+#   pool = get_pool()                       # module-wide pool, shut down at exit
+#   results = list(pool.map(process, paths))   # chunksize picked automatically
+#   await loop.run_in_executor(pool, process, path)
+#
+# Workers run warm_up() when they start (imports, plugin registry, one tiny
+# JPEG round trip and edge detection). After roughly recycle_after tasks per
+# worker the pool is swapped for a fresh one, so a leaky task can't grow a
+# worker forever. The retired pool finishes the work it already has.
+# (ProcessPoolExecutor's own max_tasks_per_child can deadlock on Python 3.11
+# and forces the slow spawn start method, so recycling is done here.)
+import atexit
+import importlib
+import io
+import math
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+
+WARM_MODULES = ("numpy", "PIL.Image", "PIL.JpegImagePlugin", "PIL.PngImagePlugin", "edge_detection", "image_pipeline")
+RECYCLE_AFTER = 200  # tasks per worker
+CHUNKS_PER_WORKER = 4  # enough chunks to keep workers balanced, few enough to amortise the IPC
+
+
+def warm_up(modules: tuple[str, ...] = WARM_MODULES):
+    """Worker initializer: pay import and first-call costs before the first task."""
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass  # optional extras such as NumPy
+
+    from PIL import Image
+
+    from edge_detection import detect_edges
+
+    Image.init()
+    buffer = io.BytesIO()
+    tiny = Image.new("RGB", (8, 8))
+    tiny.save(buffer, format="JPEG")
+    buffer.seek(0)
+    with Image.open(buffer) as img:
+        detect_edges(img.convert("RGB"))
+
+
+def _ready(_=None) -> int:
+    return os.getpid()
+
+
+class WorkerPool(Executor):
+    """A ProcessPoolExecutor that is started once, warmed up and reused across runs."""
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        recycle_after: int | None = RECYCLE_AFTER,
+        warm_modules: tuple[str, ...] = WARM_MODULES,
+    ):
+        self.max_workers = max_workers or os.cpu_count()
+        self.recycle_after = recycle_after
+        self.warm_modules = warm_modules
+        self.recycles = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._tasks = 0
+        self._lock = threading.Lock()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=warm_up,
+            initargs=(self.warm_modules,),
+        )
+
+    def _reserve(self, tasks: int) -> ProcessPoolExecutor:
+        """The executor that should run the next `tasks` tasks."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+            elif self.recycle_after and self._tasks >= self.recycle_after * self.max_workers:
+                self._executor.shutdown(wait=False)  # queued work still completes
+                self._executor = self._new_executor()
+                self._tasks = 0
+                self.recycles += 1
+            self._tasks += tasks
+            return self._executor
+
+    def start(self) -> "WorkerPool":
+        """Start and warm the workers now instead of on the first batch."""
+        list(self._reserve(0).map(_ready, range(self.max_workers)))
+        return self
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        return self._reserve(1).submit(fn, *args, **kwargs)
+
+    def map(self, fn, *iterables, timeout=None, chunksize: int | None = None):
+        columns = [list(it) for it in iterables]
+        count = min(map(len, columns), default=0)
+        if chunksize is None:
+            chunksize = max(1, math.ceil(count / (self.max_workers * CHUNKS_PER_WORKER)))
+        return self._reserve(count).map(fn, *columns, timeout=timeout, chunksize=chunksize)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+_default_pool: WorkerPool | None = None
+
+
+def get_pool(max_workers: int | None = None) -> WorkerPool:
+    """The module-wide pool; max_workers only applies when it is first created."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = WorkerPool(max_workers)
+        atexit.register(_default_pool.shutdown)
+    return _default_pool
@@ -6,8 +6,12 @@ from fastapi.responses import JSONResponse
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import Annotated
+# fastapi_blog sits next to Code/, so run from the Lesson 34 FastAPI folder:
+#   uvicorn Code.CRUD.main:app --reload
+from fastapi_blog.middleware import CompressionMiddleware
 
 app=FastAPI()
+app.add_middleware(CompressionMiddleware,minimum_size=1000)
 Base.metadata.create_all(bind=engine)
 # CREATE API:POST
 @app.post('/api/students',response_model=StudentRespone,status_code=status.HTTP_201_CREATED)
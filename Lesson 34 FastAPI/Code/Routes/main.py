@@ -1,6 +1,10 @@
 from fastapi import FastAPI
 from .routers.users import router as users_router
+# fastapi_blog sits next to Code/, so run from the Lesson 34 FastAPI folder:
+#   uvicorn Code.Routes.main:app --reload
+from fastapi_blog.middleware import CompressionMiddleware
 
 app=FastAPI()
+app.add_middleware(CompressionMiddleware,minimum_size=1000)
 
-app.include_router(users_router)
\ No newline at end of file
+app.include_router(users_router)
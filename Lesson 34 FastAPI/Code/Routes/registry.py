@@ -0,0 +1,109 @@
+import json
+import os
+from pathlib import Path
+from typing import Iterable
+
+class DuplicateUserError(Exception):
+    def __init__(self,ids:list[int]):
+        self.ids=ids
+        super().__init__(f"User already exist: {ids}")
+
+class UserRegistry:
+    """In-memory users keyed by id, with an optional JSON snapshot on disk.
+
+    Lookups and duplicate checks are dict operations (O(1)) instead of a scan
+    over a list. When snapshot_path is set the registry is loaded from it on
+    start-up. New users are appended to a journal next to it (one JSON line
+    each, users.json -> users.json.log), so a create writes only the new users.
+    Once the journal holds as many users as the snapshot (and at least
+    compact_after), both are compacted into a fresh snapshot: each user is
+    rewritten a bounded number of times, so writes stay O(1) per user.
+    """
+
+    def __init__(self,snapshot_path:str|Path|None=None,compact_after:int=1000):
+        self.snapshot_path=Path(snapshot_path) if snapshot_path else None
+        self.journal_path=self.snapshot_path.with_name(self.snapshot_path.name+".log") if self.snapshot_path else None
+        self.compact_after=compact_after
+        self._users:dict[int,dict]={}
+        self._journaled=0  # users in the journal, not yet in the snapshot
+        if self.snapshot_path:
+            self.load()
+
+    def __len__(self)->int:
+        return len(self._users)
+
+    def __contains__(self,user_id:int)->bool:
+        return user_id in self._users
+
+    def all(self)->list[dict]:
+        # dicts keep insertion order, so this matches the old list order
+        return list(self._users.values())
+
+    def get(self,user_id:int)->dict|None:
+        return self._users.get(user_id)
+
+    def add(self,user:dict)->dict:
+        return self.add_many([user])[0]
+
+    def add_many(self,users:Iterable[dict])->list[dict]:
+        # All-or-nothing: reject the whole batch if any id is taken or repeated
+        new_users:dict[int,dict]={}
+        duplicates=[]
+        for user in users:
+            if user['id'] in self._users or user['id'] in new_users:
+                duplicates.append(user['id'])
+            else:
+                new_users[user['id']]=user
+        if duplicates:
+            raise DuplicateUserError(duplicates)
+        self._users.update(new_users)
+        self._append(new_users.values())
+        return list(new_users.values())
+
+    def load(self):
+        self._users={}
+        if self.snapshot_path.exists():
+            with self.snapshot_path.open() as f:
+                self._users={user['id']:user for user in json.load(f)}
+        self._journaled=0
+        if not self.journal_path.exists():
+            return
+        with self.journal_path.open() as f:
+            lines=f.readlines()
+        for line in lines:
+            try:
+                # Every complete line ends in "\n"; without it the write was cut short,
+                # even if what made it to disk happens to parse as JSON
+                user=json.loads(line) if line.endswith("\n") else None
+            except json.JSONDecodeError:
+                user=None
+            if user is None:
+                # The users before it are intact. Compact now, dropping the broken line,
+                # or the next append would be glued onto it.
+                self.save()
+                return
+            self._users[user['id']]=user
+            self._journaled+=1
+
+    def _append(self,users:Iterable[dict]):
+        if not self.snapshot_path:
+            return
+        lines="".join(json.dumps(user)+"\n" for user in users)
+        with self.journal_path.open("a") as f:
+            f.write(lines)
+        self._journaled+=lines.count("\n")
+        if self._journaled>=max(self.compact_after,len(self._users)-self._journaled):
+            self.save()
+
+    def save(self):
+        """Compact: write every user to the snapshot and empty the journal."""
+        if not self.snapshot_path:
+            return
+        # Write to a temp file then rename, so a crash never leaves a half-written snapshot
+        tmp_path=self.snapshot_path.with_name(self.snapshot_path.name+".tmp")
+        with tmp_path.open("w") as f:
+            json.dump(self.all(),f)
+        os.replace(tmp_path,self.snapshot_path)
+        # A crash here only leaves journal lines the snapshot already has; loading them again is harmless
+        self.journal_path.unlink(missing_ok=True)
+        self._journaled=0
@@ -1,27 +1,34 @@
+import os
 from fastapi import APIRouter,HTTPException,status
-from Routes.schemas.user import UserCreate,UserResponse
+from ..registry import DuplicateUserError,UserRegistry
+from ..schemas.user import UserCreate,UserResponse
 
 router=APIRouter(prefix='/users',tags=["Users"])
 
-users:list[dict]=[]
+# Set USERS_SNAPSHOT=users.json to keep users across restarts
+users=UserRegistry(snapshot_path=os.getenv("USERS_SNAPSHOT"))
 
 @router.get('/',response_model=list[UserResponse])
 def get_users():
-    return users
+    return users.all()
 
 @router.get('/{id}',response_model=UserResponse)
 def get_user(id:int):
-    for user in users:
-        if (user.get('id')==id):
-            return user
-    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    user=users.get(id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return user
 
 @router.post('/',response_model=UserResponse,status_code=status.HTTP_201_CREATED)
 def create_user(user:UserCreate):
-    for u in users:
-        if u.get('id')==user.id:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="User already exist")
-    new_user={'id':user.id,'name':user.name}
-    users.append(new_user)
-    return new_user
-    
\ No newline at end of file
+    try:
+        return users.add({'id':user.id,'name':user.name})
+    except DuplicateUserError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="User already exist")
+
+@router.post('/bulk',response_model=list[UserResponse],status_code=status.HTTP_201_CREATED)
+def create_users(new_users:list[UserCreate]):
+    try:
+        return users.add_many({'id':user.id,'name':user.name} for user in new_users)
+    except DuplicateUserError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail=f"User already exist: {e.ids}")
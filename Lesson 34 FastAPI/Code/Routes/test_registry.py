@@ -0,0 +1,55 @@
+# Unit tests for registry.py: the snapshot + journal must survive restarts and torn writes
+# Run from the Code folder: python -m unittest Routes.test_registry
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from Routes.registry import DuplicateUserError,UserRegistry
+
+
+class TestUserRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp=tempfile.TemporaryDirectory()
+        self.path=Path(self.tmp.name)/"users.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def users(self,ids):
+        return [{'id':i,'name':f"user {i}"} for i in ids]
+
+    def test_reload_from_snapshot_and_journal(self):
+        registry=UserRegistry(self.path,compact_after=4)
+        for user in self.users(range(10)):
+            registry.add(user)
+        self.assertTrue(self.path.exists())  # compacted at least once
+        self.assertTrue(registry.journal_path.exists())
+        self.assertEqual(UserRegistry(self.path).all(),self.users(range(10)))
+
+    def test_duplicates_are_rejected_as_a_batch(self):
+        registry=UserRegistry(self.path)
+        registry.add_many(self.users([1,2]))
+        with self.assertRaises(DuplicateUserError) as cm:
+            registry.add_many(self.users([3,2]))
+        self.assertEqual(cm.exception.ids,[2])
+        self.assertEqual(UserRegistry(self.path).all(),self.users([1,2]))
+
+    def test_torn_last_line_is_dropped(self):
+        # Cut mid-line, or cut just before the "\n" of a line that is valid JSON on its own
+        for name,torn in (("mid-line",'{"id": 3, "na'),("no newline",json.dumps(self.users([3])[0]))):
+            with self.subTest(name):
+                path=self.path.with_name(f"{name}.json")
+                registry=UserRegistry(path)
+                registry.add_many(self.users([1,2]))
+                with registry.journal_path.open("a") as f:
+                    f.write(torn)
+                reloaded=UserRegistry(path)
+                self.assertEqual(reloaded.all(),self.users([1,2]))
+                # Appending after the torn write must not corrupt the next load
+                reloaded.add(self.users([4])[0])
+                self.assertEqual(UserRegistry(path).all(),self.users([1,2,4]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# Benchmark: buffered TemplateResponse ("/") vs streamed template ("/stream")
+# Measures time to first byte, total time and peak Python memory while rendering N students.
+# Run from this folder: python bench_streaming.py 100000
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+os.chdir(Path(__file__).resolve().parent)  # templates/ is resolved relative to the cwd
+
+import main
+
+
+def make_students(count:int)->list[dict]:
+    branches=["CSE","ECE","EE","ME","CE"]
+    subjects=["DBMS","OS","CN","VLSI","DSA"]
+    return [
+        {
+            "name":f"Student {i}",
+            "branch":branches[i%len(branches)],
+            "subjects":subjects[:(i%len(subjects))+1],
+        }
+        for i in range(count)
+    ]
+
+
+async def fetch(path:str,trace_memory:bool=False)->dict:
+    # Drive the ASGI app directly so no client library buffers the body for us
+    scope={
+        "type":"http","asgi":{"version":"3.0"},"http_version":"1.1","method":"GET",
+        "scheme":"http","path":path,"raw_path":path.encode(),"root_path":"","query_string":b"",
+        "headers":[(b"host",b"bench")],"client":("127.0.0.1",1),"server":("bench",80),
+    }
+    stats={"ttfb":None,"bytes":0,"chunks":0}
+    start=time.perf_counter()
+
+    async def receive():
+        await asyncio.sleep(3600)  # never disconnect
+        return {"type":"http.disconnect"}
+
+    async def send(message):
+        if message["type"]=="http.response.body":
+            body=message.get("body",b"")
+            if body and stats["ttfb"] is None:
+                stats["ttfb"]=time.perf_counter()-start
+            stats["bytes"]+=len(body)
+            stats["chunks"]+=1 if body else 0
+
+    if trace_memory:
+        tracemalloc.start()
+    await main.app(scope,receive,send)
+    stats["total"]=time.perf_counter()-start
+    if trace_memory:
+        _,peak=tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats["peak_mb"]=peak/1024/1024
+    return stats
+
+
+async def run(counts:list[int]):
+    print(f"{'students':>9} {'route':<8} {'ttfb(ms)':>9} {'total(s)':>9} {'peak(MB)':>9} {'size(MB)':>9} {'chunks':>7}")
+    for count in counts:
+        main.students[:]=make_students(count)
+        for path in ("/","/stream"):
+            s=await fetch(path)
+            # tracemalloc slows allocation-heavy code a lot, so memory gets its own pass
+            s["peak_mb"]=(await fetch(path,trace_memory=True))["peak_mb"]
+            print(
+                f"{count:>9} {path:<8} {s['ttfb']*1000:>9.1f} {s['total']:>9.2f} "
+                f"{s['peak_mb']:>9.1f} {s['bytes']/1024/1024:>9.1f} {s['chunks']:>7}"
+            )
+
+
+if __name__=="__main__":
+    sizes=[int(arg) for arg in sys.argv[1:]] or [1_000,10_000,100_000]
+    asyncio.run(run(sizes))
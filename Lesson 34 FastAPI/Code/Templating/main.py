@@ -1,10 +1,20 @@
+import asyncio
 from fastapi import FastAPI,Request
-from typing import List
+from typing import AsyncIterator,List
+from fastapi.responses import StreamingResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment
 
 app=FastAPI()
 templates=Jinja2Templates(directory="templates")
 
+# Async twin of templates.env: same loader, but templates can loop over async generators
+# and render with generate_async() instead of building the whole page in memory
+stream_env=Environment(loader=templates.env.loader,autoescape=True,enable_async=True)
+
+STREAM_CHUNK_SIZE=16*1024  # flush to the client roughly every 16KB of rendered HTML
+ROW_BATCH_SIZE=500
+
 students:List[dict]=[
     {
         "name":"John Doe",
@@ -21,13 +31,42 @@ students:List[dict]=[
         "branch":"EE",
         "subjects":["DBMS","OS","CN"]
     }
-    
+
 ]
 
+async def iter_students(batch_size:int=ROW_BATCH_SIZE)->AsyncIterator[dict]:
+    # Rows are fed in batches like a DB cursor's fetchmany(); swap the list slice
+    # for `await result.fetchmany(batch_size)` when the data lives in a database
+    for start in range(0,len(students),batch_size):
+        for student in students[start:start+batch_size]:
+            yield student
+        await asyncio.sleep(0)  # let the event loop send what has been rendered so far
+
+async def render_stream(name:str,context:dict,chunk_size:int=STREAM_CHUNK_SIZE)->AsyncIterator[str]:
+    # generate_async() yields tiny fragments, so group them into chunk_size pieces before sending
+    template=stream_env.get_template(name)
+    buffer:list[str]=[]
+    size=0
+    async for fragment in template.generate_async(context):
+        buffer.append(fragment)
+        size+=len(fragment)
+        if size>=chunk_size:
+            yield "".join(buffer)
+            buffer.clear()
+            size=0
+    if buffer:
+        yield "".join(buffer)
+
 @app.get("/",name="home",include_in_schema=False)
 def home(request:Request):
     return templates.TemplateResponse(request,"home.html",{"students":students})
 
+@app.get("/stream",name="home_stream",include_in_schema=False)
+async def home_stream(request:Request):
+    # Same page as "/", but the first bytes leave before the student list is fully rendered
+    context={"request":request,"students":iter_students()}
+    return StreamingResponse(render_stream("home.html",context),media_type="text/html")
+
 @app.get("/api/students")
 def get_details():
     return students
@@ -0,0 +1,86 @@
+# Benchmark: bytes saved vs CPU cost for each encoding/level used by CompressionMiddleware
+# Payload mimics GET /api/posts (posts with embedded authors).
+# Run from "Lesson 34 FastAPI": python -m fastapi_blog.bench_compression 1000
+import json
+import sys
+import time
+from datetime import UTC, datetime
+
+from fastapi_blog.middleware import available_encodings, make_encoder
+
+LEVELS = {
+    "gzip": [1, 6, 9],
+    "br": [1, 4, 9, 11],
+    "zstd": [1, 3, 9, 19],
+}
+STREAM_CHUNK = 4096
+
+
+def make_posts_payload(count: int) -> bytes:
+    posts = []
+    for i in range(1, count + 1):
+        user_id = i % 25 + 1
+        posts.append(
+            {
+                "title": f"Post number {i} about FastAPI",
+                "content": f"This is the body of post {i}. " * 8,
+                "id": i,
+                "user_id": user_id,
+                "date_posted": datetime.now(UTC).isoformat(),
+                "author": {
+                    "username": f"user{user_id}",
+                    "email": f"user{user_id}@example.com",
+                    "id": user_id,
+                    "image_file": None,
+                    "image_path": "/static/profile_pics/default.jpg",
+                },
+            },
+        )
+    return json.dumps(posts).encode()
+
+
+def measure(encoding: str, level: int, payload: bytes, repeat: int = 5) -> dict:
+    best_whole = best_stream = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        whole = make_encoder(encoding, level).finish(payload)
+        best_whole = min(best_whole, time.perf_counter() - start)
+
+        # Same payload sent as a StreamingResponse: compressed and flushed per chunk
+        encoder = make_encoder(encoding, level)
+        start = time.perf_counter()
+        streamed = b"".join(
+            encoder.compress(payload[i:i + STREAM_CHUNK])
+            for i in range(0, len(payload), STREAM_CHUNK)
+        ) + encoder.finish()
+        best_stream = min(best_stream, time.perf_counter() - start)
+
+    return {
+        "size": len(whole),
+        "stream_size": len(streamed),
+        "ms": best_whole * 1000,
+        "stream_ms": best_stream * 1000,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    payload = make_posts_payload(count)
+    raw_mb = len(payload) / 1024 / 1024
+    print(f"Payload: {count} posts, {len(payload):,} bytes")
+    print(
+        f"{'encoding':<8} {'level':>5} {'bytes':>10} {'saved':>7} {'ms':>8} "
+        f"{'MB/s':>8} {'stream bytes':>13} {'stream ms':>10}",
+    )
+    for encoding in available_encodings()[::-1]:
+        for level in LEVELS[encoding]:
+            r = measure(encoding, level, payload)
+            saved = (1 - r["size"] / len(payload)) * 100
+            print(
+                f"{encoding:<8} {level:>5} {r['size']:>10,} {saved:>6.1f}% {r['ms']:>8.2f} "
+                f"{raw_mb / (r['ms'] / 1000):>8.1f} {r['stream_size']:>13,} {r['stream_ms']:>10.2f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
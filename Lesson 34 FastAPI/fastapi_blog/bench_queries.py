@@ -0,0 +1,119 @@
+# Benchmark: select() built per request (old handlers) vs prebuilt statements in queries.py
+# Uses a throwaway SQLite file, so blog.db is never touched.
+# Run from "Lesson 34 FastAPI": python -m fastapi_blog.bench_queries [iterations]
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from fastapi_blog import queries
+from fastapi_blog.database import Base
+from fastapi_blog.models import Post, User
+
+USERS = 50
+POSTS_PER_USER = 20
+
+
+async def inline_post_by_id(db: AsyncSession, i: int):
+    result = await db.execute(
+        select(Post).options(selectinload(Post.author)).where(Post.id == i % (USERS * POSTS_PER_USER) + 1),
+    )
+    return result.scalars().first()
+
+
+async def inline_user_by_id(db: AsyncSession, i: int):
+    result = await db.execute(select(User).where(User.id == i % USERS + 1))
+    return result.scalars().first()
+
+
+async def inline_user_by_username_and_email(db: AsyncSession, i: int):
+    # The old create_user: two separate round trips
+    name = f"user{i % USERS}"
+    result = await db.execute(select(User).where(User.username == name))
+    result.scalars().first()
+    result = await db.execute(select(User).where(User.email == f"{name}@example.com"))
+    return result.scalars().first()
+
+
+async def inline_posts_by_user(db: AsyncSession, i: int):
+    result = await db.execute(
+        select(Post).options(selectinload(Post.author)).where(Post.user_id == i % USERS + 1),
+    )
+    return result.scalars().all()
+
+
+async def cached_post_by_id(db: AsyncSession, i: int):
+    return await queries.get_post(db, i % (USERS * POSTS_PER_USER) + 1)
+
+
+async def cached_user_by_id(db: AsyncSession, i: int):
+    return await queries.get_user(db, i % USERS + 1)
+
+
+async def cached_user_by_username_or_email(db: AsyncSession, i: int):
+    name = f"user{i % USERS}"
+    return await queries.get_users_by_username_or_email(db, name, f"{name}@example.com")
+
+
+async def cached_posts_by_user(db: AsyncSession, i: int):
+    return await queries.get_posts_by_user(db, i % USERS + 1)
+
+
+CASES = [
+    ("post by id", inline_post_by_id, cached_post_by_id),
+    ("user by id", inline_user_by_id, cached_user_by_id),
+    ("user by username/email", inline_user_by_username_and_email, cached_user_by_username_or_email),
+    ("posts by user", inline_posts_by_user, cached_posts_by_user),
+]
+
+
+async def seed(session_factory):
+    async with session_factory() as db:
+        for u in range(USERS):
+            user = User(username=f"user{u}", email=f"user{u}@example.com")
+            user.posts = [Post(title=f"Post {p}", content="Lorem ipsum " * 20) for p in range(POSTS_PER_USER)]
+            db.add(user)
+        await db.commit()
+
+
+async def timed(session_factory, lookup, iterations: int) -> float:
+    async with session_factory() as db:
+        await lookup(db, 0)  # first call compiles and fills the caches
+        start = time.perf_counter()
+        for i in range(iterations):
+            await lookup(db, i)
+            db.expunge_all()  # fresh ORM objects every time, like a new request
+        return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+async def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await seed(session_factory)
+        stats = queries.track_compile_cache(engine)
+
+        print(f"{iterations} iterations per lookup")
+        print(f"{'lookup':<24} {'variant':<9} {'us/op':>8} {'hits':>6} {'misses':>7} {'hit rate':>9}")
+        for name, inline, cached in CASES:
+            for variant, lookup in (("inline", inline), ("queries", cached)):
+                stats.reset()
+                us = await timed(session_factory, lookup, iterations)
+                s = stats.summary()
+                print(
+                    f"{name:<24} {variant:<9} {us:>8.1f} {s.get('hit', 0):>6} "
+                    f"{s.get('miss', 0):>7} {s['hit_rate']:>8.1%}",
+                )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
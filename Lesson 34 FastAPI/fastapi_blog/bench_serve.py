@@ -0,0 +1,91 @@
+# Benchmark: default uvicorn profile vs the tuned serve.py profile on /api/posts and /
+# Run from "Lesson 34 FastAPI": python -m fastapi_blog.bench_serve [requests] [concurrency]
+import asyncio
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+PATHS = ["/api/posts", "/"]
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(profile: str, port: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "fastapi_blog.serve", "--profile", profile, "--port", str(port)],
+        cwd=ROOT_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 20.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            try:
+                await client.get(f"{base_url}/api/posts")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+async def load(base_url: str, path: str, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        # Warm up connections, templates and the SQLAlchemy statement cache
+        await asyncio.gather(*(client.get(path) for _ in range(concurrency)))
+        queue = iter(range(total))
+
+        async def worker():
+            for _ in queue:
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"{total} requests, {concurrency} concurrent clients")
+    print(f"{'profile':<8} {'path':<11} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for profile in ("default", "tuned"):
+        port = free_port()
+        server = start_server(profile, port)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            await wait_ready(base_url)
+            for path in PATHS:
+                r = await load(base_url, path, total, concurrency)
+                print(f"{profile:<8} {path:<11} {r['rps']:>9.0f} {r['p50']:>8.1f} {r['p99']:>8.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
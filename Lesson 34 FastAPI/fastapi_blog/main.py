@@ -9,13 +9,12 @@ from fastapi.exception_handlers import (
 from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-import fastapi_blog.models
+from fastapi_blog import queries
 from fastapi_blog.database import Base, engine, get_db
+from fastapi_blog.middleware import CompressionMiddleware
 from fastapi_blog.routers import posts, users
 
 @asynccontextmanager
@@ -28,6 +27,7 @@ async def lifespan(_app:FastAPI):
     await engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware, minimum_size=1000)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 app.mount("/media", StaticFiles(directory="media"), name="media")
@@ -41,8 +41,7 @@ app.include_router(posts.router, prefix="/api/posts", tags=["posts"])
 @app.get("/", include_in_schema=False, name="home")
 @app.get("/posts", include_in_schema=False, name="posts")
 async def home(request: Request, db: Annotated[AsyncSession, Depends(get_db)]):
-    result = await db.execute(select(fastapi_blog.models.Post).options(selectinload(fastapi_blog.models.Post.author)))
-    posts = result.scalars().all()
+    posts = await queries.get_posts(db)
     return templates.TemplateResponse(
         request,
         "home.html",
@@ -52,8 +51,7 @@ async def home(request: Request, db: Annotated[AsyncSession, Depends(get_db)]):
 
 @app.get("/posts/{post_id}", include_in_schema=False)
 async def post_page(request: Request, post_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
-    result = await db.execute(select(fastapi_blog.models.Post).options(selectinload(fastapi_blog.models.Post.author)).where(fastapi_blog.models.Post.id == post_id))
-    post = result.scalars().first()
+    post = await queries.get_post(db, post_id)
     if post:
         title = post.title[:50]
         return templates.TemplateResponse(
@@ -70,19 +68,13 @@ async def user_posts_page(
     user_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
-    result = await db.execute(select(fastapi_blog.models.User).where(fastapi_blog.models.User.id == user_id))
-    user = result.scalars().first()
+    user = await queries.get_user(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
-    result = await db.execute(
-        select(fastapi_blog.models.Post)
-        .options(selectinload(fastapi_blog.models.Post.author))
-        .where(fastapi_blog.models.Post.user_id == user_id),
-    )
-    posts = result.scalars().all()
+    posts = await queries.get_posts_by_user(db, user_id)
     return templates.TemplateResponse(
         request,
         "user_posts.html",
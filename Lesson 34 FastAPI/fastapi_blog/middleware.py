@@ -0,0 +1,267 @@
+import zlib
+from collections.abc import Iterable
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Optional encoders: used when installed, silently skipped otherwise
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Media types that are already compressed (or not worth compressing again)
+DEFAULT_EXCLUDED_MEDIA_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zstd",
+    "application/pdf",
+    "application/octet-stream",
+    "text/event-stream",
+)
+
+
+class UncompressedRoute(APIRoute):
+    """Route class that tells CompressionMiddleware to leave responses alone.
+
+    Opt a whole router out with ``APIRouter(route_class=UncompressedRoute)``.
+    """
+
+
+class _GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class _ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK,
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def available_encodings() -> list[str]:
+    """Encodings this process can produce, best first."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def make_encoder(name: str, level: int):
+    if name == "zstd":
+        return _ZstdEncoder(level)
+    if name == "br":
+        return _BrotliEncoder(level)
+    if name == "gzip":
+        return _GzipEncoder(level)
+    raise ValueError(f"Unsupported encoding: {name}")
+
+
+def negotiate_encoding(accept_encoding: str, supported: Iterable[str]) -> str | None:
+    """Pick the first supported encoding the client accepts with q > 0."""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+
+    for name in supported:
+        quality = accepted.get(name, accepted.get("*", 0.0))
+        if quality > 0:
+            return name
+    return None
+
+
+class CompressionMiddleware:
+    """Compress responses with zstd, brotli or gzip depending on Accept-Encoding.
+
+    Bodies smaller than ``minimum_size`` and media types matching
+    ``excluded_media_types`` are sent untouched. Streaming responses are
+    compressed chunk by chunk and flushed so the client sees data as it is
+    produced. Paths under ``excluded_paths`` and routes built from
+    ``UncompressedRoute`` are skipped.
+
+    Every other response gets ``Vary: Accept-Encoding``, compressed or not:
+    the decision depended on the header, so a shared cache must not hand an
+    uncompressed copy to a client that asked for gzip (or the reverse).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        encodings: Iterable[str] | None = None,
+        excluded_paths: Iterable[str] = (),
+        excluded_media_types: Iterable[str] = DEFAULT_EXCLUDED_MEDIA_TYPES,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality, "zstd": zstd_level}
+        available = available_encodings()
+        self.encodings = [name for name in (encodings or available) if name in available]
+        self.excluded_paths = tuple(excluded_paths)
+        self.excluded_media_types = tuple(excluded_media_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding", ""),
+            self.encodings,
+        )
+        if encoding is None:
+
+            async def send_with_vary(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    _add_vary(message)
+                await send(message)
+
+            await self.app(scope, receive, send_with_vary)
+            return
+
+        responder = _CompressionResponder(self, scope, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+def _add_vary(start_message: Message) -> None:
+    MutableHeaders(raw=start_message["headers"]).add_vary_header("Accept-Encoding")
+
+
+class _CompressionResponder:
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        scope: Scope,
+        send: Send,
+        encoding: str,
+    ) -> None:
+        self.middleware = middleware
+        self.scope = scope
+        self.downstream = send
+        self.encoding = encoding
+        self.start_message: Message | None = None
+        self.encoder = None
+        self.passthrough = False
+
+    def _should_skip(self, status_code: int, headers: Headers) -> bool:
+        if status_code in (204, 304) or status_code < 200:
+            return True
+        # The router fills in scope["route"] before the endpoint runs, so it is known by now
+        if isinstance(self.scope.get("route"), UncompressedRoute):
+            return True
+        if "content-encoding" in headers:
+            return True
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return media_type.startswith(self.middleware.excluded_media_types)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start_message = message
+            self.passthrough = self._should_skip(
+                message["status"],
+                Headers(raw=message["headers"]),
+            )
+            if self.passthrough:
+                _add_vary(message)
+                await self.downstream(message)
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            # First body chunk decides between "leave it alone" and "compress"
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                _add_vary(self.start_message)
+                await self.downstream(self.start_message)
+                await self.downstream(message)
+                return
+
+            self.encoder = make_encoder(self.encoding, self.middleware.levels[self.encoding])
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            _add_vary(self.start_message)
+
+            if not more_body:
+                compressed = self.encoder.finish(body)
+                headers["Content-Length"] = str(len(compressed))
+                await self.downstream(self.start_message)
+                await self.downstream({"type": "http.response.body", "body": compressed})
+                return
+
+            # Streaming: final size is unknown, so drop Content-Length and flush per chunk
+            del headers["Content-Length"]
+            await self.downstream(self.start_message)
+
+        if more_body:
+            chunk = self.encoder.compress(body)
+        else:
+            chunk = self.encoder.finish(body)
+        await self.downstream(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body},
+        )
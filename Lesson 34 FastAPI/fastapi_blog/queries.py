@@ -0,0 +1,91 @@
+from collections import Counter
+
+from sqlalchemy import bindparam, event, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import selectinload
+
+from fastapi_blog.models import Post, User
+
+# Hot lookups are built once at import time. Handlers only bind new parameter
+# values, so SQLAlchemy skips constructing the select() and always finds the
+# compiled SQL in its cache; sqlite3 then sees the same SQL text every time
+# and reuses its prepared statement.
+POSTS = select(Post).options(selectinload(Post.author))
+POST_BY_ID = select(Post).where(Post.id == bindparam("post_id"))
+POST_WITH_AUTHOR_BY_ID = POSTS.where(Post.id == bindparam("post_id"))
+POSTS_BY_USER = POSTS.where(Post.user_id == bindparam("user_id"))
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+USER_BY_USERNAME_OR_EMAIL = select(User).where(
+    or_(User.username == bindparam("username"), User.email == bindparam("email")),
+)
+
+
+async def get_posts(db: AsyncSession) -> list[Post]:
+    result = await db.execute(POSTS)
+    return list(result.scalars().all())
+
+
+async def get_post(db: AsyncSession, post_id: int, with_author: bool = True) -> Post | None:
+    statement = POST_WITH_AUTHOR_BY_ID if with_author else POST_BY_ID
+    result = await db.execute(statement, {"post_id": post_id})
+    return result.scalars().first()
+
+
+async def get_posts_by_user(db: AsyncSession, user_id: int) -> list[Post]:
+    result = await db.execute(POSTS_BY_USER, {"user_id": user_id})
+    return list(result.scalars().all())
+
+
+async def get_user(db: AsyncSession, user_id: int) -> User | None:
+    result = await db.execute(USER_BY_ID, {"user_id": user_id})
+    return result.scalars().first()
+
+
+async def get_users_by_username_or_email(
+    db: AsyncSession,
+    username: str | None,
+    email: str | None,
+) -> list[User]:
+    # One round trip instead of two; a None value never matches (x = NULL is false)
+    result = await db.execute(
+        USER_BY_USERNAME_OR_EMAIL,
+        {"username": username, "email": email},
+    )
+    return list(result.scalars().all())
+
+
+class CompileCacheStats:
+    """Counts SQLAlchemy compiled-cache hits/misses for every executed statement."""
+
+    def __init__(self):
+        self.counts: Counter[str] = Counter()
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        if context is None:
+            return
+        if context.cache_hit == CACHE_HIT:
+            self.counts["hit"] += 1
+        elif context.cache_hit == CACHE_MISS:
+            self.counts["miss"] += 1
+        else:
+            self.counts["uncached"] += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total = sum(self.counts.values())
+        return self.counts["hit"] / total if total else 0.0
+
+    def reset(self):
+        self.counts.clear()
+
+    def summary(self) -> dict:
+        return {**self.counts, "hit_rate": round(self.hit_rate, 4)}
+
+
+def track_compile_cache(engine: Engine | AsyncEngine) -> CompileCacheStats:
+    stats = CompileCacheStats()
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    event.listen(sync_engine, "before_cursor_execute", stats.record)
+    return stats
@@ -1,11 +1,10 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 import fastapi_blog.models
+from fastapi_blog import queries
 from fastapi_blog.database import get_db
 from fastapi_blog.schemas import PostCreate, PostResponse, PostUpdate
 
@@ -15,11 +14,7 @@ router = APIRouter()
 
 @router.get("", response_model=list[PostResponse])
 async def get_posts(db: Annotated[AsyncSession, Depends(get_db)]):
-    result = await db.execute(
-        select(fastapi_blog.models.Post).options(selectinload(fastapi_blog.models.Post.author)),
-    )
-    posts = result.scalars().all()
-    return posts
+    return await queries.get_posts(db)
 
 
 @router.post(
@@ -28,10 +23,7 @@ async def get_posts(db: Annotated[AsyncSession, Depends(get_db)]):
     status_code=status.HTTP_201_CREATED,
 )
 async def create_post(post:PostCreate, db: Annotated[AsyncSession, Depends(get_db)]):
-    result = await db.execute(
-        select(fastapi_blog.models.User).where(fastapi_blog.models.User.id == post.user_id),
-    )
-    user = result.scalars().first()
+    user = await queries.get_user(db, post.user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -50,12 +42,7 @@ async def create_post(post:PostCreate, db: Annotated[AsyncSession, Depends(get_d
 
 @router.get("/{post_id}", response_model=PostResponse)
 async def get_post(post_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
-    result = await db.execute(
-        select(fastapi_blog.models.Post)
-        .options(selectinload(fastapi_blog.models.Post.author))
-        .where(fastapi_blog.models.Post.id == post_id),
-    )
-    post = result.scalars().first()
+    post = await queries.get_post(db, post_id)
     if post:
         return post
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
@@ -67,18 +54,14 @@ async def update_post_full(
     post_data: PostCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
-    result = await db.execute(select(fastapi_blog.models.Post).where(fastapi_blog.models.Post.id == post_id))
-    post = result.scalars().first()
+    post = await queries.get_post(db, post_id, with_author=False)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found",
         )
     if post_data.user_id != post.user_id:
-        result = await db.execute(
-            select(fastapi_blog.models.User).where(fastapi_blog.models.User.id == post_data.user_id),
-        )
-        user = result.scalars().first()
+        user = await queries.get_user(db, post_data.user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -100,8 +83,7 @@ async def update_post_partial(
     post_data: PostUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
-    result = await db.execute(select(fastapi_blog.models.Post).where(fastapi_blog.models.Post.id == post_id))
-    post = result.scalars().first()
+    post = await queries.get_post(db, post_id, with_author=False)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -119,8 +101,7 @@ async def update_post_partial(
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_post(post_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
-    result = await db.execute(select(fastapi_blog.models.Post).where(fastapi_blog.models.Post.id == post_id))
-    post = result.scalars().first()
+    post = await queries.get_post(db, post_id, with_author=False)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,11 +1,10 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 import fastapi_blog.models
+from fastapi_blog import queries
 from fastapi_blog.database import get_db
 from fastapi_blog.schemas import PostResponse, UserCreate, UserResponse, UserUpdate
 
@@ -17,29 +16,22 @@ async def update_user(
     user_update: UserUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
-    result = await db.execute(select(fastapi_blog.models.User).where(fastapi_blog.models.User.id == user_id))
-    user = result.scalars().first()
+    user = await queries.get_user(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
-    if user_update.username is not None and user_update.username != user.username:
-        result = await db.execute(
-            select(fastapi_blog.models.User).where(fastapi_blog.models.User.username == user_update.username),
-        )
-        existing_user = result.scalars().first()
-        if existing_user:
+    new_username = user_update.username if user_update.username != user.username else None
+    new_email = user_update.email if user_update.email != user.email else None
+    if new_username is not None or new_email is not None:
+        existing_users = await queries.get_users_by_username_or_email(db, new_username, new_email)
+        if any(existing.username == new_username for existing in existing_users):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already exists",
             )
-    if user_update.email is not None and user_update.email != user.email:
-        result = await db.execute(
-            select(fastapi_blog.models.User).where(fastapi_blog.models.User.email == user_update.email),
-        )
-        existing_email = result.scalars().first()
-        if existing_email:
+        if existing_users:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered",
@@ -59,8 +51,7 @@ async def update_user(
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(user_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
-    result = await db.execute(select(fastapi_blog.models.User).where(fastapi_blog.models.User.id == user_id))
-    user = result.scalars().first()
+    user = await queries.get_user(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -76,21 +67,13 @@ async def delete_user(user_id: int, db: Annotated[AsyncSession, Depends(get_db)]
     status_code=status.HTTP_201_CREATED,
 )
 async def create_user(user: UserCreate, db: Annotated[AsyncSession, Depends(get_db)]):
-    result = await db.execute(
-        select(fastapi_blog.models.User).where(fastapi_blog.models.User.username == user.username),
-    )
-    existing_user = result.scalars().first()
-    if existing_user:
+    existing_users = await queries.get_users_by_username_or_email(db, user.username, user.email)
+    if any(existing.username == user.username for existing in existing_users):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already exists",
         )
-
-    result = await db.execute(
-        select(fastapi_blog.models.User).where(fastapi_blog.models.User.email == user.email),
-    )
-    existing_email = result.scalars().first()
-    if existing_email:
+    if existing_users:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
@@ -107,8 +90,7 @@ async def create_user(user: UserCreate, db: Annotated[AsyncSession, Depends(get_
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(user_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
-    result = await db.execute(select(fastapi_blog.models.User).where(fastapi_blog.models.User.id == user_id))
-    user = result.scalars().first()
+    user = await queries.get_user(db, user_id)
     if user:
         return user
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -117,17 +99,10 @@ async def get_user(user_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
 
 @router.get("/{user_id}/posts", response_model=list[PostResponse])
 async def get_user_posts(user_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
-    result = await db.execute(select(fastapi_blog.models.User).where(fastapi_blog.models.User.id == user_id))
-    user = result.scalars().first()
+    user = await queries.get_user(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
-    result = await db.execute(
-        select(fastapi_blog.models.Post)
-        .options(selectinload(fastapi_blog.models.Post.author))
-        .where(fastapi_blog.models.Post.user_id == user_id),
-    )
-    posts = result.scalars().all()
-    return posts
+    return await queries.get_posts_by_user(db, user_id)
@@ -0,0 +1,104 @@
+# Production-style launcher for the blog.
+# Run from "Lesson 34 FastAPI": python -m fastapi_blog.serve [--profile default|tuned] [--http2]
+import argparse
+import importlib.util
+import os
+from pathlib import Path
+
+import uvicorn
+
+APP = "fastapi_blog.main:app"
+PACKAGE_DIR = Path(__file__).resolve().parent
+
+# Tuned profile defaults: keep idle clients around long enough to reuse their
+# connections, accept bursts without dropping SYNs, and shed load with 503s
+# instead of queueing forever once this many requests are in flight.
+KEEP_ALIVE = 30
+BACKLOG = 4096
+LIMIT_CONCURRENCY = 1000
+
+
+def has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def fastest_loop() -> str:
+    return "uvloop" if has_module("uvloop") else "asyncio"
+
+
+def fastest_http() -> str:
+    return "httptools" if has_module("httptools") else "h11"
+
+
+def uvicorn_options(profile: str, workers: int) -> dict:
+    if profile == "default":
+        # Exactly what a bare `uvicorn fastapi_blog.main:app` gets
+        return {}
+    return {
+        "loop": fastest_loop(),
+        "http": fastest_http(),
+        "timeout_keep_alive": KEEP_ALIVE,
+        "backlog": BACKLOG,
+        "limit_concurrency": LIMIT_CONCURRENCY,
+        "access_log": False,
+        "workers": workers,
+    }
+
+
+def serve_http2(host: str, port: int, workers: int):
+    # HTTP/2 needs an h2-capable server; uvicorn only speaks HTTP/1.1
+    if not has_module("hypercorn"):
+        raise SystemExit("HTTP/2 needs hypercorn: pip install hypercorn")
+
+    from hypercorn.config import Config
+    from hypercorn.run import run
+
+    config = Config()
+    config.application_path = APP
+    config.bind = [f"{host}:{port}"]
+    config.keep_alive_timeout = KEEP_ALIVE
+    config.backlog = BACKLOG
+    config.workers = workers
+    config.worker_class = "uvloop" if has_module("uvloop") else "asyncio"
+    config.accesslog = None
+    # Without TLS certificates browsers stay on HTTP/1.1, but h2c clients
+    # (curl --http2-prior-knowledge, httpx with http2=True) get HTTP/2
+    certfile, keyfile = os.getenv("BLOG_CERTFILE"), os.getenv("BLOG_KEYFILE")
+    if certfile and keyfile:
+        config.certfile, config.keyfile = certfile, keyfile
+    print(f"Serving {APP} with hypercorn (HTTP/2, {config.worker_class}) on {host}:{port}")
+    run(config)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Run the FastAPI blog")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--profile", choices=["default", "tuned"], default="tuned")
+    parser.add_argument("--http2", action="store_true", help="serve with hypercorn (HTTP/2)")
+    args = parser.parse_args(argv)
+
+    # static/, media/, templates/ and blog.db are all relative to the package folder
+    os.chdir(PACKAGE_DIR)
+
+    if args.http2:
+        serve_http2(args.host, args.port, args.workers)
+        return
+
+    options = uvicorn_options(args.profile, args.workers)
+    print(
+        f"Serving {APP} with uvicorn profile={args.profile} "
+        f"loop={options.get('loop', 'auto')} http={options.get('http', 'auto')} on {args.host}:{args.port}",
+    )
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        app_dir=str(PACKAGE_DIR.parent),
+        **options,
+    )
+
+
+if __name__ == "__main__":
+    main()